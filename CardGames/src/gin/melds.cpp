@@ -459,16 +459,28 @@ std::vector<SplitHand> GetCandidateMelds(
 std::vector<Cards> MeldIdsToMelds(const CardIds &meld_ids)
 {
     std::vector<Cards> melds;
-    melds.reserve(3);
     for (int i = 0; i < meld_ids.size(); i++)
     {
         int meld_n = meld_ids[i];
-        if (meld_ids[i] != 0)
+        if (meld_n != 0)
         {
-            melds[meld_n - 1].push_back({CardFromId(i)});
+            if (melds.size() < meld_n)
+                melds.resize(meld_n);
+            melds[meld_n - 1].push_back(CardFromId(i));
         }
     }
-    return {};
+    return SortMelds(melds);
+}
+
+SplitHand BestSplitHand(const Cards &hand)
+{
+    auto candidate_melds = GetCandidateMelds(hand);
+    return *std::min_element(
+        candidate_melds.begin(),
+        candidate_melds.end(),
+        // pick the meld combo with the least deadwood
+        [](const SplitHand &a, const SplitHand &b)
+        { return std::get<0>(a) < std::get<0>(b); });
 }
 
 SortedSplitHand SplitMelds(const Cards &hand, const std::optional<Melds> &melds)
@@ -488,16 +500,7 @@ SortedSplitHand SplitMelds(const Cards &hand, const std::optional<Melds> &melds)
     }
 
     // int start_result = ProfilerStart("split_melds.prof");
-    auto candidate_melds = GetCandidateMelds(hand);
-    // for (int i = 0; i < 10'000; i++)
-    //     candidate_melds = GetCandidateMelds(hand);
-
-    SplitHand split_hand = *std::min_element(
-        candidate_melds.begin(),
-        candidate_melds.end(),
-        // pick the meld combo with the least deadwood
-        [](const SplitHand &a, const SplitHand &b)
-        { return std::get<0>(a) < std::get<0>(b); });
+    SplitHand split_hand = BestSplitHand(hand);
     // ProfilerStop();
 
     // auto end = std::chrono::high_resolution_clock::now();
@@ -568,6 +571,10 @@ SplitSetsRuns(const Melds &melds)
         if (IsRun(meld))
         {
             SortByRank(meld_vec);
+            // aces sort low, so an ace-high run like Q-K-A reads A..K:
+            // move the ace to the top, as GetSuitRunLayoffs expects
+            if (meld_vec.front().rank == Rank::ACE && meld_vec.back().rank == Rank::KING)
+                std::rotate(meld_vec.begin(), meld_vec.begin() + 1, meld_vec.end());
             Card first = meld_vec.front();
             Card last = meld_vec.back();
             runs[first.suit].push_back({first.rank, last.rank});
@@ -683,20 +690,20 @@ std::tuple<int, std::vector<Cards>, Cards, Cards> SortLayoffCandidate(
     return std::make_tuple(deadwood, MeldIdsToMelds(meld_ids), layoffs, unmelded);
 }
 
-std::tuple<int, std::vector<Cards>, Cards, Cards>
-LayoffDeadwood(
+LayoffCandidate BestLayoffCandidate(
     const Cards &hand,
     const Melds &opp_melds,
     bool stop_on_zero)
 {
     auto [sets, runs] = SplitSetsRuns(opp_melds);
-    std::vector<std::tuple<int, CardIds, Cards, Cards>> candidates;
+    std::vector<LayoffCandidate> candidates;
 
     for (auto &[_, melds, unmelded] : GetCandidateMelds(hand))
     {
         // loop over each possible meld we can make,
         // and see what we can do with the remaining cards
-        CardSet unmelded_set = CardsToSet(unmelded);
+        // std::set_difference and std::set_union need sorted ranges
+        SortedCardSet unmelded_set = CardsToSortedSet(unmelded);
         Cards sls = GetSetLayoffs(unmelded, sets);
         for (auto &set_layoffs : Powerset(sls))
         {
@@ -706,15 +713,15 @@ LayoffDeadwood(
             std::vector<Cards> rls = GetRunLayoffs(std::vector<Card>(um_set.begin(), um_set.end()), runs);
             for (auto &run_layoffs : Powerset(rls))
             {
-                CardSet lo_runs;
+                SortedCardSet lo_runs;
                 for (auto &rl : run_layoffs)
                     for (auto &c : rl)
                         lo_runs.insert(c);
-                CardSet um_run;
+                SortedCardSet um_run;
                 std::set_difference(um_set.begin(), um_set.end(), lo_runs.begin(), lo_runs.end(), std::inserter(um_run, um_run.end()));
                 int deadwood = GinRummyCardsDeadwood(Cards(um_run.begin(), um_run.end()));
                 Cards um_cards = Cards(um_run.begin(), um_run.end());
-                CardSet laid_off_cards;
+                SortedCardSet laid_off_cards;
                 std::set_union(lo_sets.begin(), lo_sets.end(), lo_runs.begin(), lo_runs.end(), std::inserter(laid_off_cards, laid_off_cards.end()));
                 auto candidate = std::make_tuple(
                     deadwood,
@@ -722,16 +729,24 @@ LayoffDeadwood(
                     Cards(laid_off_cards.begin(), laid_off_cards.end()),
                     um_cards);
                 if (stop_on_zero && deadwood == 0)
-                    return SortLayoffCandidate(candidate);
+                    return candidate;
                 candidates.push_back(candidate);
             }
         }
     }
 
-    auto best_candidate = *std::min_element(
+    return *std::min_element(
         candidates.begin(),
         candidates.end(),
         [](auto const &a, auto const &b)
         { return std::get<0>(a) < std::get<0>(b); });
-    return SortLayoffCandidate(best_candidate);
+}
+
+std::tuple<int, std::vector<Cards>, Cards, Cards>
+LayoffDeadwood(
+    const Cards &hand,
+    const Melds &opp_melds,
+    bool stop_on_zero)
+{
+    return SortLayoffCandidate(BestLayoffCandidate(hand, opp_melds, stop_on_zero));
 }
\ No newline at end of file
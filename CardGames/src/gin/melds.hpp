@@ -9,6 +9,7 @@
 #include <unordered_set>
 #include <unordered_map>
 #include <numeric>
+#include <optional>
 #include <gperftools/profiler.h>
 
 #include "../deck/card.hpp"
@@ -21,10 +22,13 @@ using RankValues = std::vector<int>;
 using SortedSplitHand = std::tuple<int, std::vector<Cards>, Cards>;
 using CardIds = std::array<int, 52>;
 using SplitHand = std::tuple<int, CardIds, Cards>;
+// deadwood, meld number of each card id (0 if unmelded), laid off, unmelded
+using LayoffCandidate = std::tuple<int, CardIds, Cards, Cards>;
 
 std::array<std::vector<Suit>, 13> RankPartition(const std::vector<Card> &cards);
 std::array<std::vector<Rank>, 4> SuitPartition(const std::vector<Card> &cards);
 
+SplitHand BestSplitHand(const Cards &hand);
 SortedSplitHand SplitMelds(const Cards &hand, const std::optional<Melds> &melds = std::nullopt);
 std::vector<SplitHand> GetCandidateMelds(const Cards &hand, std::optional<int> max_deadwood = std::nullopt, bool stop_on_gin = true);
 
@@ -45,6 +49,10 @@ std::vector<Cards> GetRunLayoffs(const Cards &hand, const std::unordered_map<Sui
 
 std::vector<Cards> MeldIdsToMelds(const CardIds &meld_ids);
 std::tuple<int, std::vector<Cards>, Cards, Cards> SortLayoffCandidate(std::tuple<int, Melds, Cards, Cards> candidate);
+LayoffCandidate BestLayoffCandidate(
+    const Cards &hand,
+    const Melds &opp_melds,
+    bool stop_on_zero = true);
 std::tuple<int, std::vector<Cards>, Cards, Cards> LayoffDeadwood(
     const Cards &hand,
     const Melds &opp_melds,
@@ -1,9 +1,21 @@
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
 #include <pybind11/stl.h>
 #include "gin/gin_rummy.hpp"
 #include "gin/melds.hpp"
 
+namespace py = pybind11;
+
 using CardStrings = std::vector<std::string>;
+// one hand per row of card ids, see card_utils.deck.card_id_map,
+// where NO_CARD pads out rows of hands with fewer cards
+using HandsArray = py::array_t<uint8_t, py::array::c_style | py::array::forcecast>;
+using DeadwoodArray = py::array_t<int32_t>;
+// one row per hand, lined up with its cards: the meld number (1, 2, 3)
+// of each card, 0 if unmelded, or NO_MELD for padding
+using MeldLabelArray = py::array_t<int8_t>;
+const uint8_t NO_CARD = 255;
+const int8_t NO_MELD = -1;
 
 int get_deadwood(std::vector<std::string> &unmelded_cards)
 {
@@ -40,7 +52,12 @@ std::tuple<int, std::vector<CardStrings>, CardStrings> split_melds(std::vector<s
     }
 
     // auto start = std::chrono::high_resolution_clock::now();
-    SortedSplitHand split_melds = SplitMelds(cards, melds_set);
+    SortedSplitHand split_melds;
+    {
+        // only C++ objects from here on, so other threads can run python
+        py::gil_scoped_release release;
+        split_melds = SplitMelds(cards, melds_set);
+    }
     // auto stop = std::chrono::high_resolution_clock::now();
     // auto duration = std::chrono::duration_cast<std::chrono::microseconds>(stop - start);
     // std::cout << "SplitMelds took " << duration.count() << " microseconds" << std::endl;
@@ -50,7 +67,11 @@ std::tuple<int, std::vector<CardStrings>, CardStrings> split_melds(std::vector<s
 std::vector<std::tuple<int, std::vector<CardStrings>, CardStrings>> all_candidate_melds(std::vector<std::string> &hand)
 {
     std::vector<Card> cards = FromStrings(hand);
-    std::vector<SplitHand> candidate_melds = GetCandidateMelds(cards);
+    std::vector<SplitHand> candidate_melds;
+    {
+        py::gil_scoped_release release;
+        candidate_melds = GetCandidateMelds(cards);
+    }
     std::vector<std::tuple<int, std::vector<CardStrings>, CardStrings>> serialized_candidate_melds;
     for (SplitHand candidate_meld : candidate_melds)
     {
@@ -75,7 +96,12 @@ layoff_deadwood(
         Cards cards_meld = FromStrings(meld);
         opp_melds_set.push_back(std::move(cards_meld));
     }
-    auto dw = LayoffDeadwood(FromStrings(hand), opp_melds_set, stop_on_zero);
+    Cards hand_cards = FromStrings(hand);
+    std::tuple<int, std::vector<Cards>, Cards, Cards> dw;
+    {
+        py::gil_scoped_release release;
+        dw = LayoffDeadwood(hand_cards, opp_melds_set, stop_on_zero);
+    }
     std::vector<Cards> melded_cards = std::get<1>(dw);
     std::vector<CardStrings> melded_cards_strings;
     for (auto meld : melded_cards)
@@ -85,7 +111,166 @@ layoff_deadwood(
     return {std::get<0>(dw), melded_cards_strings, ToStrings(std::get<2>(dw)), ToStrings(std::get<3>(dw))};
 }
 
-namespace py = pybind11;
+static py::buffer_info HandsInfo(const HandsArray &hands)
+{
+    py::buffer_info info = hands.request();
+    if (info.ndim != 2)
+        throw py::value_error("hands must be a 2d array: one row of card ids per hand");
+    return info;
+}
+
+static Cards RowCards(const uint8_t *row, py::ssize_t n_cards)
+{
+    Cards cards;
+    cards.reserve(n_cards);
+    for (py::ssize_t j = 0; j < n_cards; j++)
+    {
+        if (row[j] < 52)
+            cards.push_back(CardFromId(row[j]));
+        else if (row[j] != NO_CARD)
+            throw py::value_error("card ids must be 0-51, or 255 for no card");
+    }
+    return cards;
+}
+
+static void LabelRow(const uint8_t *row, py::ssize_t n_cards, const CardIds &meld_ids, int8_t *labels)
+{
+    for (py::ssize_t j = 0; j < n_cards; j++)
+        labels[j] = row[j] < 52 ? int8_t(meld_ids[row[j]]) : NO_MELD;
+}
+
+DeadwoodArray get_deadwood_batch(const HandsArray &hands)
+{
+    py::buffer_info info = HandsInfo(hands);
+    py::ssize_t n_hands = info.shape[0], n_cards = info.shape[1];
+    const uint8_t *ids = static_cast<const uint8_t *>(info.ptr);
+
+    DeadwoodArray deadwoods(n_hands);
+    auto dw = deadwoods.mutable_unchecked<1>();
+    {
+        // the arrays are allocated, so the loop only touches raw buffers
+        py::gil_scoped_release release;
+        for (py::ssize_t i = 0; i < n_hands; i++)
+            dw(i) = GinRummyCardsDeadwood(RowCards(ids + i * n_cards, n_cards));
+    }
+    return deadwoods;
+}
+
+std::tuple<DeadwoodArray, MeldLabelArray> split_melds_batch(const HandsArray &hands)
+{
+    py::buffer_info info = HandsInfo(hands);
+    py::ssize_t n_hands = info.shape[0], n_cards = info.shape[1];
+    const uint8_t *ids = static_cast<const uint8_t *>(info.ptr);
+
+    DeadwoodArray deadwoods(n_hands);
+    MeldLabelArray labels({n_hands, n_cards});
+    auto dw = deadwoods.mutable_unchecked<1>();
+    int8_t *label_rows = labels.mutable_data();
+    {
+        py::gil_scoped_release release;
+        for (py::ssize_t i = 0; i < n_hands; i++)
+        {
+            const uint8_t *row = ids + i * n_cards;
+            SplitHand split_hand = BestSplitHand(RowCards(row, n_cards));
+            dw(i) = std::get<0>(split_hand);
+            LabelRow(row, n_cards, std::get<1>(split_hand), label_rows + i * n_cards);
+        }
+    }
+    return {deadwoods, labels};
+}
+
+std::vector<std::tuple<DeadwoodArray, MeldLabelArray>> get_candidate_melds_batch(const HandsArray &hands)
+{
+    py::buffer_info info = HandsInfo(hands);
+    py::ssize_t n_hands = info.shape[0], n_cards = info.shape[1];
+    const uint8_t *ids = static_cast<const uint8_t *>(info.ptr);
+
+    // solve every hand first, since the arrays need the GIL to allocate
+    std::vector<std::vector<SplitHand>> hand_candidates(n_hands);
+    {
+        py::gil_scoped_release release;
+        for (py::ssize_t i = 0; i < n_hands; i++)
+            hand_candidates[i] = GetCandidateMelds(RowCards(ids + i * n_cards, n_cards));
+    }
+
+    std::vector<std::tuple<DeadwoodArray, MeldLabelArray>> all_candidates;
+    all_candidates.reserve(n_hands);
+    for (py::ssize_t i = 0; i < n_hands; i++)
+    {
+        const uint8_t *row = ids + i * n_cards;
+        const std::vector<SplitHand> &candidates = hand_candidates[i];
+        py::ssize_t n_candidates = candidates.size();
+        DeadwoodArray deadwoods(n_candidates);
+        MeldLabelArray labels({n_candidates, n_cards});
+        auto dw = deadwoods.mutable_unchecked<1>();
+        int8_t *label_rows = labels.mutable_data();
+        for (py::ssize_t c = 0; c < n_candidates; c++)
+        {
+            dw(c) = std::get<0>(candidates[c]);
+            LabelRow(row, n_cards, std::get<1>(candidates[c]), label_rows + c * n_cards);
+        }
+        all_candidates.emplace_back(deadwoods, labels);
+    }
+    return all_candidates;
+}
+
+std::tuple<DeadwoodArray, MeldLabelArray, py::array_t<bool>>
+layoff_deadwood_batch(
+    const HandsArray &hands,
+    const HandsArray &opp_hands,
+    const py::array_t<int8_t, py::array::c_style | py::array::forcecast> &opp_meld_labels,
+    bool stop_on_zero)
+{
+    py::buffer_info info = HandsInfo(hands);
+    py::buffer_info opp_info = HandsInfo(opp_hands);
+    py::buffer_info opp_label_info = opp_meld_labels.request();
+    py::ssize_t n_hands = info.shape[0], n_cards = info.shape[1];
+    py::ssize_t n_opp_cards = opp_info.shape[1];
+    if (opp_info.shape[0] != n_hands || opp_label_info.ndim != 2 || opp_label_info.shape[0] != n_hands || opp_label_info.shape[1] != n_opp_cards)
+        throw py::value_error("need one opponent hand, and its meld labels, per hand");
+    const uint8_t *ids = static_cast<const uint8_t *>(info.ptr);
+    const uint8_t *opp_ids = static_cast<const uint8_t *>(opp_info.ptr);
+    const int8_t *opp_labels = static_cast<const int8_t *>(opp_label_info.ptr);
+
+    DeadwoodArray deadwoods(n_hands);
+    MeldLabelArray labels({n_hands, n_cards});
+    py::array_t<bool> laid_off({n_hands, n_cards});
+    auto dw = deadwoods.mutable_unchecked<1>();
+    int8_t *label_rows = labels.mutable_data();
+    bool *laid_off_rows = laid_off.mutable_data();
+    {
+        py::gil_scoped_release release;
+        for (py::ssize_t i = 0; i < n_hands; i++)
+        {
+            // gather the opponent's melds by meld number
+            Melds opp_melds(3);
+            for (py::ssize_t j = 0; j < n_opp_cards; j++)
+            {
+                int8_t meld_n = opp_labels[i * n_opp_cards + j];
+                uint8_t card_id = opp_ids[i * n_opp_cards + j];
+                if (meld_n > 0 && meld_n <= 3 && card_id < 52)
+                    opp_melds[meld_n - 1].push_back(CardFromId(card_id));
+            }
+            opp_melds.erase(
+                std::remove_if(opp_melds.begin(), opp_melds.end(), [](const Cards &meld)
+                               { return meld.empty(); }),
+                opp_melds.end());
+
+            const uint8_t *row = ids + i * n_cards;
+            LayoffCandidate candidate = BestLayoffCandidate(RowCards(row, n_cards), opp_melds, stop_on_zero);
+            dw(i) = std::get<0>(candidate);
+            LabelRow(row, n_cards, std::get<1>(candidate), label_rows + i * n_cards);
+
+            CardIds is_laid_off;
+            is_laid_off.fill(0);
+            for (const Card &card : std::get<2>(candidate))
+                is_laid_off[card.ToId()] = 1;
+            for (py::ssize_t j = 0; j < n_cards; j++)
+                laid_off_rows[i * n_cards + j] = row[j] < 52 && is_laid_off[row[j]];
+        }
+    }
+    return {deadwoods, labels, laid_off};
+}
 
 PYBIND11_MODULE(card_games, m)
 {
@@ -93,4 +278,8 @@ PYBIND11_MODULE(card_games, m)
     m.def("split_melds", &split_melds, py::arg("hand"), py::arg("melds") = std::nullopt, "Split melds from list of cards");
     m.def("get_candidate_melds", &all_candidate_melds, py::arg("hand"), "Get all candidate melds from list of cards");
     m.def("layoff_deadwood", &layoff_deadwood, py::arg("hand"), py::arg("opp_melds"), py::arg("stop_on_zero") = true, "Layoff deadwood from list of cards");
+    m.def("get_deadwood_batch", &get_deadwood_batch, py::arg("hands"), "Get deadwood of every card in each row of card ids");
+    m.def("split_melds_batch", &split_melds_batch, py::arg("hands"), "Split melds from each row of card ids");
+    m.def("get_candidate_melds_batch", &get_candidate_melds_batch, py::arg("hands"), "Get all candidate melds from each row of card ids");
+    m.def("layoff_deadwood_batch", &layoff_deadwood_batch, py::arg("hands"), py::arg("opp_hands"), py::arg("opp_meld_labels"), py::arg("stop_on_zero") = true, "Layoff deadwood from each row of card ids");
 }
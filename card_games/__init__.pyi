@@ -1,12 +1,18 @@
 from __future__ import annotations
 import card_games
+import numpy
+import numpy.typing
 import typing
 
 __all__ = [
     "get_candidate_melds",
+    "get_candidate_melds_batch",
     "get_deadwood",
+    "get_deadwood_batch",
     "layoff_deadwood",
-    "split_melds"
+    "layoff_deadwood_batch",
+    "split_melds",
+    "split_melds_batch"
 ]
 
 
@@ -14,15 +20,31 @@ def get_candidate_melds(hand: typing.List[str]) -> typing.List[typing.Tuple[int,
     """
     Get all candidate melds from list of cards
     """
+def get_candidate_melds_batch(hands: numpy.typing.NDArray[numpy.uint8]) -> typing.List[typing.Tuple[numpy.typing.NDArray[numpy.int32], numpy.typing.NDArray[numpy.int8]]]:
+    """
+    Get all candidate melds from each row of card ids
+    """
 def get_deadwood(unmelded_cards: typing.List[str]) -> int:
     """
     Get deadwood from list of unmelded cards
     """
+def get_deadwood_batch(hands: numpy.typing.NDArray[numpy.uint8]) -> numpy.typing.NDArray[numpy.int32]:
+    """
+    Get deadwood of every card in each row of card ids
+    """
 def layoff_deadwood(hand: typing.List[str], opp_melds: typing.List[typing.List[str]], stop_on_zero: bool = True) -> typing.Tuple[int, typing.List[typing.List[str]], typing.List[str], typing.List[str]]:
     """
     Layoff deadwood from list of cards
     """
+def layoff_deadwood_batch(hands: numpy.typing.NDArray[numpy.uint8], opp_hands: numpy.typing.NDArray[numpy.uint8], opp_meld_labels: numpy.typing.NDArray[numpy.int8], stop_on_zero: bool = True) -> typing.Tuple[numpy.typing.NDArray[numpy.int32], numpy.typing.NDArray[numpy.int8], numpy.typing.NDArray[numpy.bool_]]:
+    """
+    Layoff deadwood from each row of card ids
+    """
 def split_melds(hand: typing.List[str], melds: typing.Optional[typing.List[typing.List[str]]] = None) -> typing.Tuple[int, typing.List[typing.List[str]], typing.List[str]]:
     """
     Split melds from list of cards
     """
+def split_melds_batch(hands: numpy.typing.NDArray[numpy.uint8]) -> typing.Tuple[numpy.typing.NDArray[numpy.int32], numpy.typing.NDArray[numpy.int8]]:
+    """
+    Split melds from each row of card ids
+    """
@@ -18,6 +18,17 @@ rank_ids = {rank: index for index, rank in enumerate(ranks)}
 card_id_map = {card: index for index, card in enumerate(cards)}
 reverse_card_id_map = {index: card for card, index in card_id_map.items()}
 
+# bit position of each card in a 52-bit hand mask:
+# each suit is a block of 13 bits, ranks 2..A within the block,
+# so the ranks a hand holds in one suit are contiguous bits
+card_bit_index = {
+    card: 13 * suit_ids[card[1]] + rank_ids[card[0]] for card in cards
+}
+bit_index_cards: List[str] = sorted(
+    card_bit_index, key=lambda card: card_bit_index[card]
+)
+card_bits = {card: 1 << index for card, index in card_bit_index.items()}
+
 digit_map = {d: int(d) for d in "23456789"}
 common_rank_to_value = {"T": 10, "J": 11, "Q": 12, "K": 13}
 common_rank_to_value.update(digit_map)
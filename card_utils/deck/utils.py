@@ -15,6 +15,30 @@ def random_deck() -> List[Card]:
     return deck_copy
 
 
+def cards_to_mask(cards) -> int:
+    """
+    :param cards: ([str])
+    :return: (int) 52-bit mask, see deck.card_bit_index
+    """
+    mask = 0
+    for card in cards:
+        mask |= deck.card_bits[card]
+    return mask
+
+
+def mask_to_cards(mask: int) -> List[Card]:
+    """
+    :param mask: (int) 52-bit mask, see deck.card_bit_index
+    :return: ([str]) ordered by suit, then rank
+    """
+    cards = []
+    while mask:
+        low_bit = mask & -mask
+        cards.append(deck.bit_index_cards[low_bit.bit_length() - 1])
+        mask ^= low_bit
+    return cards
+
+
 def rank_partition(cards) -> Dict[str, List[str]]:
     """
     :param cards: ([str])
@@ -0,0 +1,417 @@
+""" choose between the card_games extension and the pure python
+gin rummy meld solvers
+
+the native extension is used when it can be imported,
+and python otherwise, unless overridden, in order of precedence:
+-> use_backend("python"), from code
+-> the CARD_UTILS_GIN_BACKEND environment variable, e.g. "python"
+
+set CARD_UTILS_GIN_PARITY to a fraction, e.g. 0.01, or call
+use_backend(..., parity_rate=0.01), to check that fraction of calls
+against the python solvers
+"""
+
+import logging
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from card_utils.deck import card_id_map, reverse_card_id_map
+from card_utils.deck.utils import Card
+from card_utils.games.gin.rummy import utils as rummy_utils
+
+logger = logging.getLogger(__name__)
+
+BACKEND_ENV_VAR = "CARD_UTILS_GIN_BACKEND"
+PARITY_ENV_VAR = "CARD_UTILS_GIN_PARITY"
+
+SplitHand = Tuple[int, List[List[Card]], List[Card]]
+LayoffHand = Tuple[int, List[List[Card]], List[Card], List[Card]]
+
+# padding in the rows of card ids the native batch solvers take
+NO_CARD = 255
+
+
+class MeldBackend:
+    """the meld solvers one backend provides"""
+
+    def __init__(
+        self,
+        name: str,
+        split_melds: Callable[..., SplitHand],
+        get_deadwood: Callable[[List[Card]], int],
+        layoff_deadwood: Callable[..., LayoffHand],
+        split_melds_batch: Optional[
+            Callable[[List[List[Card]]], List[SplitHand]]
+        ] = None,
+    ):
+        """
+        :param name: (str)
+        :param split_melds: (function) (hand, melds=None)
+            --> (deadwood, melds, unmelded)
+        :param get_deadwood: (function) unmelded cards --> deadwood
+        :param layoff_deadwood: (function) (hand, opp_melds, stop_on_zero)
+            --> (deadwood, melds, laid off, unmelded)
+        :param split_melds_batch: (function) hands --> split_melds of each,
+            solved in one call, or None to solve them one by one
+        """
+        self.name = name
+        self.split_melds = split_melds
+        self.get_deadwood = get_deadwood
+        self.layoff_deadwood = layoff_deadwood
+        self.split_melds_batch = split_melds_batch
+
+    def __repr__(self) -> str:
+        return f"MeldBackend({self.name})"
+
+
+def _python_backend() -> MeldBackend:
+    """
+    :return: (MeldBackend)
+    """
+
+    def split_melds(hand, melds=None):
+        return rummy_utils.split_melds(hand, melds, backend="bitmask")
+
+    return MeldBackend(
+        "python",
+        split_melds=split_melds,
+        get_deadwood=rummy_utils.get_deadwood,
+        layoff_deadwood=rummy_utils.layoff_deadwood,
+    )
+
+
+def _native_backend() -> Optional[MeldBackend]:
+    """
+    :return: (MeldBackend) or None if card_games is not built
+    """
+    try:
+        import card_games
+    except ImportError:
+        return None
+    if not hasattr(card_games, "split_melds"):
+        # only the stubs in the source tree, not the built extension
+        return None
+    return MeldBackend(
+        "native",
+        split_melds=card_games.split_melds,
+        get_deadwood=card_games.get_deadwood,
+        layoff_deadwood=card_games.layoff_deadwood,
+        split_melds_batch=_card_id_batch(card_games.split_melds_batch),
+    )
+
+
+def _card_id_batch(
+    split_melds_batch: Callable,
+) -> Optional[Callable[[List[List[Card]]], List[SplitHand]]]:
+    """wrap a solver of uint8 card id rows to take and return cards
+
+    :param split_melds_batch: (function) card ids, one row per hand,
+        padded with NO_CARD --> (deadwoods, meld labels), where
+        a label is 0 for an unmelded card and -1 for padding
+    :return: (function) hands --> (deadwood, melds, unmelded) of each,
+        with the cards by rank, aces low, then suit
+        --> None if numpy is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    # card ids run 2c, 2d, .. As: shift them so the aces come first
+    sort_keys = (numpy.arange(NO_CARD + 1) + 4) % 52
+    key_cards = numpy.array(
+        [reverse_card_id_map[(key - 4) % 52] for key in range(52)],
+        dtype=object,
+    )
+
+    def split_batch(hands: List[List[Card]]) -> List[SplitHand]:
+        if not hands:
+            return []
+        lengths = numpy.array([len(hand) for hand in hands])
+        ids = numpy.full((len(hands), lengths.max()), NO_CARD, numpy.uint8)
+        ids[numpy.arange(ids.shape[1]) < lengths[:, None]] = [
+            card_id_map[c] for hand in hands for c in hand
+        ]
+        deadwoods, labels = split_melds_batch(ids)
+
+        # sort each row by label, then by rank and suit,
+        # so padding comes first, then unmelded cards, then each meld
+        order = numpy.argsort(
+            labels.astype(numpy.int16) * 64 + sort_keys[ids], axis=1
+        )
+        rows = key_cards[
+            sort_keys[numpy.take_along_axis(ids, order, axis=1)]
+        ].tolist()
+        # where each row's unmelded cards and melds start and end
+        bounds = numpy.cumsum(
+            [ids.shape[1] - lengths]
+            + [
+                (labels == label).sum(axis=1)
+                for label in range(int(labels.max()) + 1)
+            ],
+            axis=0,
+        ).T.tolist()
+
+        splits: List[SplitHand] = []
+        for deadwood, row, (start, *ends) in zip(
+            deadwoods.tolist(), rows, bounds
+        ):
+            melds = [row[lo:hi] for lo, hi in zip(ends, ends[1:]) if lo < hi]
+            splits.append((deadwood, melds, row[start : ends[0]]))
+        return splits
+
+    return split_batch
+
+
+# name --> function to load the backend, returning None if unavailable,
+# tried in this order when no backend is asked for
+_loaders: Dict[str, Callable[[], Optional[MeldBackend]]] = {
+    "native": _native_backend,
+    "python": _python_backend,
+}
+_loaded: Dict[str, Optional[MeldBackend]] = {}
+
+
+def register_backend(
+    name: str,
+    loader: Callable[[], Optional[MeldBackend]],
+    first: bool = False,
+):
+    """
+    :param name: (str)
+    :param loader: (function) returns the backend, or None if unavailable
+    :param first: (bool) if True, prefer it to every other backend
+    """
+    _loaded.pop(name, None)
+    _loaders.pop(name, None)
+    others = list(_loaders.items()) if first else []
+    if first:
+        _loaders.clear()
+    _loaders[name] = loader
+    _loaders.update(others)
+
+
+def load_backend(name: str) -> Optional[MeldBackend]:
+    """
+    :param name: (str)
+    :return: (MeldBackend) or None if it is unavailable
+    """
+    if name not in _loaders:
+        raise ValueError(
+            f"unknown gin backend {name}: choose from {list(_loaders)}"
+        )
+    if name not in _loaded:
+        _loaded[name] = _loaders[name]()
+    return _loaded[name]
+
+
+def available_backends() -> List[str]:
+    """
+    :return: ([str]) names of the backends that load, preferred first
+    """
+    return [name for name in _loaders if load_backend(name) is not None]
+
+
+class ParityChecker:
+    """run a sampled fraction of calls through the python solvers too,
+        and log, or raise if strict, when the deadwood differs.
+        sampling and counting hold a lock, for split_melds_many's threads
+    """
+
+    def __init__(
+        self,
+        backend: MeldBackend,
+        rate: float,
+        strict: bool = False,
+        seed: Optional[int] = None,
+    ):
+        """
+        :param backend: (MeldBackend) the backend to check
+        :param rate: (float) fraction of calls to check, from 0 to 1
+        :param strict: (bool) if True, raise on a mismatch
+        :param seed: (int) to sample the same calls every run
+        """
+        self.backend = backend
+        self.reference = load_backend("python")
+        self.rate = rate
+        self.strict = strict
+        self.rng = random.Random(seed)
+        self.checks = 0
+        self.mismatches = 0
+        self.lock = threading.Lock()
+
+    def check(self, method: str, args: Tuple, result: Tuple) -> Tuple:
+        """
+        :param method: (str) e.g. "split_melds"
+        :param args: (tuple) what the backend was called with
+        :param result: (tuple) what it returned
+        :return: (tuple) result, as it was
+        """
+        with self.lock:
+            if self.rng.random() >= self.rate:
+                return result
+            self.checks += 1
+        expected = getattr(self.reference, method)(*args)
+        if expected[0] != result[0]:
+            with self.lock:
+                self.mismatches += 1
+            message = (
+                f"{self.backend.name} {method}{args} gave deadwood "
+                f"{result[0]}, python gave {expected[0]}"
+            )
+            if self.strict:
+                raise AssertionError(message)
+            logger.warning(message)
+        return result
+
+    @property
+    def stats(self) -> Dict:
+        """
+        :return: (dict)
+        """
+        with self.lock:
+            return {
+                "backend": self.backend.name,
+                "checks": self.checks,
+                "mismatches": self.mismatches,
+            }
+
+
+_backend: Optional[MeldBackend] = None
+parity_checker: Optional[ParityChecker] = None
+
+
+def use_backend(
+    name: Optional[str] = None,
+    parity_rate: Optional[float] = None,
+    strict: bool = False,
+) -> MeldBackend:
+    """choose the backend for split_melds, get_deadwood and layoff_deadwood
+
+    :param name: (str) e.g. "python"
+        --> if None, from CARD_UTILS_GIN_BACKEND, else the first available
+    :param parity_rate: (float) fraction of calls to check against python
+        --> if None, from CARD_UTILS_GIN_PARITY, else 0
+    :param strict: (bool) if True, raise when a check finds a mismatch
+    :return: (MeldBackend)
+    """
+    global _backend, parity_checker
+    name = (
+        name or os.environ.get(BACKEND_ENV_VAR) or available_backends()[0]
+    )
+    backend = load_backend(name)
+    if backend is None:
+        raise ValueError(f"gin backend {name} is not available")
+
+    if parity_rate is None:
+        parity_rate = float(os.environ.get(PARITY_ENV_VAR) or 0)
+    parity_checker = (
+        ParityChecker(backend, parity_rate, strict)
+        if parity_rate > 0 and backend.name != "python"
+        else None
+    )
+    _backend = backend
+    return backend
+
+
+def get_backend() -> MeldBackend:
+    """
+    :return: (MeldBackend) the one in use, chosen on first use
+    """
+    if _backend is None:
+        return use_backend()
+    return _backend
+
+
+def split_melds(
+    hand: List[Card],
+    melds: Optional[List[List[Card]]] = None,
+) -> SplitHand:
+    """
+    :param hand: ([str])
+    :param melds: ([[str]]) the melds the player chose, if any
+    :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+    """
+    result = get_backend().split_melds(hand, melds)
+    if parity_checker is not None:
+        return parity_checker.check("split_melds", (hand, melds), result)
+    return result
+
+
+def get_deadwood(unmelded_cards: List[Card]) -> int:
+    """
+    :param unmelded_cards: ([str])
+    :return: (int)
+    """
+    return get_backend().get_deadwood(unmelded_cards)
+
+
+def layoff_deadwood(
+    hand: List[Card],
+    opp_melds: List[List[Card]],
+    stop_on_zero: bool = True,
+) -> LayoffHand:
+    """
+    :param hand: ([str])
+    :param opp_melds: ([[str]]) the melds of the player who knocked
+    :param stop_on_zero: (bool) return the first way to get 0 deadwood
+    :return: (int, [[str]], [str], [str])
+        deadwood, melds, laid off cards, unmelded cards
+    """
+    result = get_backend().layoff_deadwood(hand, opp_melds, stop_on_zero)
+    if parity_checker is not None:
+        return parity_checker.check(
+            "layoff_deadwood", (hand, opp_melds, stop_on_zero), result
+        )
+    return result
+
+
+def split_melds_many(
+    hands: List[List[Card]],
+    max_workers: Optional[int] = None,
+    chunk_size: int = 256,
+) -> List[SplitHand]:
+    """split_melds of every hand, in chunks across a pool of threads
+
+    a backend with split_melds_batch solves each chunk in one call,
+    e.g. the native one, which lets go of the GIL while it solves,
+    so the threads run on every core without a process pool.
+    otherwise each hand is solved on its own, and with the python
+    backend the threads only take turns
+
+    :param hands: ([[str]])
+    :param max_workers: (int) threads
+        --> if None, one per cpu
+    :param chunk_size: (int) hands per task, so each task is worth a thread
+    :return: ([(int, [[str]], [str])]) in the same order as hands,
+        though a batch may order the cards in each split differently
+    """
+    split_melds_batch = get_backend().split_melds_batch
+
+    def split_chunk(chunk: List[List[Card]]) -> List[SplitHand]:
+        if split_melds_batch is None:
+            return [split_melds(hand) for hand in chunk]
+        splits = split_melds_batch(chunk)
+        if parity_checker is not None:
+            return [
+                parity_checker.check("split_melds", (hand, None), split)
+                for hand, split in zip(chunk, splits)
+            ]
+        return splits
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(hands) <= chunk_size:
+        return split_chunk(hands)
+
+    chunks = [
+        hands[ii : ii + chunk_size] for ii in range(0, len(hands), chunk_size)
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return [
+            split
+            for chunk_splits in executor.map(split_chunk, chunks)
+            for split in chunk_splits
+        ]
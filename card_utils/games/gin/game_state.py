@@ -1,10 +1,13 @@
 """ class to store and manipulate the state of a gin ricky game """
 
-import copy
 import random
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
-from card_utils.deck.utils import Card
+from card_utils import deck
+from card_utils.deck import card_bits
+from card_utils.deck.utils import Card, cards_to_mask
+from card_utils.games.gin.piles import DealtDeck, DeckView, HandView
+from card_utils.games.gin.tracker import CardTracker
 from card_utils.games.gin.utils import (
     RummyAction,
     RummyEndGame,
@@ -61,9 +64,25 @@ class AbstractGinGameState:
         :param max_turns: (int) stop game after this many turns
             --> if None, play until someone makes gin
         """
+        # bumped on every change, to tell when to_dict needs redoing
+        self.version = 0
+        # is player 1 --> (payload key, to_dict payload)
+        self.payload_cache: Dict[bool, Tuple[Tuple, Dict]] = {}
+        # is player 1 --> their view of the hud, kept up to date
+        # card by card once built, and dropped if the hud is replaced
+        self.player_huds: Dict[bool, Dict[str, RummyHud]] = {}
+        # is player 1 --> what they know of the cards they cannot see,
+        # kept up to date move by move
+        self.trackers: Dict[bool, CardTracker] = {}
         self.deck = deck
         self.discard = discard
 
+        # is player 1 --> deadwood of their hand, dropped when it changes
+        self.hand_deadwoods: Dict[bool, int] = {}
+        # is player 1 --> (mask of their hand, (deadwood, melds, unmelded))
+        self.hand_splits: Dict[bool, Tuple[int, Tuple]] = {}
+        # is player 1 --> 52-bit mask of their hand
+        self.hand_masks: Dict[bool, int] = {}
         self.p1_hand = p1_hand
         self.p2_hand = p2_hand
 
@@ -93,12 +112,86 @@ class AbstractGinGameState:
         self.underknock_bonus = underknock_bonus
         self.gin_bonus = gin_bonus
 
+        self.trackers = {
+            is_p1: CardTracker.for_player(self, is_p1)
+            for is_p1 in (True, False)
+        }
+
+    def copy(self):
+        """copy the state so either can play on without affecting the other.
+            the shuffled deck and the cards are never mutated, so they are
+            shared, and only the containers that moves mutate are copied
+
+        :return: (AbstractGinGameState)
+        """
+        clone = object.__new__(self.__class__)
+        clone.__dict__.update(self.__dict__)
+        clone._deck = self._deck.copy()
+        clone.discard = self.discard.copy()
+        clone._p1_hand = self._p1_hand.copy()
+        clone._p2_hand = self._p2_hand.copy()
+        clone.hand_masks = self.hand_masks.copy()
+        clone.hand_deadwoods = self.hand_deadwoods.copy()
+        clone.hand_splits = self.hand_splits.copy()
+        clone._public_hud = self._public_hud.copy()
+        clone.player_huds = {}
+        clone.payload_cache = {}
+        clone.trackers = {
+            is_p1: tracker.copy() for is_p1, tracker in self.trackers.items()
+        }
+        return clone
+
+    def snapshot(self):
+        """
+        :return: (AbstractGinGameState) to restore() this state from later
+        """
+        return self.copy()
+
+    def restore(self, snapshot):
+        """go back to the state a snapshot was taken in,
+            leaving the snapshot as it is, to restore again
+
+        :param snapshot: (AbstractGinGameState) from snapshot()
+        :return: None
+        """
+        self.__dict__.update(snapshot.copy().__dict__)
+
+    def determinize(self, is_player_1: bool, rng: random.Random):
+        """copy the state, with the cards the player cannot see dealt again
+            at random: the opponent's hand, apart from any cards
+            public_hud shows them taking from the discard, and the deck
+
+        :param is_player_1: (bool) whose point of view
+        :param rng: (random.Random)
+        :return: (AbstractGinGameState)
+        """
+        opp_loc = RummyHud.PLAYER_2 if is_player_1 else RummyHud.PLAYER_1
+        opp_hand = self.p2_hand if is_player_1 else self.p1_hand
+        own_hand = self.p1_hand if is_player_1 else self.p2_hand
+        known = [
+            c for c in opp_hand if self.public_hud.get(c) == opp_loc
+        ]
+        # discards shuffled back into the deck are unknown again
+        seen = {*own_hand, *known, *self.discard}
+        unknown = [c for c in deck.cards if c not in seen]
+        rng.shuffle(unknown)
+
+        n_dealt = len(opp_hand) - len(known)
+        clone = self.copy()
+        clone.deck = unknown[n_dealt:]
+        if is_player_1:
+            clone.p2_hand = known + unknown[:n_dealt]
+        else:
+            clone.p1_hand = known + unknown[:n_dealt]
+        return clone
+
     def draw_card(self, from_discard: bool):
         """draw card from top of deck or discard to player's hand
 
         :param from_discard: (bool)
         :return: (str) card drawn
         """
+        self.version += 1
 
         if not (
             self.turn.is_draw()
@@ -128,16 +221,18 @@ class AbstractGinGameState:
 
         if from_discard:
             card_drawn: str = self.top_of_discard  # type: ignore
-            self._add_to_hand(card_drawn)
-            self.discard = self.discard[:-1]
-            self.public_hud[card_drawn] = (
-                RummyHud.PLAYER_1 if self.turn.p1() else RummyHud.PLAYER_2
+            is_p1 = self._add_to_hand(card_drawn)
+            self._track_draw(is_p1, card_drawn, from_discard)
+            self.discard.pop()
+            self._set_hud(
+                card_drawn,
+                RummyHud.PLAYER_1 if self.turn.p1() else RummyHud.PLAYER_2,
             )
         else:
-            card_drawn = self.top_of_deck
-            self._add_to_hand(card_drawn)
-            self.deck = self.deck[1:]
-            if len(self.deck) == 0:
+            card_drawn = self._deck.draw()
+            is_p1 = self._add_to_hand(card_drawn)
+            self._track_draw(is_p1, card_drawn, from_discard)
+            if len(self._deck) == 0:
                 # Both players know each others hands
                 # at this point, so we can just do this:
                 self.public_hud = {
@@ -145,13 +240,11 @@ class AbstractGinGameState:
                     **{c: RummyHud.PLAYER_2 for c in self.p2_hand},
                 }
 
-        hand = self.p1_hand if self.turn.p1() else self.p2_hand
-        deadwood = self.get_deadwood(hand)
         self.turn = self.advance_turn(
             current=self.turn,
             from_discard=from_discard,
             first_turn=self.first_turn,
-            deadwood=deadwood,  # arbitrary
+            deadwood=10,  # arbitrary
         )
         self.last_draw = card_drawn
         self.last_draw_from_discard = from_discard
@@ -166,6 +259,118 @@ class AbstractGinGameState:
     ) -> int:
         raise NotImplementedError("get_deadwood not implemented")
 
+    @property
+    def deck(self) -> DeckView:
+        """the cards left in the deck, top first, as a read-only list:
+            moves draw from the DealtDeck in _deck without copying,
+            so changing this list in place could never reach the deck
+        """
+        return self._deck.view()
+
+    @deck.setter
+    def deck(self, cards: List[str]):
+        self._deck = (
+            cards if isinstance(cards, DealtDeck) else DealtDeck(cards)
+        )
+        self.version += 1
+
+    @property
+    def public_hud(self) -> Dict[str, RummyHud]:
+        return self._public_hud
+
+    @public_hud.setter
+    def public_hud(self, public_hud: Dict[str, RummyHud]):
+        self._public_hud = public_hud
+        self.player_huds = {}
+        self._reset_trackers()
+        self.version += 1
+
+    @property
+    def p1_hand(self) -> List[str]:
+        """reads like a list, but cannot be changed in place"""
+        return self._p1_hand
+
+    @p1_hand.setter
+    def p1_hand(self, hand: List[str]):
+        self._p1_hand = HandView(hand)
+        self.hand_masks[True] = cards_to_mask(hand)
+        self.hand_deadwoods.pop(True, None)
+        self.player_huds = {}
+        self._reset_trackers()
+        self.version += 1
+
+    @property
+    def p2_hand(self) -> List[str]:
+        """reads like a list, but cannot be changed in place"""
+        return self._p2_hand
+
+    @p2_hand.setter
+    def p2_hand(self, hand: List[str]):
+        self._p2_hand = HandView(hand)
+        self.hand_masks[False] = cards_to_mask(hand)
+        self.hand_deadwoods.pop(False, None)
+        self.player_huds = {}
+        self._reset_trackers()
+        self.version += 1
+
+    def hand_deadwood(self, is_p1: bool) -> int:
+        """deadwood of a player's current hand, without melds chosen,
+            only worked out when first needed after the hand changes
+
+        :param is_p1: (bool)
+        :return: (int)
+        """
+        deadwood = self.hand_deadwoods.get(is_p1)
+        if deadwood is None:
+            deadwood = self.compute_hand_deadwood(is_p1)
+            self.hand_deadwoods[is_p1] = deadwood
+        return deadwood
+
+    def compute_hand_deadwood(self, is_p1: bool) -> int:
+        """
+        :param is_p1: (bool)
+        :return: (int)
+        """
+        return self.get_deadwood(self.p1_hand if is_p1 else self.p2_hand)
+
+    def hand_split(
+        self, is_p1: bool
+    ) -> Tuple[int, List[List[Card]], List[Card]]:
+        """the melds of a player's current hand, solved once for each
+            set of cards it holds, for everything that needs them:
+            treat the melds and unmelded cards as read-only
+
+        :param is_p1: (bool)
+        :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+        """
+        hand_mask = self.hand_masks[is_p1]
+        cached = self.hand_splits.get(is_p1)
+        if cached is not None and cached[0] == hand_mask:
+            return cached[1]
+        split = self.compute_hand_split(is_p1)
+        self.hand_splits[is_p1] = (hand_mask, split)
+        self.hand_deadwoods[is_p1] = split[0]
+        return split
+
+    def compute_hand_split(
+        self, is_p1: bool
+    ) -> Tuple[int, List[List[Card]], List[Card]]:
+        """
+        :param is_p1: (bool)
+        :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+        """
+        hand = self.p1_hand if is_p1 else self.p2_hand
+        return self.hand_deadwood(is_p1), [], self.sort_hand(hand)
+
+    def sorted_hand(self, is_p1: bool) -> List[str]:
+        """same as sort_hand of the player's current hand
+
+        :param is_p1: (bool)
+        :return: ([str]) melds first, then unmelded cards
+        """
+        _, melds, unmelded = self.hand_split(is_p1)
+        return [c for m in melds for c in m] + unmelded
+
     @staticmethod
     def sort_hand(hand: List[str]) -> List[str]:
         raise NotImplementedError("sort_hand not implemented")
@@ -182,6 +387,9 @@ class AbstractGinGameState:
     def first_turn_pass(self) -> None:
         if not self.turn.is_first_draw():
             raise ValueError("Cannot pass: it is not the first turn")
+        self.version += 1
+        if self.discard:
+            self.trackers[not self.turn.p1()].opponent_pass(self.discard[-1])
         self.turns += 1
         self.turn = self.advance_turn(
             current=self.turn,
@@ -201,42 +409,41 @@ class AbstractGinGameState:
         :param card: (card)
         :return: None
         """
-
         if self.turn not in {RummyTurn.P1_DISCARDS, RummyTurn.P2_DISCARDS}:
             raise Exception(
                 "Cannot discard: it is not the player's turn to discard"
             )
+        self.version += 1
 
         if self.turn == RummyTurn.P1_DISCARDS:
             if len(self.p1_hand) != self.cards_dealt + 1:
                 raise Exception(
                     f"Cannot discard: player 1 has {self.cards_dealt + 1} cards in hand"
                 )
-            if card not in self.p1_hand:
+            if not self.hand_masks[True] & card_bits.get(card, 0):
                 raise Exception(
                     f"Player 1 cannot discard {card}: not in hand!"
                 )
-            self.p1_hand = [c for c in self.p1_hand if c != card]
-            hand = self.p1_hand
+            self._remove_from_hand(True, card)
         elif self.turn == RummyTurn.P2_DISCARDS:
             if len(self.p2_hand) != self.cards_dealt + 1:
                 raise Exception(
                     f"Cannot discard: player 2 has {self.cards_dealt + 1} cards in hand"
                 )
-            if card not in self.p2_hand:
+            if not self.hand_masks[False] & card_bits.get(card, 0):
                 raise Exception(
                     f"Player 2 cannot discard {card}: not in hand!"
                 )
-            self.p2_hand = [c for c in self.p2_hand if c != card]
-            hand = self.p2_hand
+            self._remove_from_hand(False, card)
         else:
             raise ValueError("invalid discarding state")
 
         is_p1 = self.turn.p1()
-        deadwood = self.get_deadwood(hand)
+        self.trackers[is_p1].own_discard(card)
+        self.trackers[not is_p1].opponent_discard(card)
+        deadwood = self.hand_deadwood(is_p1)
         if deadwood == 0:
-            opp_hand = self.p2_hand if is_p1 else self.p1_hand
-            opp_deadwood = self.get_deadwood(opp_hand)
+            opp_deadwood = self.hand_deadwood(not is_p1)
             p1_deadwood = 0 if is_p1 else opp_deadwood
             p2_deadwood = opp_deadwood if is_p1 else 0
             self.end_game(RummyEndGame.GIN, p1_deadwood, p2_deadwood)
@@ -249,8 +456,8 @@ class AbstractGinGameState:
 
         # add discard to HUD
         if self.discard:
-            self.public_hud[self.discard[-1]] = RummyHud.DISCARD
-        self.public_hud[card] = RummyHud.TOP_OF_DISCARD
+            self._set_hud(self.discard[-1], RummyHud.DISCARD)
+        self._set_hud(card, RummyHud.TOP_OF_DISCARD)
         self.discard.append(card)
 
         if not self.turn.is_knock():
@@ -262,17 +469,18 @@ class AbstractGinGameState:
             return
 
     def _check_wall(self) -> bool:
-        if len(self.deck) == self.end_cards_in_deck:
+        if len(self._deck) == self.end_cards_in_deck:
             self.shuffles += 1
             if self.hit_max_shuffles():
                 self.end_game(RummyEndGame.WALL, 0, 0)
                 return True
             # if there are no cards left in the deck,
             # shuffle up the discards
-            new_deck = [*self.discard, *self.deck]
+            new_deck = [*self.discard, *self._deck]
             random.shuffle(new_deck)
             self.deck = new_deck
             self.discard = []
+            self._reset_trackers()
         return False
 
     def decide_knock(
@@ -284,6 +492,7 @@ class AbstractGinGameState:
             raise ValueError(
                 "Cannot knock: it is not the player's turn to knock"
             )
+        self.version += 1
 
         if not knocks:
             if self._check_wall():
@@ -361,24 +570,81 @@ class AbstractGinGameState:
         """insert card into player's hand
 
         :param card_drawn: (str)
-        :return: None
+        :return: (bool) whether it went to player 1
         """
         if self.turn in {
             RummyTurn.P1_DRAWS,
             RummyTurn.P1_DRAWS_FIRST,
             RummyTurn.P1_DRAWS_FROM_DECK,
         }:
-            self.p1_hand.append(card_drawn)
+            is_p1 = True
         elif self.turn in {
             RummyTurn.P2_DRAWS,
             RummyTurn.P2_DRAWS_FIRST,
             RummyTurn.P2_DRAWS_FROM_DECK,
         }:
-            self.p2_hand.append(card_drawn)
+            is_p1 = False
         else:
             raise Exception(
                 "Cannot add to hand: it is not the player's turn to draw"
             )
+        list.append(self._p1_hand if is_p1 else self._p2_hand, card_drawn)
+        self.hand_masks[is_p1] |= card_bits[card_drawn]
+        self.hand_deadwoods.pop(is_p1, None)
+        if is_p1 in self.player_huds:
+            self.player_huds[is_p1][card_drawn] = RummyHud.USER
+        return is_p1
+
+    def _track_draw(self, is_p1: bool, card_drawn: Card, from_discard: bool):
+        """tell both players' trackers about a draw,
+            while the card is still on top of the discard if taken from it
+
+        :param is_p1: (bool) whether player 1 drew
+        :param card_drawn: (str)
+        :param from_discard: (bool)
+        :return: None
+        """
+        self.trackers[is_p1].own_draw(card_drawn, from_discard)
+        # drawing from the deck when they could take the discard
+        # says the player had no use for it
+        passed = (
+            self.discard[-1]
+            if not from_discard
+            and self.discard
+            and not self.turn.is_draw_from_deck()
+            else None
+        )
+        self.trackers[not is_p1].opponent_draw(
+            card_drawn if from_discard else None, passed
+        )
+
+    def _reset_trackers(self):
+        """start the trackers again from the hands, discard and hud,
+            when one is replaced rather than moved, keeping what
+            each player has seen their opponent discard and pass
+
+        :return: None
+        """
+        for is_p1, tracker in self.trackers.items():
+            self.trackers[is_p1] = CardTracker.for_player(self, is_p1, tracker)
+
+    def card_tracker(self, is_player_1: bool) -> CardTracker:
+        """
+        :param is_player_1: (bool)
+        :return: (CardTracker) that player's view of the unseen cards
+        """
+        return self.trackers[is_player_1]
+
+    def _remove_from_hand(self, is_p1: bool, card: Card):
+        """take a card out of a player's hand, in place
+
+        :param is_p1: (bool)
+        :param card: (str)
+        :return: None
+        """
+        list.remove(self._p1_hand if is_p1 else self._p2_hand, card)
+        self.hand_masks[is_p1] ^= card_bits[card]
+        self.hand_deadwoods.pop(is_p1, None)
 
     def get_action(self, is_p1):
         """
@@ -415,17 +681,63 @@ class AbstractGinGameState:
         """
         :return: (str)
         """
-        return self.deck[0]
+        return self._deck[0]
 
     def to_dict(self, is_player_1: bool):
-        """
+        """the game from one player's point of view, worked out once
+            per version of the state and copied out for each caller
+
         :param is_player_1:
         :return:
         """
+        key = self._payload_key()
+        cached = self.payload_cache.get(is_player_1)
+        if cached is not None and cached[0] == key:
+            return self._copy_payload(cached[1])
         if self.is_complete:
-            return self._complete_game_to_dict(is_player_1)
+            payload = self._complete_game_to_dict(is_player_1)
         else:
-            return self._incomplete_game_to_dict(is_player_1)
+            payload = self._incomplete_game_to_dict(is_player_1)
+        self.payload_cache[is_player_1] = (key, payload)
+        return self._copy_payload(payload)
+
+    def _payload_key(self) -> Tuple:
+        """what to_dict depends on beyond the version, which only the
+            moves bump: every emitted field callers can assign directly
+
+        :return: (tuple)
+        """
+        return (
+            self.version,
+            self.turn,
+            self.is_complete,
+            self.p1_points,
+            self.p2_points,
+            len(self.discard),
+            self.top_of_discard,
+            len(self._deck),
+            self.last_draw,
+            self.last_draw_from_discard,
+        )
+
+    @staticmethod
+    def _copy_payload(payload: Dict) -> Dict:
+        """
+        :param payload: (dict) a cached to_dict payload
+        :return: (dict) a copy the caller can change freely
+        """
+        # the values are cards, numbers and enums,
+        # or flat lists and dicts of them
+        return {
+            key: (
+                list(value)
+                if isinstance(value, list)
+                else dict(value)
+                if isinstance(value, dict)
+                else value
+            )
+            for key, value in payload.items()
+        }
 
     def _complete_game_to_dict(self, is_player_1: bool):
         """
@@ -462,13 +774,12 @@ class AbstractGinGameState:
         if final_info["action"] == RummyAction.DISCARD:
             final_info["drawn_card"] = self.last_draw
 
-        hand = self.sort_hand(self.p1_hand if is_player_1 else self.p2_hand)
         return {
-            "hand": hand,
-            "points": self.get_deadwood(hand),
+            "hand": self.sorted_hand(is_player_1),
+            "points": self.hand_deadwood(is_player_1),
             "top_of_discard": self.top_of_discard,
             "last_draw_from_discard": self.last_draw_from_discard,
-            "deck_length": len(self.deck),
+            "deck_length": len(self._deck),
             "hud": self.player_hud(is_player_1),
             **final_info,
         }
@@ -479,11 +790,46 @@ class AbstractGinGameState:
         :param is_player_1:
         :return:
         """
-        hand = self.p1_hand if is_player_1 else self.p2_hand
-        return {
-            **self._transformed_hud(is_player_1),
-            **{c: RummyHud.USER for c in hand},
-        }
+        player_hud = self.player_huds.get(is_player_1)
+        if player_hud is None:
+            hand = self.p1_hand if is_player_1 else self.p2_hand
+            player_hud = {
+                **self._transformed_hud(is_player_1),
+                **{c: RummyHud.USER for c in hand},
+            }
+            self.player_huds[is_player_1] = player_hud
+        return dict(player_hud)
+
+    def _set_hud(self, card: Card, card_loc: RummyHud):
+        """move a card in the public hud, and in each player's view of it
+
+        :param card: (str)
+        :param card_loc: (RummyHud)
+        :return: None
+        """
+        self.public_hud[card] = card_loc
+        bit = card_bits[card]
+        for is_player_1, player_hud in self.player_huds.items():
+            if self.hand_masks[is_player_1] & bit:
+                player_hud[card] = RummyHud.USER
+            else:
+                player_hud[card] = self._transform_hud_card(
+                    card_loc, is_player_1
+                )
+
+    def unseen_cards(self, is_player_1: bool) -> List[Card]:
+        """cards the player has not seen: not in their hand,
+            and not known to be in the discard or the opponent's hand
+
+        :param is_player_1: (bool)
+        :return: ([str])
+        """
+        hand = set(self.p1_hand if is_player_1 else self.p2_hand)
+        return [
+            c
+            for c in deck.cards
+            if c not in hand and c not in self.public_hud
+        ]
 
     def _transformed_hud(self, is_player_1: bool):
         """return the full hud from the player's point of view
@@ -0,0 +1,126 @@
+""" static index of every gin meld in the deck, as 52-bit card masks
+
+see deck.card_bit_index for the layout: one 13-bit block per suit,
+with ranks 2..A within the block
+"""
+
+from typing import Dict, List, Tuple
+
+from card_utils import deck
+
+SUIT_MASK = (1 << 13) - 1
+ACE_INDEX = deck.rank_ids["A"]
+
+suit_masks: List[int] = [SUIT_MASK << (13 * s) for s in range(4)]
+rank_masks: List[int] = [
+    sum(1 << (13 * s + r) for s in range(4)) for r in range(13)
+]
+
+
+def _value_to_rank_index(value: int) -> int:
+    """
+    :param value: (int) 1 (ace low) up to 14 (ace high)
+    :return: (int) index into deck.ranks
+    """
+    return ACE_INDEX if value in {1, 14} else value - 2
+
+
+def _build_sets() -> Tuple[List[int], Dict[int, Tuple[int, ...]]]:
+    """
+    :return: ([int], {int: (int)}) every set in the deck,
+        and the sets made by each combination of suits within a rank,
+        keyed by hand_mask & rank_masks[rank]
+    """
+    sets = []
+    sets_by_rank_bits = {}
+    for rank_mask in rank_masks:
+        bits = [b for b in range(52) if rank_mask >> b & 1]
+        four = rank_mask
+        threes = [rank_mask & ~(1 << b) for b in bits]
+        sets.extend([*threes, four])
+        for held in range(16):
+            held_mask = sum(1 << bits[s] for s in range(4) if held >> s & 1)
+            sets_by_rank_bits[held_mask] = tuple(
+                m for m in [*threes, four] if m & held_mask == m
+            )
+    return sets, sets_by_rank_bits
+
+
+def _pattern_runs(pattern: int) -> Tuple[int, ...]:
+    """every run of 3 to 13 ranks in a 13-bit pattern of ranks,
+        aces both low and high, ordered by lowest rank, then length
+
+    :param pattern: (int) bit i is deck.ranks[i]
+    :return: ((int)) 13-bit rank patterns of each run
+    """
+    runs = []
+    for start in range(1, 13):
+        run = 0
+        # A..K and 2..A are the same 13 cards, so only count it once
+        stop = 14 if start == 2 else min(start + 13, 15)
+        for value in range(start, stop):
+            bit = 1 << _value_to_rank_index(value)
+            if not pattern & bit:
+                break
+            run |= bit
+            if value - start >= 2:
+                runs.append(run)
+    return tuple(runs)
+
+
+SET_MASKS, _sets_by_rank_bits = _build_sets()
+RUN_MASKS: List[int] = [
+    run << (13 * s) for s in range(4) for run in _pattern_runs(SUIT_MASK)
+]
+MELD_MASKS: List[int] = SET_MASKS + RUN_MASKS
+# hand_melds returns melds in this order
+MELD_IDS: Dict[int, int] = {m: ii for ii, m in enumerate(MELD_MASKS)}
+
+# card bit index --> every meld with that card in it
+MELDS_BY_CARD: List[Tuple[int, ...]] = [
+    tuple(m for m in MELD_MASKS if m >> b & 1) for b in range(52)
+]
+
+# runs in one suit, keyed by hand_mask & suit_masks[suit],
+# filled in as hands are looked up: at most 4 * 2^13 entries
+_runs_by_suit_bits: Dict[int, Tuple[int, ...]] = {0: ()}
+
+
+def _suit_runs(suit_bits: int, suit: int) -> Tuple[int, ...]:
+    """
+    :param suit_bits: (int) hand_mask & suit_masks[suit]
+    :param suit: (int)
+    :return: ((int)) masks of the runs in these cards
+    """
+    runs = _runs_by_suit_bits.get(suit_bits)
+    if runs is None:
+        shift = 13 * suit
+        runs = tuple(r << shift for r in _pattern_runs(suit_bits >> shift))
+        _runs_by_suit_bits[suit_bits] = runs
+    return runs
+
+
+def hand_melds(hand_mask: int) -> List[int]:
+    """every meld contained in a hand, sets by rank then runs by suit
+
+    :param hand_mask: (int)
+    :return: ([int]) meld masks
+    """
+    melds: List[int] = []
+    for rank_mask in rank_masks:
+        melds.extend(_sets_by_rank_bits[hand_mask & rank_mask])
+    for suit, suit_mask in enumerate(suit_masks):
+        melds.extend(_suit_runs(hand_mask & suit_mask, suit))
+    return melds
+
+
+def melds_with_card(hand_mask: int, card_bit_index: int) -> List[int]:
+    """every meld contained in a hand that uses one particular card
+
+    :param hand_mask: (int)
+    :param card_bit_index: (int) see deck.card_bit_index
+    :return: ([int]) meld masks
+    """
+    return [
+        m for m in MELDS_BY_CARD[card_bit_index] if m & hand_mask == m
+    ]
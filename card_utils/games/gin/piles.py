@@ -0,0 +1,132 @@
+""" compact piles of cards for gin game states """
+
+from collections.abc import Sequence
+from typing import Iterable, Tuple, Union
+
+from card_utils.deck.utils import Card
+
+
+class DealtDeck(Sequence):
+    """the cards left in a shuffled deck, which never copies them:
+        drawing from the top just moves an index along,
+        and the shuffled cards can be shared by copies of a game
+
+        reads like the list of cards left, top of the deck first
+    """
+
+    __slots__ = ("cards", "top")
+
+    def __init__(self, cards: Iterable[Card] = (), top: int = 0):
+        """
+        :param cards: ([str]) shuffled cards, top of the deck first
+        :param top: (int) how many have been drawn already
+        """
+        self.cards: Tuple[Card, ...] = tuple(cards)
+        self.top = top
+
+    def draw(self) -> Card:
+        """
+        :return: (str) the top card, now taken off the deck
+        """
+        if self.top >= len(self.cards):
+            raise IndexError("draw from an empty deck")
+        card = self.cards[self.top]
+        self.top += 1
+        return card
+
+    def copy(self) -> "DealtDeck":
+        """
+        :return: (DealtDeck) sharing the shuffled cards
+        """
+        # tuple() of a tuple is the same tuple, not a copy
+        return DealtDeck(self.cards, self.top)
+
+    def __len__(self) -> int:
+        return len(self.cards) - self.top
+
+    def __getitem__(self, index: Union[int, slice]):  # type: ignore
+        if isinstance(index, slice):
+            return list(self.cards[self.top :][index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("deck index out of range")
+        return self.cards[self.top + index]
+
+    def __iter__(self):
+        for ii in range(self.top, len(self.cards)):
+            yield self.cards[ii]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (DealtDeck, list, tuple)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"DealtDeck({list(self)})"
+
+    def view(self) -> "DeckView":
+        """
+        :return: (DeckView) the cards left, read-only
+        """
+        return DeckView(self.cards[self.top :])
+
+
+class ReadOnlyList(list):
+    """a list of cards owned by a game state, handed out to read:
+        changing it in place raises, rather than leaving the state's
+        masks, trackers and caches out of step with it
+    """
+
+    __slots__ = ()
+
+    # NOTE: override this in subclasses
+    read_only_message = "cards cannot be changed in place"
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(self.read_only_message)
+
+    append = extend = insert = pop = remove = clear = _read_only
+    sort = reverse = _read_only  # type: ignore
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+    def copy(self):  # type: ignore
+        """
+        :return: (ReadOnlyList) of the same type
+        """
+        return type(self)(self)
+
+    def __reduce__(self):
+        # pickle and copy would otherwise rebuild it with append()
+        return type(self), (list(self),)
+
+
+class HandView(ReadOnlyList):
+    """a player's hand, which reads like the list of its cards,
+        but cannot be changed in place: the game state keeps a mask,
+        deadwood and trackers for each hand, so hands only change
+        through the p1_hand and p2_hand setters, draws and discards
+    """
+
+    __slots__ = ()
+
+    read_only_message = (
+        "hands cannot be changed in place: "
+        "assign a new list to p1_hand or p2_hand instead"
+    )
+
+
+class DeckView(ReadOnlyList):
+    """the cards left in a DealtDeck, top first, which cannot be
+        changed in place: cards only leave the deck through draws,
+        and a new deck is set by assigning to the deck property
+    """
+
+    __slots__ = ()
+
+    read_only_message = (
+        "the deck cannot be changed in place: "
+        "draw from it, or assign a new list to deck instead"
+    )
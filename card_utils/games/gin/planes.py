@@ -0,0 +1,205 @@
+""" find melds in many gin hands at once, with numpy
+
+a batch of hands is a boolean array of shape (n_hands, 4, 13):
+one plane per hand, one row per suit and one column per rank,
+in the same order as deck.card_bit_index, i.e. suits cdhs, ranks 2..A,
+so planes.reshape(n_hands, 52)[:, b] is bit b of each hand mask
+
+numpy is optional: it is only imported when these functions are called
+"""
+
+from typing import Dict, List, Optional
+
+from card_utils import deck
+from card_utils.deck import card_bit_index
+from card_utils.deck.utils import Card
+from card_utils.games.gin.melds import MELD_MASKS
+from card_utils.games.gin.rummy.utils import best_meld_combos
+
+_tables: Dict = {}
+
+
+def _numpy():
+    """
+    :return: (module) numpy
+    """
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "card_utils.games.gin.planes needs numpy: pip install numpy"
+        ) from e
+    return numpy
+
+
+def _table(name: str):
+    """arrays built once, the first time they are needed
+
+    :param name: (str) "melds", "meld_sizes", "meld_values" or "values"
+    :return: (numpy.ndarray)
+    """
+    if not _tables:
+        np = _numpy()
+        bits = np.arange(52)
+        melds = np.array(
+            [(m >> bits) & 1 for m in MELD_MASKS], dtype=np.float32
+        )
+        values = np.array(
+            [
+                min(10, deck.rank_to_value[deck.ranks[b % 13]])
+                for b in range(52)
+            ],
+            dtype=np.int32,
+        )
+        _tables.update(
+            {
+                # (n_melds, 52) which cards are in each meld
+                "melds": melds,
+                "meld_sizes": melds.sum(axis=1),
+                "meld_values": (melds @ values).astype(np.int32),
+                # (52,) deadwood of each card
+                "values": values,
+            }
+        )
+    return _tables[name]
+
+
+def hands_to_planes(hands: List[List[Card]]):
+    """
+    :param hands: ([[str]])
+    :return: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    """
+    np = _numpy()
+    flat = np.zeros((len(hands), 52), dtype=bool)
+    for ii, hand in enumerate(hands):
+        flat[ii, [card_bit_index[c] for c in hand]] = True
+    return flat.reshape(-1, 4, 13)
+
+
+def random_planes(n_hands: int, n_cards: int = 10, seed: Optional[int] = None):
+    """deal many random hands at once
+
+    :param n_hands: (int)
+    :param n_cards: (int) cards per hand
+    :param seed: (int)
+    :return: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    """
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    dealt = rng.random((n_hands, 52)).argsort(axis=1)[:, :n_cards]
+    flat = np.zeros((n_hands, 52), dtype=bool)
+    np.put_along_axis(flat, dealt, True, axis=1)
+    return flat.reshape(-1, 4, 13)
+
+
+def planes_to_masks(planes) -> List[int]:
+    """
+    :param planes: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    :return: ([int]) 52-bit mask of each hand
+    """
+    np = _numpy()
+    bit_values = np.left_shift(np.int64(1), np.arange(52, dtype=np.int64))
+    return (planes.reshape(-1, 52) @ bit_values).tolist()
+
+
+def set_ranks(planes):
+    """
+    :param planes: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    :return: (numpy.ndarray) bool, shape (n_hands, 13):
+        whether each hand has a set of each rank
+    """
+    return planes.sum(axis=1) >= 3
+
+
+def run_windows(planes, length: int = 3):
+    """runs of length cards in a row within each suit,
+        aces both low and high, from a sliding sum along each row
+
+    :param planes: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    :param length: (int)
+    :return: (numpy.ndarray) bool, shape (n_hands, 4, 15 - length):
+        whether each hand has the run starting at each rank,
+        where start 0 is the ace low and start 1 is the 2
+    """
+    np = _numpy()
+    # ace low, 2..K, ace high
+    rows = np.concatenate([planes[..., 12:], planes], axis=-1).astype(
+        np.int8
+    )
+    cumulative = np.concatenate(
+        [np.zeros(rows.shape[:-1] + (1,), dtype=np.int16), rows.cumsum(-1)],
+        axis=-1,
+    )
+    return cumulative[..., length:] - cumulative[..., :-length] == length
+
+
+def contained_melds(planes):
+    """
+    :param planes: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    :return: (numpy.ndarray) bool, shape (n_hands, len(MELD_MASKS)):
+        whether each hand has each meld in melds.MELD_MASKS
+    """
+    flat = planes.reshape(-1, 52).astype(_numpy().float32)
+    return flat @ _table("melds").T == _table("meld_sizes")
+
+
+def batch_deadwood(planes, chunk_size: int = 100_000):
+    """least deadwood of each hand, same as split_melds
+
+    -> hands with no melds, or at most 2, are solved as arrays
+    -> only hands with 3 or more melds fall back to best_meld_combos,
+       with their melds already found
+
+    :param planes: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    :param chunk_size: (int) hands per chunk, to bound memory
+    :return: (numpy.ndarray) int32, shape (n_hands,)
+    """
+    np = _numpy()
+    flat_all = planes.reshape(-1, 52)
+    deadwoods = np.empty(len(flat_all), dtype=np.int32)
+    meld_values = _table("meld_values")
+    for start in range(0, len(flat_all), chunk_size):
+        flat = flat_all[start : start + chunk_size]
+        full = flat.astype(np.int32) @ _table("values")
+        contained = contained_melds(flat)
+        n_melds = contained.sum(axis=1)
+        chunk = full.copy()
+
+        one = n_melds == 1
+        chunk[one] -= meld_values[contained[one].argmax(axis=1)]
+
+        two = np.flatnonzero(n_melds == 2)
+        if len(two):
+            pairs = np.nonzero(contained[two])[1].reshape(-1, 2)
+            values = meld_values[pairs]
+            overlap = (
+                _table("melds")[pairs[:, 0]] * _table("melds")[pairs[:, 1]]
+            ).any(axis=1)
+            chunk[two] -= np.where(
+                overlap, values.max(axis=1), values.sum(axis=1)
+            )
+
+        many = np.flatnonzero(n_melds >= 3)
+        if len(many):
+            for ii, meld_ids in zip(many, contained[many]):
+                meld_masks = [MELD_MASKS[m] for m in np.flatnonzero(meld_ids)]
+                chunk[ii], _ = best_meld_combos(meld_masks, int(full[ii]))
+        deadwoods[start : start + len(flat)] = chunk
+    return deadwoods
+
+
+def meld_stats(planes) -> Dict:
+    """
+    :param planes: (numpy.ndarray) bool, shape (n_hands, 4, 13)
+    :return: (dict) arrays of shape (n_hands,):
+        -> "sets": ranks with a set
+        -> "runs": runs of 3, aces low and high
+        -> "melds": melds of any size
+        -> "deadwood": least deadwood
+    """
+    return {
+        "sets": set_ranks(planes).sum(axis=1),
+        "runs": run_windows(planes, 3).sum(axis=(1, 2)),
+        "melds": contained_melds(planes).sum(axis=1),
+        "deadwood": batch_deadwood(planes),
+    }
@@ -0,0 +1,189 @@
+""" cache gin ricky hand points by suit-canonical hand """
+
+import itertools
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from card_utils.deck import bit_index_cards, card_bit_index
+from card_utils.deck.utils import Card, cards_to_mask, mask_to_cards
+from card_utils.games.gin.ricky.utils import bitmask_sorted_hand_points
+
+CACHE_FORMAT_VERSION = 1
+
+# original suit of each canonical suit --> canonical bit index --> card
+_suit_order_cards: Dict[Tuple[int, ...], List[Card]] = {
+    suit_order: [
+        bit_index_cards[13 * suit_order[b // 13] + b % 13] for b in range(52)
+    ]
+    for suit_order in itertools.permutations(range(4))
+}
+
+
+def canonize_mask(hand_mask: int) -> Tuple[int, Tuple[int, ...]]:
+    """relabel the suits of a hand, like games.canonize_hand,
+        so that every hand that scores the same up to suits
+        has the same mask: ricky melds never mix suits,
+        and points only depend on ranks
+
+    :param hand_mask: (int) see deck.card_bit_index
+    :return: (int, (int)) canonical mask,
+        and the original suit of each canonical suit
+    """
+    by_pattern = sorted(
+        [
+            (hand_mask & 0x1FFF, 0),
+            ((hand_mask >> 13) & 0x1FFF, 1),
+            ((hand_mask >> 26) & 0x1FFF, 2),
+            (hand_mask >> 39, 3),
+        ],
+        reverse=True,
+    )
+    return (
+        by_pattern[0][0]
+        | by_pattern[1][0] << 13
+        | by_pattern[2][0] << 26
+        | by_pattern[3][0] << 39
+    ), tuple(suit for _, suit in by_pattern)
+
+
+class HandPointsCache:
+    """sorted_hand_points of gin ricky hands, looked up by canonical hand
+        and evicted least recently used first to stay within max_size.
+        lookups hold a lock, so threads may share one cache
+
+        the order of cards that score the same, e.g. the cards
+        after the best meld, follows the canonical hand,
+        so it may not match calling sorted_hand_points directly
+    """
+
+    def __init__(self, max_size: int = 2**16, path: Optional[str] = None):
+        """
+        :param max_size: (int) most canonical hands to keep
+        :param path: (str) file to load from, if it exists, and save() to
+        """
+        self.max_size = max_size
+        self.path = path
+        # canonical mask --> (points, bit indices of the sorted hand)
+        self.entries: "OrderedDict[int, Tuple[int, Tuple[int, ...]]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def sorted_hand_points(self, hand: List[Card]) -> Tuple[List[Card], int]:
+        """same as sorted_hand_points(hand, backend="bitmask")
+
+        :param hand: ([str])
+        :return: ([str], int)
+        """
+        canonical_mask, suit_order = canonize_mask(cards_to_mask(hand))
+        with self.lock:
+            entry = self.entries.get(canonical_mask)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(canonical_mask)
+        if entry is None:
+            # solved outside the lock: two threads missing on the same
+            # hand both solve it, and store the same entry
+            sorted_hand, points = bitmask_sorted_hand_points(
+                mask_to_cards(canonical_mask)
+            )
+            entry = (points, tuple(card_bit_index[c] for c in sorted_hand))
+            with self.lock:
+                self.entries[canonical_mask] = entry
+                if len(self.entries) > self.max_size:
+                    self.entries.popitem(last=False)
+                    self.evictions += 1
+
+        points, bit_indices = entry
+        cards = _suit_order_cards[suit_order]
+        return [cards[b] for b in bit_indices], points
+
+    def hand_points(self, hand: List[Card]) -> int:
+        """
+        :param hand: ([str])
+        :return: (int)
+        """
+        _, points = self.sorted_hand_points(hand)
+        return points
+
+    def sort_hand(self, hand: List[Card]) -> List[Card]:
+        """
+        :param hand: ([str])
+        :return: ([str])
+        """
+        sorted_hand, _ = self.sorted_hand_points(hand)
+        return sorted_hand
+
+    def save(self, path: Optional[str] = None):
+        """write the cached hands to disk, to load() in a later run
+
+        :param path: (str) if None, the path the cache was made with
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("HandPointsCache.save: no path to save to")
+        tmp_path = f"{path}.tmp"
+        with self.lock:
+            entries = list(self.entries.items())
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"version": CACHE_FORMAT_VERSION, "entries": entries},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, path)
+
+    def load(self, path: str):
+        """add the hands saved to a file, skipping it if from another format
+
+        :param path: (str)
+        """
+        with open(path, "rb") as f:
+            saved = pickle.load(f)
+        if saved.get("version") != CACHE_FORMAT_VERSION:
+            return
+        with self.lock:
+            for canonical_mask, entry in saved["entries"]:
+                self.entries[canonical_mask] = entry
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """drop every cached hand, but keep the stats"""
+        with self.lock:
+            self.entries = OrderedDict()
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: (float) fraction of lookups found in the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def stats(self) -> Dict:
+        """
+        :return: (dict)
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "hands": len(self.entries),
+        }
+
+
+# shared by every GinRickyGameState
+hand_points_cache = HandPointsCache()
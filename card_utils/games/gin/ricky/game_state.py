@@ -2,7 +2,7 @@ from typing import List, Optional, Tuple
 
 from card_utils.deck.utils import Card
 from card_utils.games.gin.game_state import AbstractGinGameState
-from card_utils.games.gin.ricky.utils import hand_points, sort_hand
+from card_utils.games.gin.ricky.cache import hand_points_cache
 from card_utils.games.gin.utils import RummyAction, RummyTurn
 
 GIN_RICKY_CARDS_DEALT = 7
@@ -55,11 +55,30 @@ class GinRickyGameState(AbstractGinGameState):
         melds: Optional[List[List[Card]]] = None,
         opp_melds: Optional[List[List[Card]]] = None,
     ) -> int:
-        return hand_points(hand)
+        return hand_points_cache.hand_points(hand)
 
     @staticmethod
     def sort_hand(hand: List[str]) -> List[str]:
-        return sort_hand(hand)
+        return hand_points_cache.sort_hand(hand)
+
+    def compute_hand_deadwood(self, is_p1: bool) -> int:
+        """
+        :param is_p1: (bool)
+        :return: (int)
+        """
+        return self.hand_split(is_p1)[0]
+
+    def compute_hand_split(
+        self, is_p1: bool
+    ) -> Tuple[int, List[List[Card]], List[Card]]:
+        """ricky sorts and scores a hand in one go, melds first
+
+        :param is_p1: (bool)
+        :return: (int, [[str]], [str]) deadwood, no melds, sorted hand
+        """
+        hand = self.p1_hand if is_p1 else self.p2_hand
+        sorted_hand, points = hand_points_cache.sorted_hand_points(hand)
+        return points, [], sorted_hand
 
     @staticmethod
     def advance_turn(
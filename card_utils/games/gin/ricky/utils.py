@@ -2,7 +2,8 @@ import itertools
 from typing import Iterable, List, Tuple
 
 from card_utils import deck
-from card_utils.deck.utils import suit_partition
+from card_utils.deck.utils import cards_to_mask, mask_to_cards, suit_partition
+from card_utils.games.gin.melds import MELD_MASKS
 from card_utils.games.gin.utils import (
     get_sets,
     new_game,
@@ -27,11 +28,129 @@ def deal_new_game():
     return new_game(n_cards=7)
 
 
-def sorted_hand_points(hand) -> Tuple[List[str], int]:
+# ricky melds are 3 or 4 cards: every set, and the runs that short
+RICKY_MELD_MASKS: List[int] = [
+    m for m in MELD_MASKS if bin(m).count("1") <= 4
+]
+# card bit index --> ricky melds where it is the lowest bit,
+# so looking up each card in a hand finds each meld in it once
+_melds_by_low_bit: List[List[int]] = [[] for _ in range(52)]
+for _meld in RICKY_MELD_MASKS:
+    _melds_by_low_bit[(_meld & -_meld).bit_length() - 1].append(_meld)
+
+# points, and value of the highest card, of every 13-bit pattern of ranks
+# within one suit, where bit i is deck.ranks[i]
+_suit_pattern_points = [0] * (1 << 13)
+_suit_pattern_max = [0] * (1 << 13)
+for _pattern in range(1, 1 << 13):
+    _low_bit = _pattern & -_pattern
+    _value = deck.rank_to_value[deck.ranks[_low_bit.bit_length() - 1]]
+    _suit_pattern_points[_pattern] = (
+        _suit_pattern_points[_pattern ^ _low_bit] + _value
+    )
+    _suit_pattern_max[_pattern] = max(
+        _suit_pattern_max[_pattern ^ _low_bit], _value
+    )
+
+
+def mask_points(mask: int, discards: bool = False) -> int:
     """
+    :param mask: (int) 52-bit mask of the cards, see deck.card_bit_index
+    :param discards: (bool) if True, leave out the highest card,
+        which an 8-card hand would discard
+    :return: (int) sum of the card values
+    """
+    c, d, h, s = (
+        mask & 0x1FFF,
+        (mask >> 13) & 0x1FFF,
+        (mask >> 26) & 0x1FFF,
+        mask >> 39,
+    )
+    points = (
+        _suit_pattern_points[c]
+        + _suit_pattern_points[d]
+        + _suit_pattern_points[h]
+        + _suit_pattern_points[s]
+    )
+    if discards:
+        points -= max(
+            _suit_pattern_max[c],
+            _suit_pattern_max[d],
+            _suit_pattern_max[h],
+            _suit_pattern_max[s],
+        )
+    return points
+
+
+def _meld_cards(meld_mask: int) -> List[str]:
+    """
+    :param meld_mask: (int)
+    :return: ([str]) in order, with the ace last in a run up to it
+    """
+    cards = sort_cards_by_rank(mask_to_cards(meld_mask))
+    if cards[0][0] == "A" and cards[-1][0] == "K":
+        return cards[1:] + cards[:1]
+    return cards
+
+
+def bitmask_sorted_hand_points(hand) -> Tuple[List[str], int]:
+    """same points as sorted_hand_points, from the meld masks in the hand,
+        with the cards of the best meld first
+
     :param hand: ([str]) list of cards
     :return: ([str], int)
     """
+    hand_mask = cards_to_mask(hand)
+    discards = len(hand) == 8
+    melds = []
+    cards_left = hand_mask
+    while cards_left:
+        low_bit = cards_left & -cards_left
+        cards_left ^= low_bit
+        for meld in _melds_by_low_bit[low_bit.bit_length() - 1]:
+            if meld & hand_mask == meld:
+                melds.append(meld)
+    melds_3 = [m for m in melds if bin(m).count("1") == 3]
+    melds_4 = [m for m in melds if bin(m).count("1") == 4]
+    for meld_4 in melds_4:
+        for meld_3 in melds_3:
+            if not meld_4 & meld_3:
+                rest = hand_mask & ~(meld_4 | meld_3)
+                return (
+                    _meld_cards(meld_4)
+                    + _meld_cards(meld_3)
+                    + mask_to_cards(rest),
+                    0,
+                )
+
+    best_meld = 0
+    best_points = mask_points(hand_mask, discards)
+    for meld in melds:
+        points = mask_points(hand_mask & ~meld, discards)
+        if points < best_points:
+            best_meld, best_points = meld, points
+    if not best_meld:
+        return sort_cards_by_rank(hand), best_points
+    return (
+        _meld_cards(best_meld)
+        + sort_cards_by_rank(mask_to_cards(hand_mask & ~best_meld)),
+        best_points,
+    )
+
+
+def sorted_hand_points(hand, backend: str = "melds") -> Tuple[List[str], int]:
+    """
+    :param hand: ([str]) list of cards
+    :param backend: (str) how to find the best meld:
+        -> "melds": try the lists of runs and sets
+        -> "bitmask": bitmask_sorted_hand_points
+    :return: ([str], int)
+    """
+    if backend == "bitmask":
+        return bitmask_sorted_hand_points(hand)
+    elif backend != "melds":
+        raise ValueError(f"sorted_hand_points: unknown backend {backend}")
+
     runs_3, runs_4 = get_runs(hand)
     sets_3, sets_4 = get_sets(hand)
     melds_3 = runs_3 + sets_3
@@ -116,19 +235,21 @@ def sum_points_by_ranks(hand):
     return sum(deck.rank_to_value[r] for r, _ in hand)
 
 
-def sort_hand(hand) -> List[str]:
+def sort_hand(hand, backend: str = "melds") -> List[str]:
     """
     :param hand: ([str])
+    :param backend: (str) see sorted_hand_points
     :return: ([str])
     """
-    sorted_hand, _ = sorted_hand_points(hand)
+    sorted_hand, _ = sorted_hand_points(hand, backend)
     return sorted_hand
 
 
-def hand_points(hand: List[str]) -> int:
+def hand_points(hand: List[str], backend: str = "melds") -> int:
     """
     :param hand: ([str])
+    :param backend: (str) see sorted_hand_points
     :return: (int)
     """
-    _, points = sorted_hand_points(hand)
+    _, points = sorted_hand_points(hand, backend)
     return points
@@ -1,11 +1,13 @@
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 
 from card_utils.deck.utils import Card
+from card_utils.games.gin import backends
 from card_utils.games.gin.game_state import AbstractGinGameState
+from card_utils.games.gin.rummy.hand import RummyHand
 from card_utils.games.gin.rummy.utils import (
-    get_candidate_melds,
-    layoff_deadwood,
-    split_melds,
+    get_discard_options,
+    get_draw_deadwoods,
 )
 from card_utils.games.gin.utils import RummyTurn
 
@@ -14,6 +16,21 @@ GIN_RUMMY_CARDS_DEALT = 10
 GIN_RUMMY_END_CARDS_IN_DECK = 2
 
 
+@lru_cache(maxsize=1 << 14)
+def _split_hand(
+    backend: backends.MeldBackend, hand: Tuple[Card, ...]
+) -> backends.SplitHand:
+    """the best split of a hand for the static sort_hand and get_deadwood,
+        solved once per backend: treat the result as read-only
+
+    :param backend: (MeldBackend) in use, so switching never reuses
+        another solver's answer
+    :param hand: ((str))
+    :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+    """
+    return backends.split_melds(list(hand))
+
+
 class GinRummyGameState(AbstractGinGameState):
     def __init__(
         self,
@@ -54,6 +71,8 @@ class GinRummyGameState(AbstractGinGameState):
             underknock_bonus=20,
             gin_bonus=20,
         )
+        # is player 1 --> melds of their hand, kept in sync card by card
+        self.rummy_hands = {True: RummyHand(), False: RummyHand()}
 
     @staticmethod
     def get_deadwood(
@@ -62,14 +81,49 @@ class GinRummyGameState(AbstractGinGameState):
         opp_melds: Optional[List[List[Card]]] = None,
     ) -> int:
         if opp_melds is not None:
-            deadwood, _, _, _ = layoff_deadwood(hand, opp_melds)
+            deadwood, _, _, _ = backends.layoff_deadwood(hand, opp_melds)
             return deadwood
-        deadwood, _, _ = split_melds(hand, melds)
+        if melds is None:
+            return _split_hand(backends.get_backend(), tuple(hand))[0]
+        deadwood, _, _ = backends.split_melds(hand, melds)
         return deadwood
 
+    def copy(self):
+        """
+        :return: (GinRummyGameState)
+        """
+        clone = super().copy()
+        clone.rummy_hands = {
+            is_p1: rummy_hand.copy()
+            for is_p1, rummy_hand in self.rummy_hands.items()
+        }
+        return clone
+
+    def compute_hand_deadwood(self, is_p1: bool) -> int:
+        """
+        :param is_p1: (bool)
+        :return: (int)
+        """
+        rummy_hand = self.rummy_hands[is_p1]
+        rummy_hand.sync_mask(self.hand_masks[is_p1])
+        return rummy_hand.deadwood
+
+    def compute_hand_split(
+        self, is_p1: bool
+    ) -> Tuple[int, List[List[Card]], List[Card]]:
+        """
+        :param is_p1: (bool)
+        :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+        """
+        rummy_hand = self.rummy_hands[is_p1]
+        rummy_hand.sync_mask(self.hand_masks[is_p1])
+        return rummy_hand.split()
+
     @staticmethod
     def sort_hand(hand: List[str]) -> List[str]:
-        _, best_melds, unmelded = split_melds(hand)
+        _, best_melds, unmelded = _split_hand(
+            backends.get_backend(), tuple(hand)
+        )
         return [c for m in best_melds for c in m] + unmelded
 
     @staticmethod
@@ -135,6 +189,65 @@ class GinRummyGameState(AbstractGinGameState):
         """
         if not self.turn.is_knock():
             return []
+        is_p1 = self.turn.p1()
+        # the same RummyHand as hand_split, so its solve is shared
+        # and a hand with too much deadwood is never enumerated
+        rummy_hand = self.rummy_hands[is_p1]
+        rummy_hand.sync_mask(self.hand_masks[is_p1])
+        return rummy_hand.knock_candidates(max_deadwood=10)
+
+    def get_discard_options(
+        self,
+    ) -> Dict[Card, Tuple[int, List[List[Card]], List[Card], bool]]:
+        """
+        when it is their turn to discard, return to them
+        the best melds and deadwood they are left with,
+        and whether they may knock, for every card they could discard
+        """
+        if not self.turn.is_discard():
+            return {}
         hand = self.p1_hand if self.turn.p1() else self.p2_hand
-        candidates = get_candidate_melds(hand, max_deadwood=10)
-        return [(dw, melds) for dw, melds, _ in candidates]
+        return get_discard_options(hand)
+
+    def get_draw_options(self) -> Dict:
+        """
+        when it is their turn to draw, compare the least deadwood
+        they can have after drawing and discarding:
+        -> taking the top of the discard, if they may
+        -> drawing from the deck, on average over every card
+           they have not seen, since any of those could be on top
+        """
+        if self.turn in {
+            RummyTurn.P1_DRAWS,
+            RummyTurn.P1_DRAWS_FIRST,
+            RummyTurn.P1_DRAWS_FROM_DECK,
+        }:
+            is_p1 = True
+        elif self.turn in {
+            RummyTurn.P2_DRAWS,
+            RummyTurn.P2_DRAWS_FIRST,
+            RummyTurn.P2_DRAWS_FROM_DECK,
+        }:
+            is_p1 = False
+        else:
+            return {}
+
+        hand = self.p1_hand if is_p1 else self.p2_hand
+        unseen = self.unseen_cards(is_p1)
+        # the card they may take from the discard, if any
+        top_of_discard = (
+            None if self.turn.is_draw_from_deck() else self.top_of_discard
+        )
+        draws = unseen if top_of_discard is None else [*unseen, top_of_discard]
+        deadwoods = get_draw_deadwoods(hand, draws)
+        return {
+            "top_of_discard": (
+                None
+                if top_of_discard is None
+                else deadwoods.pop(top_of_discard)
+            ),
+            "deck": (
+                sum(deadwoods.values()) / len(deadwoods) if deadwoods else None
+            ),
+            "unseen": deadwoods,
+        }
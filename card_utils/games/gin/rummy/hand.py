@@ -0,0 +1,212 @@
+""" a gin rummy hand that keeps its best melds up to date card by card """
+
+from typing import Iterable, List, Optional, Set, Tuple
+
+from card_utils.deck import bit_index_cards, card_bit_index
+from card_utils.deck.utils import Card, cards_to_mask
+from card_utils.games.gin.melds import MELD_IDS, MELDS_BY_CARD, melds_with_card
+from card_utils.games.gin.rummy.utils import (
+    best_meld_combos,
+    get_mask_deadwood,
+    iter_mask_knock_candidates,
+    split_from_masks,
+)
+
+
+class RummyHand:
+    """track the melds in a hand, and its least deadwood,
+        as single cards are added or removed
+
+        adding or removing a card only touches the melds with that card,
+        i.e. the sets of its rank and the runs of its suit,
+        and the best melds are only solved again when they could change:
+        -> adding a card that makes no new meld adds its value
+        -> removing a card outside the best melds takes away its value
+
+        the knock candidates are worked out from the same melds,
+        once per set of cards, and only when the best melds leave
+        few enough deadwood to knock at all
+    """
+
+    __slots__ = (
+        "mask",
+        "melds",
+        "_deadwood",
+        "_best_melds",
+        "_knock_candidates",
+    )
+
+    def __init__(self, cards: Iterable[Card] = ()):
+        """
+        :param cards: ([str])
+        """
+        self.mask = 0
+        self.melds: Set[int] = set()
+        self._deadwood = 0
+        # None when the melds changed and the hand needs solving again
+        self._best_melds: Optional[List[int]] = []
+        # (max deadwood, candidates), None when the cards changed
+        self._knock_candidates: Optional[
+            Tuple[int, List[Tuple[int, List[List[Card]]]]]
+        ] = None
+        for card in cards:
+            self.add(card)
+
+    def copy(self) -> "RummyHand":
+        """
+        :return: (RummyHand)
+        """
+        clone = object.__new__(RummyHand)
+        clone.mask = self.mask
+        clone.melds = self.melds.copy()
+        clone._deadwood = self._deadwood
+        # never mutated in place, so it can be shared
+        clone._best_melds = self._best_melds
+        clone._knock_candidates = self._knock_candidates
+        return clone
+
+    def __len__(self) -> int:
+        return bin(self.mask).count("1")
+
+    def __contains__(self, card: Card) -> bool:
+        return bool(self.mask >> card_bit_index[card] & 1)
+
+    @property
+    def cards(self) -> List[Card]:
+        """
+        :return: ([str]) ordered by suit, then rank
+        """
+        return [bit_index_cards[ii] for ii in self._bit_indices(self.mask)]
+
+    def add(self, card: Card):
+        """
+        :param card: (str)
+        """
+        self._add_bit(card_bit_index[card])
+
+    def remove(self, card: Card):
+        """
+        :param card: (str)
+        """
+        self._remove_bit(card_bit_index[card])
+
+    def sync(self, cards: Iterable[Card]):
+        """add and remove cards one by one until the hand is these cards,
+            e.g. after a game state changed its list of cards
+
+        :param cards: ([str])
+        """
+        self.sync_mask(cards_to_mask(cards))
+
+    def sync_mask(self, mask: int):
+        """
+        :param mask: (int) 52-bit mask of the cards the hand should be
+        """
+        for bit_index in self._bit_indices(self.mask & ~mask):
+            self._remove_bit(bit_index)
+        for bit_index in self._bit_indices(mask & ~self.mask):
+            self._add_bit(bit_index)
+
+    @property
+    def deadwood(self) -> int:
+        """
+        :return: (int) least deadwood of the hand
+        """
+        if self._best_melds is None:
+            self.solve()
+        return self._deadwood
+
+    @property
+    def best_melds(self) -> List[int]:
+        """
+        :return: ([int]) masks of the melds that leave the least deadwood
+        """
+        if self._best_melds is None:
+            self.solve()
+        return self._best_melds  # type: ignore
+
+    def split(self) -> Tuple[int, List[List[Card]], List[Card]]:
+        """same as split_melds(cards, backend="bitmask")
+
+        :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+        """
+        return split_from_masks(self.mask, self.deadwood, self.best_melds)
+
+    def knock_candidates(
+        self, max_deadwood: int = 10
+    ) -> List[Tuple[int, List[List[Card]]]]:
+        """same as list(iter_knock_candidates(cards, max_deadwood))
+
+        :param max_deadwood: (int)
+        :return: ([(int, [[str]])]) deadwood, melds
+        """
+        cached = self._knock_candidates
+        if cached is None or cached[0] != max_deadwood:
+            candidates = []
+            if self.deadwood <= max_deadwood:
+                candidates = list(
+                    iter_mask_knock_candidates(
+                        self.mask,
+                        sorted(self.melds, key=MELD_IDS.__getitem__),
+                        max_deadwood,
+                    )
+                )
+            cached = self._knock_candidates = (max_deadwood, candidates)
+        return list(cached[1])
+
+    def solve(self):
+        """find the best melds again from the melds in the hand"""
+        meld_masks = sorted(self.melds, key=MELD_IDS.__getitem__)
+        self._deadwood, combos = best_meld_combos(
+            meld_masks, get_mask_deadwood(self.mask)
+        )
+        self._best_melds = [meld_masks[ii] for ii in combos[0]]
+
+    def _add_bit(self, bit_index: int):
+        """
+        :param bit_index: (int) see deck.card_bit_index
+        """
+        bit = 1 << bit_index
+        if self.mask & bit:
+            raise ValueError(f"{bit_index_cards[bit_index]} already in hand")
+        self.mask |= bit
+        self._knock_candidates = None
+        new_melds = melds_with_card(self.mask, bit_index)
+        if new_melds:
+            self.melds.update(new_melds)
+            self._best_melds = None
+        elif self._best_melds is not None:
+            # the new card can only be deadwood
+            self._deadwood += get_mask_deadwood(bit)
+
+    def _remove_bit(self, bit_index: int):
+        """
+        :param bit_index: (int) see deck.card_bit_index
+        """
+        bit = 1 << bit_index
+        if not self.mask & bit:
+            raise ValueError(f"{bit_index_cards[bit_index]} not in hand")
+        self.mask ^= bit
+        self._knock_candidates = None
+        self.melds.difference_update(MELDS_BY_CARD[bit_index])
+        if self._best_melds is None:
+            return
+        if any(m & bit for m in self._best_melds):
+            self._best_melds = None
+        else:
+            # every other split either loses the same card as deadwood,
+            # or used it in a meld and is gone, so the best stays best
+            self._deadwood -= get_mask_deadwood(bit)
+
+    @staticmethod
+    def _bit_indices(mask: int) -> List[int]:
+        """
+        :param mask: (int)
+        :return: ([int]) index of each set bit, lowest first
+        """
+        indices = []
+        while mask:
+            low_bit = mask & -mask
+            indices.append(low_bit.bit_length() - 1)
+            mask ^= low_bit
+        return indices
@@ -3,8 +3,30 @@ import time
 from tracemalloc import start
 from typing import Dict, Iterator, List, Optional, Set, Tuple, TypeVar
 
-from card_utils.deck import rank_to_value, value_to_rank
-from card_utils.deck.utils import Card, rank_partition, suit_partition
+from card_utils.deck import (
+    bit_index_cards,
+    card_bit_index,
+    card_bits,
+    rank_ids,
+    rank_to_value,
+    ranks,
+    suit_ids,
+    value_to_rank,
+)
+from card_utils.deck.utils import (
+    Card,
+    cards_to_mask,
+    mask_to_cards,
+    rank_partition,
+    suit_partition,
+)
+from card_utils.games.gin.melds import (
+    MELD_IDS,
+    SET_MASKS,
+    hand_melds,
+    melds_with_card,
+    rank_masks,
+)
 from card_utils.games.gin.ricky.utils import rank_straights
 from card_utils.games.gin.utils import get_sets, new_game, sort_cards_by_rank
 
@@ -59,6 +81,30 @@ def get_deadwood(unmelded_cards: List[Card]):
     return sum(min(10, rank_to_value[c[0]]) for c in unmelded_cards)
 
 
+# deadwood of every 13-bit pattern of ranks within one suit,
+# where bit i is deck.ranks[i], e.g. 0b1000000000001 = A + 2 = 3 points
+_suit_pattern_deadwood = [0] * (1 << 13)
+for _pattern in range(1, 1 << 13):
+    _low_bit = _pattern & -_pattern
+    _suit_pattern_deadwood[_pattern] = _suit_pattern_deadwood[
+        _pattern ^ _low_bit
+    ] + min(10, rank_to_value[ranks[_low_bit.bit_length() - 1]])
+
+
+def get_mask_deadwood(mask: int) -> int:
+    """get the deadwood points of a 52-bit card mask
+
+    :param mask: (int) see deck.card_bit_index
+    :return: (int) deadwood points
+    """
+    return (
+        _suit_pattern_deadwood[mask & 0x1FFF]
+        + _suit_pattern_deadwood[(mask >> 13) & 0x1FFF]
+        + _suit_pattern_deadwood[(mask >> 26) & 0x1FFF]
+        + _suit_pattern_deadwood[mask >> 39]
+    )
+
+
 def get_candidate_melds(
     hand: List[Card],
     max_deadwood: Optional[int] = None,
@@ -103,10 +149,319 @@ def get_candidate_melds(
     return candidates
 
 
+def best_meld_combos(
+    meld_masks: List[int],
+    hand_deadwood: int,
+    max_melds: int = 3,
+) -> Tuple[int, List[Tuple[int, ...]]]:
+    """branch and bound over disjoint combinations of melds,
+        without materialising every candidate
+
+    :param meld_masks: ([int]) mask of each meld in the hand
+    :param hand_deadwood: (int) deadwood with nothing melded
+    :param max_melds: (int) most melds to combine
+    :return: (int, [(int)]) the least deadwood, and the indices
+        into meld_masks of every combination that achieves it,
+        sorted by number of melds, then index
+    """
+    n_melds = len(meld_masks)
+    meld_values = [get_mask_deadwood(m) for m in meld_masks]
+    # cards that are in any meld from index i onwards
+    suffix_masks = [0] * (n_melds + 1)
+    for ii in range(n_melds - 1, -1, -1):
+        suffix_masks[ii] = suffix_masks[ii + 1] | meld_masks[ii]
+
+    best_deadwood = hand_deadwood
+    best_combos: List[Tuple[int, ...]] = [()]
+    # (next meld index, melded cards, deadwood, meld indices)
+    stack: List[Tuple[int, int, int, Tuple[int, ...]]] = [
+        (0, 0, hand_deadwood, ())
+    ]
+    while stack:
+        start, melded, deadwood, combo = stack.pop()
+        for ii in range(n_melds - 1, start - 1, -1):
+            meld_mask = meld_masks[ii]
+            if meld_mask & melded:
+                continue
+            new_melded = melded | meld_mask
+            new_deadwood = deadwood - meld_values[ii]
+            new_combo = (*combo, ii)
+            if new_deadwood < best_deadwood:
+                best_deadwood = new_deadwood
+                best_combos = [new_combo]
+            elif new_deadwood == best_deadwood:
+                best_combos.append(new_combo)
+
+            if len(new_combo) == max_melds:
+                continue
+            # bound: even melding every card left in later melds
+            # could not match the best deadwood so far
+            meldable = suffix_masks[ii + 1] & ~new_melded
+            if new_deadwood - get_mask_deadwood(meldable) <= best_deadwood:
+                stack.append((ii + 1, new_melded, new_deadwood, new_combo))
+
+    best_combos.sort(key=lambda c: (len(c), c))
+    return best_deadwood, best_combos
+
+
+def iter_knock_candidates(
+    hand: List[Card],
+    max_deadwood: int = 10,
+) -> Iterator[Tuple[int, List[List[Card]]]]:
+    """stream every way to meld a hand leaving at most max_deadwood,
+        fewest melds first, without building every meld combination
+
+        -> a branch is dropped once melding every card left in later
+           melds could not bring it down to max_deadwood
+        -> arrangements the opponent cannot tell apart are only
+           yielded once, i.e. the same sets, and runs that cover the
+           same cards, like 3-8 of a suit vs 3-5 and 6-8
+
+    :param hand: ([str])
+    :param max_deadwood: (int) most deadwood they may knock with
+    :return: (iter(int, [[str]])) deadwood, melds
+    """
+    hand_mask = cards_to_mask(hand)
+    return iter_mask_knock_candidates(
+        hand_mask, hand_melds(hand_mask), max_deadwood
+    )
+
+
+def iter_mask_knock_candidates(
+    hand_mask: int,
+    meld_masks: List[int],
+    max_deadwood: int = 10,
+) -> Iterator[Tuple[int, List[List[Card]]]]:
+    """same as iter_knock_candidates, from the melds already found
+        in a hand, e.g. the ones a RummyHand keeps up to date
+
+    :param hand_mask: (int)
+    :param meld_masks: ([int]) every meld in the hand, in hand_melds order
+    :param max_deadwood: (int)
+    :return: (iter(int, [[str]])) deadwood, melds
+    """
+    hand_deadwood = get_mask_deadwood(hand_mask)
+    if hand_deadwood <= max_deadwood:
+        yield hand_deadwood, []
+
+    n_melds = len(meld_masks)
+    meld_values = [get_mask_deadwood(m) for m in meld_masks]
+    is_run = [MELD_IDS[m] >= len(SET_MASKS) for m in meld_masks]
+    suffix_masks = [0] * (n_melds + 1)
+    for ii in range(n_melds - 1, -1, -1):
+        suffix_masks[ii] = suffix_masks[ii + 1] | meld_masks[ii]
+
+    def extend(size, start, melded, deadwood, combo):
+        """
+        :return: (iter(int, (int))) combos of size melds, in index order
+        """
+        for ii in range(start, n_melds):
+            if meld_masks[ii] & melded:
+                continue
+            new_melded = melded | meld_masks[ii]
+            new_deadwood = deadwood - meld_values[ii]
+            new_combo = (*combo, ii)
+            if len(new_combo) == size:
+                if new_deadwood <= max_deadwood:
+                    yield new_deadwood, new_combo
+                continue
+            meldable = suffix_masks[ii + 1] & ~new_melded
+            if new_deadwood - get_mask_deadwood(meldable) <= max_deadwood:
+                yield from extend(
+                    size, ii + 1, new_melded, new_deadwood, new_combo
+                )
+
+    seen = set()
+    for size in range(1, 4):
+        for deadwood, combo in extend(size, 0, 0, hand_deadwood, ()):
+            set_masks = frozenset(
+                meld_masks[ii] for ii in combo if not is_run[ii]
+            )
+            run_cards = 0
+            for ii in combo:
+                if is_run[ii]:
+                    run_cards |= meld_masks[ii]
+            key = (set_masks, run_cards)
+            if key in seen:
+                continue
+            seen.add(key)
+            yield deadwood, [
+                sort_cards_by_rank(mask_to_cards(meld_masks[ii]))
+                for ii in combo
+            ]
+
+
+def bitmask_split_melds(
+    hand: List[Card],
+) -> Tuple[int, List[List[Card]], List[Card]]:
+    """least deadwood split of a hand, with melds looked up in the
+        static meld index and combined as 52-bit masks,
+        so disjointness is a single & and no card lists are built
+        until the answer is known
+
+        ties are broken by fewest melds, then index order,
+        so the result does not depend on the order of the hand
+
+    :param hand: ([str])
+    :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+    """
+    hand_mask = cards_to_mask(hand)
+    meld_masks = hand_melds(hand_mask)
+    deadwood, combos = best_meld_combos(
+        meld_masks, get_mask_deadwood(hand_mask)
+    )
+    return split_from_masks(
+        hand_mask, deadwood, [meld_masks[ii] for ii in combos[0]]
+    )
+
+
+def get_discard_options(
+    hand: List[Card],
+    max_knock_deadwood: int = 10,
+) -> Dict[Card, Tuple[int, List[List[Card]], List[Card], bool]]:
+    """best split of the hand left after each possible discard,
+        e.g. of an 11 card hand after drawing
+
+        melds are found once for the whole hand, and the hand is solved
+        once: discarding a card outside its best melds just takes away
+        that card's deadwood, so only cards in the best melds need the
+        melds without them solved again
+
+    :param hand: ([str])
+    :param max_knock_deadwood: (int) most deadwood you may knock with
+    :return: ({str: (int, [[str]], [str], bool)}) discard -->
+        deadwood, melds, unmelded cards, whether they may knock,
+        with each split the same as split_melds(..., backend="bitmask")
+    """
+    hand_mask = cards_to_mask(hand)
+    meld_masks = hand_melds(hand_mask)
+    deadwood, combos = best_meld_combos(
+        meld_masks, get_mask_deadwood(hand_mask)
+    )
+    best_melds = [meld_masks[ii] for ii in combos[0]]
+    best_melded = 0
+    for meld_mask in best_melds:
+        best_melded |= meld_mask
+
+    options = {}
+    for card in hand:
+        bit = card_bits[card]
+        left_mask = hand_mask ^ bit
+        if best_melded & bit:
+            left_melds = [m for m in meld_masks if not m & bit]
+            left_deadwood, left_combos = best_meld_combos(
+                left_melds, get_mask_deadwood(left_mask)
+            )
+            split = split_from_masks(
+                left_mask,
+                left_deadwood,
+                [left_melds[ii] for ii in left_combos[0]],
+            )
+        else:
+            split = split_from_masks(
+                left_mask, deadwood - get_mask_deadwood(bit), best_melds
+            )
+        options[card] = (*split, split[0] <= max_knock_deadwood)
+    return options
+
+
+def best_discard_deadwood(hand_mask: int, meld_masks: List[int]) -> int:
+    """least deadwood left after discarding any one card
+
+        removing a card takes at most its value off the least deadwood,
+        so a card in the best melds is only solved without
+        if that could beat the best discard found so far
+
+    :param hand_mask: (int)
+    :param meld_masks: ([int]) every meld in the hand, in any order
+    :return: (int)
+    """
+    deadwood, combos = best_meld_combos(
+        meld_masks, get_mask_deadwood(hand_mask)
+    )
+    melded = 0
+    for ii in combos[0]:
+        melded |= meld_masks[ii]
+
+    unmelded = hand_mask & ~melded
+    best = None
+    while unmelded:
+        low_bit = unmelded & -unmelded
+        unmelded ^= low_bit
+        left_deadwood = deadwood - get_mask_deadwood(low_bit)
+        if best is None or left_deadwood < best:
+            best = left_deadwood
+
+    while melded:
+        low_bit = melded & -melded
+        melded ^= low_bit
+        if best is not None and deadwood - get_mask_deadwood(low_bit) >= best:
+            continue
+        left_deadwood, _ = best_meld_combos(
+            [m for m in meld_masks if not m & low_bit],
+            get_mask_deadwood(hand_mask ^ low_bit),
+        )
+        if best is None or left_deadwood < best:
+            best = left_deadwood
+    return best  # type: ignore
+
+
+def get_draw_deadwoods(hand: List[Card], draws: List[Card]) -> Dict[Card, int]:
+    """least deadwood after drawing each card, then making the best discard
+
+        the melds of the hand are found once, and each draw only adds
+        the melds that use the card drawn
+
+    :param hand: ([str]) the hand before drawing
+    :param draws: ([str]) cards they might draw
+    :return: ({str: int}) card drawn --> deadwood
+    """
+    hand_mask = cards_to_mask(hand)
+    meld_masks = hand_melds(hand_mask)
+    deadwoods = {}
+    for card in draws:
+        bit_index = card_bit_index[card]
+        drawn_mask = hand_mask | 1 << bit_index
+        deadwoods[card] = best_discard_deadwood(
+            drawn_mask, meld_masks + melds_with_card(drawn_mask, bit_index)
+        )
+    return deadwoods
+
+
+def split_from_masks(
+    hand_mask: int,
+    deadwood: int,
+    meld_masks: List[int],
+) -> Tuple[int, List[List[Card]], List[Card]]:
+    """
+    :param hand_mask: (int)
+    :param deadwood: (int)
+    :param meld_masks: ([int]) the melds chosen
+    :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+    """
+    melded = 0
+    for meld_mask in meld_masks:
+        melded |= meld_mask
+    return (
+        deadwood,
+        [sort_cards_by_rank(mask_to_cards(m)) for m in meld_masks],
+        sort_cards_by_rank(mask_to_cards(hand_mask & ~melded)),
+    )
+
+
 def split_melds(
     hand: List[str],
     melds: Optional[List[List[Card]]] = None,
+    backend: str = "candidates",
 ) -> Tuple[int, List[List[str]], List[str]]:
+    """
+    :param hand: ([str])
+    :param melds: ([[str]]) the melds the player chose, if any
+    :param backend: (str) how to find the best melds:
+        -> "candidates": take the min of get_candidate_melds
+        -> "bitmask": bitmask_split_melds
+    :return: (int, [[str]], [str]) deadwood, melds, unmelded cards
+    """
     if melds is not None:
         hand_set = set(hand)
         # they pick their melds to knock
@@ -114,6 +469,11 @@ def split_melds(
         um_cards = sort_cards_by_rank(hand_set - melded_cards)
         return get_deadwood(um_cards), melds, sort_cards_by_rank(um_cards)
 
+    if backend == "bitmask":
+        return bitmask_split_melds(hand)
+    elif backend != "candidates":
+        raise ValueError(f"split_melds: unknown backend {backend}")
+
     start = time.time()
     candidates = get_candidate_melds(hand, stop_on_gin=True)
     min_meld = min(candidates)
@@ -223,7 +583,7 @@ def powerset(s: List[T]) -> chain[Tuple[T, ...]]:
     return chain.from_iterable(combinations(s, r) for r in range(len(s) + 1))
 
 
-def layoff_deadwood(
+def powerset_layoff_deadwood(
     hand: List[Card],
     opp_melds: List[List[Card]],
     stop_on_zero: bool = True,
@@ -231,13 +591,15 @@ def layoff_deadwood(
     """
     loop through all the possible ways we can
     meld our hand + lay off remaining cards
+
+    exhaustive, so slow: kept as the reference for layoff_deadwood
     """
     sets, runs = _split_sets_runs(opp_melds)
     candidates = []
     for _, melds, unmelded in get_candidate_melds(hand):
         sls = _get_set_layoffs(unmelded, sets)
         for set_layoffs in powerset(sls):
-            lo_sets = [c for sl in set_layoffs for c in sl]
+            lo_sets = list(set_layoffs)
             um_set = set(unmelded) - set(lo_sets)
             rls = _get_run_layoffs(sorted(um_set), runs)
             for run_layoffs in powerset(rls):
@@ -254,3 +616,151 @@ def layoff_deadwood(
                     return candidate
                 candidates.append(candidate)
     return min(candidates)
+
+
+def _mask_run_layoffs(
+    mask: int,
+    runs: Dict[Suit, List[Tuple[Rank, Rank]]],
+) -> Tuple[int, List[Card]]:
+    """same chunks as _get_run_layoffs, all laid off at once
+
+    :param mask: (int) cards left to lay off
+    :param runs: ({str: [(str, str)]}) see _split_sets_runs
+    :return: (int, [str]) mask and list of cards laid off
+    """
+    laid_off_mask = 0
+    laid_off: List[Card] = []
+    for suit, suit_runs in runs.items():
+        shift = 13 * suit_ids[suit]
+        suit_bits = mask >> shift & 0x1FFF
+        if not suit_bits:
+            continue
+        for low, high in suit_runs:
+            low_value = rank_to_value[low]
+            high_value = rank_to_value[high] if high != "A" else 14
+            for step, value in [(-1, low_value), (1, high_value)]:
+                next_rank = value_to_rank.get(value + step)
+                while next_rank is not None:
+                    bit = 1 << rank_ids[next_rank]
+                    if not suit_bits & bit:
+                        break
+                    suit_bits ^= bit
+                    laid_off_mask |= bit << shift
+                    laid_off.append(f"{next_rank}{suit}")
+                    value += step
+                    next_rank = value_to_rank.get(value + step)
+    return laid_off_mask, laid_off
+
+
+# deadwood, cards laid off, mask of the cards left
+Layoffs = Tuple[int, List[Card], int]
+
+
+def layoff_deadwood(
+    hand: List[Card],
+    opp_melds: List[List[Card]],
+    stop_on_zero: bool = True,
+) -> Tuple[int, List[List[Card]], List[Card], List[Card]]:
+    """same result as powerset_layoff_deadwood, without the powersets:
+
+    -> laying off never adds deadwood, so of the run layoffs only
+       laying off every chunk can be best
+    -> set layoffs can block run layoffs, so each subset of them is
+       still tried, but there is at most one card per opponent set
+    -> the layoffs only depend on the unmelded cards, so they are worked
+       out once per unmelded mask, shared by every meld combination
+
+    :param hand: ([str])
+    :param opp_melds: ([[str]]) the melds of the player who knocked
+    :param stop_on_zero: (bool) return the first way to get 0 deadwood
+    :return: (int, [[str]], [str], [str])
+        deadwood, melds, cards laid off, unmelded cards
+    """
+    sets, runs = _split_sets_runs(opp_melds)
+    all_melds = _get_sets(hand) + _get_runs(hand)
+    meld_masks = [cards_to_mask(m) for m in all_melds]
+    hand_mask = cards_to_mask(hand)
+
+    # every combination of up to 3 disjoint melds,
+    # in the order get_candidate_melds would find them
+    combos: List[Tuple[int, ...]] = [()]
+    stack: List[Tuple[int, int, Tuple[int, ...]]] = [(0, 0, ())]
+    while stack:
+        start, melded, combo = stack.pop()
+        for ii in range(start, len(meld_masks)):
+            if not meld_masks[ii] & melded:
+                new_combo = (*combo, ii)
+                combos.append(new_combo)
+                if len(new_combo) < 3:
+                    stack.append((ii + 1, melded | meld_masks[ii], new_combo))
+    combos.sort(key=lambda c: (len(c), c))
+
+    def melds_list(combo):
+        return [sort_cards_by_rank(all_melds[ii]) for ii in combo]
+
+    def unmelded_mask(combo):
+        melded = 0
+        for ii in combo:
+            melded |= meld_masks[ii]
+        return hand_mask & ~melded
+
+    for combo in combos:
+        if combo and not unmelded_mask(combo):
+            # get_candidate_melds stops on the first gin it finds
+            return 0, melds_list(combo), [], []
+
+    # unmelded mask --> best (deadwood, layoffs, mask left),
+    # and the first way to get 0 deadwood, if any.
+    # the mask left follows from the layoffs, so never breaks ties
+    layoffs_by_mask: Dict[int, Tuple[Layoffs, Optional[Layoffs]]] = {}
+
+    def best_layoffs(mask: int) -> Tuple[Layoffs, Optional[Layoffs]]:
+        if mask in layoffs_by_mask:
+            return layoffs_by_mask[mask]
+        set_layoffs = []
+        for rank in sets:
+            rank_bits = mask & rank_masks[rank_ids[rank]]
+            if rank_bits:
+                low_bit = rank_bits & -rank_bits
+                card = bit_index_cards[low_bit.bit_length() - 1]
+                set_layoffs.append((low_bit, card))
+        best: Optional[Layoffs] = None
+        first_zero: Optional[Layoffs] = None
+        for chosen in powerset(set_layoffs):
+            left = mask
+            for bit, _ in chosen:
+                left ^= bit
+            run_mask, run_cards = _mask_run_layoffs(left, runs)
+            left ^= run_mask
+            candidate = (
+                get_mask_deadwood(left),
+                [card for _, card in chosen] + run_cards,
+                left,
+            )
+            if candidate[0] == 0 and first_zero is None:
+                first_zero = candidate
+            if best is None or candidate[:2] < best[:2]:
+                best = candidate
+        # the powerset always has the empty choice
+        assert best is not None
+        layoffs_by_mask[mask] = best, first_zero
+        return best, first_zero
+
+    results = [best_layoffs(unmelded_mask(c)) for c in combos]
+    if stop_on_zero:
+        for combo, (_, first_zero) in zip(combos, results):
+            if first_zero is not None:
+                return 0, melds_list(combo), first_zero[1], []
+
+    least_deadwood = min(best[0] for best, _ in results)
+    deadwood, melds, laid_off, left = min(
+        (deadwood, melds_list(combo), laid_off, left)
+        for combo, ((deadwood, laid_off, left), _) in zip(combos, results)
+        if deadwood == least_deadwood
+    )
+    return (
+        deadwood,
+        melds,
+        laid_off,
+        sort_cards_by_rank(mask_to_cards(left)),
+    )
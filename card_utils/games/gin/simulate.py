@@ -0,0 +1,325 @@
+""" play gin games between two policies, across a pool of processes
+
+a policy is a picklable callable, e.g. a module-level function,
+called as policy(game_state, rng) whenever it is that player's turn,
+which returns:
+-> on a draw: (bool) whether to take the top of the discard,
+   where not taking it on the first draw means passing
+-> on a discard: (str) the card to discard
+-> on a knock: ([[str]]) the melds to knock with, or None to play on
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from card_utils import deck
+from card_utils.games.gin.game_state import AbstractGinGameState
+from card_utils.games.gin.ricky.game_state import (
+    GIN_RICKY_CARDS_DEALT,
+    GinRickyGameState,
+)
+from card_utils.games.gin.rummy.game_state import (
+    GIN_RUMMY_CARDS_DEALT,
+    GinRummyGameState,
+)
+from card_utils.games.gin.utils import RummyTurn
+
+Policy = Callable[[AbstractGinGameState, random.Random], Any]
+
+_cards_dealt = {
+    GinRummyGameState: GIN_RUMMY_CARDS_DEALT,
+    GinRickyGameState: GIN_RICKY_CARDS_DEALT,
+}
+
+# methods of a game state that solve melds, timed while simulating
+_meld_methods = [
+    "compute_hand_deadwood",
+    "compute_hand_split",
+    "get_knock_candidates",
+    "get_discard_options",
+    "get_draw_options",
+]
+_meld_static_methods = ["get_deadwood", "sort_hand"]
+
+
+class _MeldTimer:
+    """total time spent in meld solving, not counting nested calls twice"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.depth = 0
+
+    def wrap(self, method):
+        def timed(*args, **kwargs):
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.seconds += time.perf_counter() - start
+
+        return timed
+
+
+_meld_timer = _MeldTimer()
+_timed_classes: Dict[type, type] = {}
+
+
+def _timed_class(game_class: Type[AbstractGinGameState]) -> type:
+    """
+    :param game_class: (type)
+    :return: (type) subclass that times its meld solving methods
+    """
+    if game_class not in _timed_classes:
+        attrs: Dict[str, Any] = {}
+        for name in _meld_methods:
+            if hasattr(game_class, name):
+                attrs[name] = _meld_timer.wrap(getattr(game_class, name))
+        for name in _meld_static_methods:
+            attrs[name] = staticmethod(
+                _meld_timer.wrap(getattr(game_class, name))
+            )
+        _timed_classes[game_class] = type(
+            f"Timed{game_class.__name__}", (game_class,), attrs
+        )
+    return _timed_classes[game_class]
+
+
+def _turn_is_p1(turn: RummyTurn) -> bool:
+    """unlike RummyTurn.p1, true for every one of player 1's turns
+
+    :param turn: (RummyTurn)
+    :return: (bool)
+    """
+    return turn.value.startswith("p1")
+
+
+def deal_game(
+    game_class: Type[AbstractGinGameState],
+    seed: int,
+    p1_first: bool = True,
+    max_turns: Optional[int] = None,
+) -> AbstractGinGameState:
+    """
+    :param game_class: (type) e.g. GinRummyGameState
+    :param seed: (int) the same seed always deals the same cards
+    :param p1_first: (bool) whether player 1 draws first
+    :param max_turns: (int)
+    :return: (AbstractGinGameState)
+    """
+    n_cards = next(
+        _cards_dealt[c] for c in game_class.__mro__ if c in _cards_dealt
+    )
+    deck_ = random.Random(seed).sample(deck.cards, len(deck.cards))
+    first_turn = (
+        RummyTurn.P1_DRAWS_FIRST if p1_first else RummyTurn.P2_DRAWS_FIRST
+    )
+    return game_class(
+        deck=deck_[2 * n_cards + 1 :],
+        discard=[deck_[2 * n_cards]],
+        p1_hand=deck_[:n_cards],
+        p2_hand=deck_[n_cards : 2 * n_cards],
+        turn=first_turn,
+        first_turn=first_turn,
+        max_turns=max_turns,
+    )
+
+
+def play_game(
+    game_state: AbstractGinGameState,
+    p1_policy: Policy,
+    p2_policy: Policy,
+    rng: random.Random,
+) -> AbstractGinGameState:
+    """play a game out to the end
+
+    :param game_state: (AbstractGinGameState)
+    :param p1_policy: (Policy)
+    :param p2_policy: (Policy)
+    :param rng: (random.Random) passed to the policies
+    :return: (AbstractGinGameState) the finished game
+    """
+    while not game_state.is_complete:
+        turn = game_state.turn
+        if turn.is_draw_from_deck():
+            game_state.draw_card(from_discard=False)
+            continue
+
+        policy = p1_policy if _turn_is_p1(turn) else p2_policy
+        decision = policy(game_state, rng)
+        if (
+            (turn.is_draw() or turn.is_first_draw())
+            and decision
+            and game_state.top_of_discard is None
+        ):
+            raise ValueError("play_game: cannot draw from an empty discard")
+
+        if turn.is_first_draw():
+            if decision:
+                game_state.draw_card(from_discard=True)
+            else:
+                game_state.first_turn_pass()
+        elif turn.is_draw():
+            game_state.draw_card(from_discard=bool(decision))
+        elif turn.is_discard():
+            game_state.discard_card(decision)
+        elif turn.is_knock():
+            game_state.decide_knock(decision is not None, decision)
+        else:
+            raise ValueError(f"play_game: invalid turn {turn}")
+    return game_state
+
+
+def _play_seeded_game(args: Tuple) -> Dict:
+    """play one game in a worker process
+
+    :param args: (tuple) game_class, p1_policy, p2_policy, seed, max_turns
+    :return: (dict) result of the game
+    """
+    game_class, p1_policy, p2_policy, seed, max_turns = args
+    # a wall shuffles the discards with the global random,
+    # so seed that too, to replay the same game from the same seed,
+    # and put it back after, for callers playing in their own process
+    random_state = random.getstate()
+    random.seed(seed)
+    try:
+        game_state = deal_game(
+            _timed_class(game_class),
+            seed=seed,
+            p1_first=seed % 2 == 0,
+            max_turns=max_turns,
+        )
+        meld_seconds = _meld_timer.seconds
+        start = time.perf_counter()
+        play_game(game_state, p1_policy, p2_policy, random.Random(seed))
+        seconds = time.perf_counter() - start
+    finally:
+        random.setstate(random_state)
+    return {
+        "seed": seed,
+        "p1_points": game_state.p1_points,
+        "p2_points": game_state.p2_points,
+        "turns": game_state.turns,
+        "seconds": seconds,
+        "meld_seconds": _meld_timer.seconds - meld_seconds,
+    }
+
+
+def simulate(
+    game_class: Type[AbstractGinGameState],
+    p1_policy: Policy,
+    p2_policy: Policy,
+    n_games: int,
+    seed: int = 0,
+    processes: Optional[int] = None,
+    max_turns: Optional[int] = 1000,
+) -> Dict:
+    """play n_games between two policies, with seeded deals,
+        and who draws first alternating from game to game
+
+    :param game_class: (type) e.g. GinRummyGameState
+    :param p1_policy: (Policy)
+    :param p2_policy: (Policy)
+    :param n_games: (int)
+    :param seed: (int) game i is dealt from seed + i
+    :param processes: (int) worker processes, or 1 to play in this one
+        --> if None, one per cpu
+    :param max_turns: (int) call a game a draw after this many turns
+    :return: (dict) totals over every game, and the result of each
+    """
+    tasks = [
+        (game_class, p1_policy, p2_policy, seed + ii, max_turns)
+        for ii in range(n_games)
+    ]
+    processes = processes or os.cpu_count() or 1
+    start = time.perf_counter()
+    if processes == 1:
+        games = [_play_seeded_game(task) for task in tasks]
+    else:
+        chunksize = max(1, n_games // (4 * processes))
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            games = list(
+                executor.map(_play_seeded_game, tasks, chunksize=chunksize)
+            )
+    seconds = time.perf_counter() - start
+    return summarize(games, seconds)
+
+
+def summarize(games: List[Dict], seconds: float) -> Dict:
+    """
+    :param games: ([dict]) results from _play_seeded_game
+    :param seconds: (float) wall clock time to play them
+    :return: (dict)
+    """
+    n_games = len(games)
+    play_seconds = sum(g["seconds"] for g in games)
+    meld_seconds = sum(g["meld_seconds"] for g in games)
+    return {
+        "games": n_games,
+        # the winner always ends on 0 points
+        "p1_wins": sum(1 for g in games if g["p2_points"]),
+        "p2_wins": sum(1 for g in games if g["p1_points"]),
+        "draws": sum(
+            1 for g in games if not g["p1_points"] and not g["p2_points"]
+        ),
+        "p1_points_won": sum(g["p2_points"] or 0 for g in games),
+        "p2_points_won": sum(g["p1_points"] or 0 for g in games),
+        "mean_turns": (
+            sum(g["turns"] for g in games) / n_games if n_games else 0.0
+        ),
+        "seconds": seconds,
+        "games_per_sec": n_games / seconds if seconds else 0.0,
+        "meld_seconds": meld_seconds,
+        "meld_fraction": meld_seconds / play_seconds if play_seconds else 0.0,
+        "results": games,
+    }
+
+
+def random_policy(game_state: AbstractGinGameState, rng: random.Random):
+    """draw from either pile, discard any card, never knock"""
+    turn = game_state.turn
+    if turn.is_discard():
+        hand = game_state.p1_hand if _turn_is_p1(turn) else game_state.p2_hand
+        return rng.choice(hand)
+    if turn.is_knock():
+        return None
+    return game_state.top_of_discard is not None and rng.random() < 0.5
+
+
+def greedy_policy(game_state: AbstractGinGameState, rng: random.Random):
+    """take the discard if it leaves less deadwood than the hand has now,
+        discard to leave the least deadwood, and always knock
+        with the melds that leave the least deadwood
+    """
+    turn = game_state.turn
+    is_p1 = _turn_is_p1(turn)
+    hand = game_state.p1_hand if is_p1 else game_state.p2_hand
+    if turn.is_knock():
+        candidates = game_state.get_knock_candidates()  # type: ignore
+        return min(candidates, key=lambda c: c[0])[1] if candidates else None
+
+    if turn.is_discard():
+        if hasattr(game_state, "get_discard_options"):
+            options = game_state.get_discard_options()  # type: ignore
+            return min(options, key=lambda c: options[c][0])
+        return min(
+            hand,
+            key=lambda c: game_state.get_deadwood(
+                [h for h in hand if h != c]
+            ),
+        )
+
+    top_of_discard = game_state.top_of_discard
+    if top_of_discard is None:
+        return False
+    drawn = [*hand, top_of_discard]
+    best_after = min(
+        game_state.get_deadwood([h for h in drawn if h != c])
+        for c in hand
+    )
+    return best_after < game_state.hand_deadwood(is_p1)
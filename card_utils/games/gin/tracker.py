@@ -0,0 +1,196 @@
+""" track what one gin player can infer about the cards they cannot see """
+
+from typing import List, Optional
+
+from card_utils.deck import card_bit_index, card_bits
+from card_utils.deck.utils import Card, cards_to_mask
+from card_utils.games.gin.melds import MELDS_BY_CARD
+from card_utils.games.gin.utils import RummyHud
+
+ALL_CARDS_MASK = (1 << 52) - 1
+
+# card bit index --> the other two cards of every 3-card meld with it:
+# any longer meld with the card has one of these in it,
+# so the card is dead once each of them is out of reach
+_meld_partners: List[List[int]] = [
+    [m & ~(1 << b) for m in MELDS_BY_CARD[b] if bin(m).count("1") == 3]
+    for b in range(52)
+]
+
+
+class CardTracker:
+    """one player's view of where the cards are, as 52-bit masks,
+        kept up to date move by move, so that each question
+        about a card is a few bit tests
+
+        -> own: the player's hand
+        -> discard: the discard pile
+        -> opp_known: cards the opponent took from the discard
+           and still holds
+        -> opp_discarded, opp_passed: cards the opponent threw away,
+           or left on top of the discard when they could take them
+        -> unseen: every other card, in the deck or the opponent's hand
+    """
+
+    __slots__ = (
+        "own",
+        "discard",
+        "opp_known",
+        "opp_discarded",
+        "opp_passed",
+        "opp_hand_size",
+        "n_opp_known",
+        "n_unseen",
+    )
+
+    def __init__(
+        self,
+        own: int,
+        discard: int,
+        opp_known: int,
+        opp_hand_size: int,
+        opp_discarded: int = 0,
+        opp_passed: int = 0,
+    ):
+        """
+        :param own: (int) mask of the player's hand
+        :param discard: (int) mask of the discard pile
+        :param opp_known: (int) mask of the opponent's cards they know of
+        :param opp_hand_size: (int)
+        :param opp_discarded: (int) mask
+        :param opp_passed: (int) mask
+        """
+        self.own = own
+        self.discard = discard
+        self.opp_known = opp_known
+        self.opp_discarded = opp_discarded
+        self.opp_passed = opp_passed
+        self.opp_hand_size = opp_hand_size
+        self.n_opp_known = bin(opp_known).count("1")
+        self.n_unseen = 52 - bin(own | discard | opp_known).count("1")
+
+    @classmethod
+    def for_player(
+        cls,
+        game_state,
+        is_player_1: bool,
+        history: Optional["CardTracker"] = None,
+    ) -> "CardTracker":
+        """start tracking from what the public hud shows
+
+        :param game_state: (AbstractGinGameState)
+        :param is_player_1: (bool) whose view
+        :param history: (CardTracker) to keep what the opponent
+            discarded and passed from
+        :return: (CardTracker)
+        """
+        opp_loc = RummyHud.PLAYER_2 if is_player_1 else RummyHud.PLAYER_1
+        opp_hand = game_state.p2_hand if is_player_1 else game_state.p1_hand
+        return cls(
+            own=game_state.hand_masks[is_player_1],
+            discard=cards_to_mask(game_state.discard),
+            opp_known=cards_to_mask(
+                c for c in opp_hand if game_state.public_hud.get(c) == opp_loc
+            ),
+            opp_hand_size=len(opp_hand),
+            opp_discarded=history.opp_discarded if history else 0,
+            opp_passed=history.opp_passed if history else 0,
+        )
+
+    def copy(self) -> "CardTracker":
+        """
+        :return: (CardTracker)
+        """
+        clone = object.__new__(CardTracker)
+        for attr in CardTracker.__slots__:
+            setattr(clone, attr, getattr(self, attr))
+        return clone
+
+    @property
+    def unseen(self) -> int:
+        """
+        :return: (int) mask of the cards in the deck or opponent's hand
+        """
+        return ALL_CARDS_MASK & ~(self.own | self.discard | self.opp_known)
+
+    def own_draw(self, card: Card, from_discard: bool):
+        """
+        :param card: (str)
+        :param from_discard: (bool)
+        """
+        bit = card_bits[card]
+        self.own |= bit
+        if from_discard:
+            self.discard &= ~bit
+        else:
+            self.n_unseen -= 1
+
+    def own_discard(self, card: Card):
+        """
+        :param card: (str)
+        """
+        bit = card_bits[card]
+        self.own &= ~bit
+        self.discard |= bit
+
+    def opponent_draw(self, card: Optional[Card], passed: Optional[Card]):
+        """
+        :param card: (str) the top of the discard they took,
+            or None if they drew from the deck
+        :param passed: (str) the top of the discard they left, if any
+        """
+        self.opp_hand_size += 1
+        if card is not None:
+            bit = card_bits[card]
+            self.discard &= ~bit
+            self.opp_known |= bit
+            self.n_opp_known += 1
+        if passed is not None:
+            self.opp_passed |= card_bits[passed]
+
+    def opponent_pass(self, card: Card):
+        """
+        :param card: (str) the top of the discard they left
+        """
+        self.opp_passed |= card_bits[card]
+
+    def opponent_discard(self, card: Card):
+        """
+        :param card: (str)
+        """
+        bit = card_bits[card]
+        self.opp_hand_size -= 1
+        if self.opp_known & bit:
+            self.opp_known &= ~bit
+            self.n_opp_known -= 1
+        else:
+            self.n_unseen -= 1
+        self.discard |= bit
+        self.opp_discarded |= bit
+
+    def opponent_holds(self, card: Card) -> float:
+        """
+        :param card: (str)
+        :return: (float) probability that the opponent has the card,
+            with the cards they might hold all equally likely
+        """
+        bit = card_bits[card]
+        if self.opp_known & bit:
+            return 1.0
+        if (self.own | self.discard) & bit or not self.n_unseen:
+            return 0.0
+        return (self.opp_hand_size - self.n_opp_known) / self.n_unseen
+
+    def is_safe_discard(self, card: Card) -> bool:
+        """whether the opponent cannot meld the card, because every
+            meld it could go in needs a card in the player's hand
+            or under the discard it would land on
+
+        :param card: (str)
+        :return: (bool)
+        """
+        out_of_reach = self.own | self.discard
+        return all(
+            partners & out_of_reach
+            for partners in _meld_partners[card_bit_index[card]]
+        )
@@ -31,6 +31,20 @@ class Action:
     wagers = {action_call, *aggressions}
     actions = {*zeros, *wagers}
 
+    # small-int codes, so that actions are stored compactly
+    names = (
+        action_check,
+        action_bet,
+        action_fold,
+        action_call,
+        action_raise,
+        action_draw,
+    )
+    codes = {name: code for code, name in enumerate(names)}
+
+    # __dict__ stays unallocated unless callers add their own attributes
+    __slots__ = ("__dict__", "player", "code", "amount", "_state")
+
     def __init__(self, player, action, amount, **state):
         """
         :param player: (int) player in game, 0-indexed
@@ -60,10 +74,42 @@ class Action:
                 )
 
         self.player = player
-        self.action = action
+        self.code = self.codes[action]
         self.amount = amount
 
-        self.state = state
+        # most actions carry no extra state,
+        # so only create the dict when it is used
+        self._state = state or None
+
+    @property
+    def action(self):
+        """
+        :return: (str)
+        """
+        return self.names[self.code]
+
+    @action.setter
+    def action(self, action):
+        """
+        :param action: (str)
+        """
+        self.code = self.codes[action]
+
+    @property
+    def state(self):
+        """
+        :return: (dict)
+        """
+        if self._state is None:
+            self._state = {}
+        return self._state
+
+    @state.setter
+    def state(self, state):
+        """
+        :param state: (dict)
+        """
+        self._state = state
 
     def to_dict(self):
         """
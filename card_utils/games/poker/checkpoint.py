@@ -0,0 +1,232 @@
+""" cache game states by action prefix, to cheaply rebuild them """
+
+import sys
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Type
+
+from card_utils.games.poker.game_state import PokerGameState
+
+
+class _PrefixNode:
+    """a node in the action-prefix trie for one game config"""
+
+    __slots__ = ("parent", "key", "children", "state", "size")
+
+    def __init__(self, parent: Optional["_PrefixNode"], key):
+        self.parent = parent
+        self.key = key
+        self.children: Dict[tuple, "_PrefixNode"] = {}
+        self.state: Optional[PokerGameState] = None
+        self.size = 0
+
+
+class CheckpointCache:
+    """rebuild poker game states from a game config and list of actions,
+        resuming from the state after the longest cached action prefix,
+        rather than replaying every action from the start
+
+        checkpoints live on the nodes of a trie of action prefixes,
+        one trie per game config, and are evicted least recently used
+        first to stay within max_bytes
+    """
+
+    def __init__(self, max_bytes: int = 64 * 2**20):
+        """
+        :param max_bytes: (int) approximate memory budget for checkpoints
+        """
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.roots: Dict[tuple, _PrefixNode] = {}
+        self.lru: "OrderedDict[_PrefixNode, None]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.actions_replayed = 0
+        self.actions_skipped = 0
+
+    def from_action_dicts(
+        self,
+        game_class: Type[PokerGameState],
+        action_dicts: List[Dict],
+        trusted: bool = False,
+        **config,
+    ) -> PokerGameState:
+        """drop-in for game_class.from_action_dicts(action_dicts=..., **config)
+
+        :param game_class: (type) e.g. NLHEGameState
+        :param action_dicts: ([dict])
+        :param trusted: (bool) see reset_state_from_action_dicts
+        :param config: (dict) the other from_action_dicts kwargs
+        :return: (PokerGameState) a fresh copy the caller may mutate
+        """
+        root = self.get_root(game_class, config)
+        node, depth = root, 0
+        checkpoint = root if root.state is not None else None
+        checkpoint_depth = 0
+        for action_dict in action_dicts:
+            node = node.children.get(self.action_key(action_dict))
+            if node is None:
+                break
+            depth += 1
+            if node.state is not None:
+                checkpoint, checkpoint_depth = node, depth
+
+        if checkpoint is None:
+            self.misses += 1
+            game_state = game_class.from_action_dicts(
+                action_dicts=[], trusted=trusted, **config
+            )
+        else:
+            self.hits += 1
+            self.lru.move_to_end(checkpoint)
+            game_state = checkpoint.state.copy()  # type: ignore
+
+        remaining = action_dicts[checkpoint_depth:]
+        game_state.apply_action_dicts(remaining, trusted=trusted)
+        self.actions_replayed += len(remaining)
+        self.actions_skipped += checkpoint_depth
+
+        if remaining or checkpoint is None:
+            self.store(root, action_dicts, game_state)
+        return game_state
+
+    def get_root(self, game_class, config: Dict) -> _PrefixNode:
+        """
+        :param game_class: (type)
+        :param config: (dict)
+        :return: (_PrefixNode)
+        """
+        key = self.config_key(game_class, config)
+        root = self.roots.get(key)
+        if root is None:
+            root = self.roots[key] = _PrefixNode(None, key)
+        return root
+
+    def store(self, root: _PrefixNode, action_dicts, game_state):
+        """checkpoint a copy of game_state after action_dicts
+
+        :param root: (_PrefixNode)
+        :param action_dicts: ([dict])
+        :param game_state: (PokerGameState)
+        """
+        node = root
+        for action_dict in action_dicts:
+            key = self.action_key(action_dict)
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _PrefixNode(node, key)
+            node = child
+
+        if node.state is not None:
+            self.total_bytes -= node.size
+        state = node.state = game_state.copy()
+        node.size = self.estimate_bytes(state)
+        self.total_bytes += node.size
+        self.lru[node] = None
+        self.lru.move_to_end(node)
+
+        while self.total_bytes > self.max_bytes and len(self.lru) > 1:
+            self.evict(next(iter(self.lru)))
+
+    def evict(self, node: _PrefixNode):
+        """drop the checkpoint at this node,
+            and prune any branch of the trie left without checkpoints
+
+        :param node: (_PrefixNode)
+        """
+        del self.lru[node]
+        self.total_bytes -= node.size
+        self.evictions += 1
+        node.state = None
+        node.size = 0
+        while not node.children and node.state is None:
+            parent = node.parent
+            if parent is None:
+                del self.roots[node.key]
+                return
+            del parent.children[node.key]
+            node = parent
+
+    def clear(self):
+        """drop every checkpoint, but keep the stats"""
+        self.roots = {}
+        self.lru = OrderedDict()
+        self.total_bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        :return: (float) fraction of lookups that resumed from a checkpoint
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def stats(self) -> Dict:
+        """
+        :return: (dict)
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "evictions": self.evictions,
+            "checkpoints": len(self.lru),
+            "total_bytes": self.total_bytes,
+            "actions_replayed": self.actions_replayed,
+            "actions_skipped": self.actions_skipped,
+        }
+
+    @staticmethod
+    def config_key(game_class, config: Dict) -> Tuple:
+        """
+        :param game_class: (type)
+        :param config: (dict) from_action_dicts kwargs
+        :return: (tuple) hashable version of the config
+        """
+
+        def freeze(value):
+            if isinstance(value, (list, tuple)):
+                return tuple(freeze(v) for v in value)
+            if isinstance(value, dict):
+                return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+            return value
+
+        return (game_class, freeze(config))
+
+    @staticmethod
+    def action_key(action_dict: Dict) -> Tuple:
+        """
+        :param action_dict: (dict)
+        :return: (tuple)
+        """
+        return (
+            action_dict["player"],
+            action_dict["action"],
+            action_dict.get("amount"),
+        )
+
+    @staticmethod
+    def estimate_bytes(game_state: PokerGameState) -> int:
+        """rough size of what a checkpoint owns,
+            i.e. not the deck and hands it shares with other states
+
+        :param game_state: (PokerGameState)
+        :return: (int)
+        """
+        return (
+            sys.getsizeof(game_state)
+            + sys.getsizeof(game_state.seat_stacks)
+            + sys.getsizeof(game_state.pot)
+            + sys.getsizeof(game_state.pot.seat_balances)
+            + sys.getsizeof(game_state.seat_actions.codes)
+            + sys.getsizeof(game_state.all_in_players)
+            + sys.getsizeof(game_state.actions)
+            + sum(
+                sys.getsizeof(action)
+                + (sys.getsizeof(action._state) if action._state else 0)
+                for action in game_state.actions
+            )
+            + sum(sys.getsizeof(board) for board in game_state.boards)
+        )
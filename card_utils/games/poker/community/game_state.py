@@ -12,6 +12,8 @@ logger = logging.getLogger(__name__)
 class CommunityGameState(PokerGameState):
     """basic community card game state"""
 
+    __slots__ = ()
+
     # NOTE: override these in subclasses!
     name = "abstract_community"
     num_hole_cards = 0
@@ -43,7 +45,7 @@ class CommunityGameState(PokerGameState):
         action: Optional[int] = None,
         street: int = 0,
         actions: Optional[List[Action]] = None,
-        last_actions: Optional[Dict[int, Action]] = None,
+        last_actions: Optional[Dict[int, str]] = None,
         pot_balances: Optional[Dict[int, int]] = None,
         all_in_runouts: int = 1,
         rake_fraction: float = 0.0,
@@ -193,9 +195,9 @@ class CommunityGameState(PokerGameState):
         self.boards[0] = self.boards[0][0 : 5 - cards_remaining]
 
     def extract_blinds(self):
-        """move blinds from self.stacks to self.pot"""
+        """move blinds from self.seat_stacks to self.pot"""
         for player, blind in enumerate(self.blinds):
-            amount = min(self.stacks[player], blind)
+            amount = min(self.seat_stacks[player], blind)
             self.put_money_in_pot(player, amount)
 
     def get_starting_action(self):
@@ -327,6 +329,6 @@ class CommunityGameState(PokerGameState):
             "action": self.action,
             "street": self.street,
             "actions": [action.to_dict() for action in self.actions],
-            "last_actions": self.last_actions,
-            "pot_balances": self.pot.balances,
+            "last_actions": dict(self.seat_actions.items()),
+            "pot_balances": dict(self.pot.seat_balances.items()),
         }
@@ -7,6 +7,8 @@ from card_utils.games.poker.community.holdem.utils import get_best_hands_fast
 class HoldemGameState(CommunityGameState):
     """ basic holdem game state """
 
+    __slots__ = ()
+
     name = "abstract_holdem"
     num_hole_cards = 2
 
@@ -4,6 +4,8 @@ from card_utils.games.poker.community.holdem.game_state import HoldemGameState
 class NLHEGameState(HoldemGameState):
     """ class for PLO game state """
 
+    __slots__ = ()
+
     name = 'NLHE'
 
     @property
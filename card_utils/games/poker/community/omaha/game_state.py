@@ -7,6 +7,8 @@ from card_utils.games.poker.community.omaha.utils import get_best_hands_fast
 class OmahaGameState(CommunityGameState):
     """ basic omaha game state """
 
+    __slots__ = ()
+
     name = "abstract_omaha"
     num_hole_cards = 4
 
@@ -4,6 +4,8 @@ from card_utils.games.poker.community.omaha.game_state import OmahaGameState
 class PLOGameState(OmahaGameState):
     """ class for PLO game state """
 
+    __slots__ = ()
+
     name = 'PLO'
 
     @property
@@ -1,8 +1,9 @@
-from typing import Dict, List, Optional
+import random
+from typing import Dict, List, Optional, Set
 
 from card_utils.games.poker.action import Action
 from card_utils.games.poker.pot import Pot
-from card_utils.games.poker.util import is_action_closed
+from card_utils.games.poker.seats import SeatActions, SeatArray
 
 
 class PokerGameState:
@@ -12,6 +13,47 @@ class PokerGameState:
     name = "abstract_poker"
     showdown_street = 0
 
+    # we hold a lot of these in memory at once, so the fields are slots.
+    # __dict__ is only there for attributes callers add on top,
+    # and stays unallocated until then.
+    # NOTE: subclasses should declare __slots__ too
+    __slots__ = (
+        "__dict__",
+        "num_players",
+        "deck",
+        "hands",
+        "starting_stacks",
+        "seat_stacks",
+        "boards",
+        "ante",
+        "blinds",
+        "biggest_blind",
+        "seat_actions",
+        "all_in_runouts",
+        "actions",
+        "rake_fraction",
+        "max_rake",
+        "pot",
+        "street",
+        "action",
+        "payouts",
+        "rake_paid",
+        "is_complete",
+        "trusted",
+        "undo_log",
+        "redo_log",
+        "max_balance",
+        "second_balance",
+        "max_balance_player",
+        "all_in_players",
+        "num_folded",
+        "num_live",
+        "num_live_at_max",
+        "num_checked",
+        "num_to_act",
+        "num_all_in_last_street",
+    )
+
     def __init__(
         self,
         num_players: int,
@@ -26,7 +68,7 @@ class PokerGameState:
         street: int = 0,
         actions: Optional[List[Action]] = None,
         action_dicts: Optional[List[Dict]] = None,
-        last_actions: Optional[Dict[int, Action]] = None,
+        last_actions: Optional[Dict[int, str]] = None,
         pot_balances: Optional[Dict[int, int]] = None,
         all_in_runouts: int = 1,
         rake_fraction: float = 0.0,
@@ -48,7 +90,7 @@ class PokerGameState:
                 "action": str,
                 "amount": int  [only necessary for bet/call/raises]
             }
-        :param last_actions: ({int: Action})
+        :param last_actions: ({int: str})
         :param pot_balances: ({int: int})
         :param all_in_runouts: (int)
         :param rake_fraction: (float)
@@ -78,7 +120,9 @@ class PokerGameState:
                 "must have exactly one starting stack per player"
             )
         self.starting_stacks = starting_stacks
-        self.stacks = stacks or [s for s in starting_stacks]
+        self.seat_stacks = SeatArray.build(
+            num_players, stacks or starting_stacks
+        )
 
         boards = boards or [[]]
         if len(boards) not in {1, num_players}:
@@ -96,8 +140,9 @@ class PokerGameState:
             )
         self.ante = ante
         self.blinds = blinds
+        self.biggest_blind = max([ante, *blinds])
 
-        self.last_actions: Dict[int, Action] = last_actions or {}
+        self.seat_actions = SeatActions(num_players, last_actions)
         self.all_in_runouts = all_in_runouts
 
         if actions and action_dicts:
@@ -119,6 +164,7 @@ class PokerGameState:
         )
 
         self.street = street
+        self.reset_betting_state()
 
         if action is None:
             self.extract_antes_and_blinds()
@@ -130,6 +176,15 @@ class PokerGameState:
         self.rake_paid: Dict[int, int] = {}
         self.is_complete = False
 
+        # when True, append_action skips the full validate_action
+        # and only runs validate_trusted_action
+        self.trusted = False
+
+        # one delta per act() to step backwards with undo(),
+        # and the actions that undo() took back, for redo()
+        self.undo_log: List[tuple] = []
+        self.redo_log: List[Action] = []
+
     @classmethod
     def from_action_dicts(
         cls,
@@ -144,6 +199,8 @@ class PokerGameState:
         all_in_runouts: int = 1,
         rake_fraction: float = 0.0,
         max_rake: int = 0,
+        trusted: bool = False,
+        validate_one_in: int = 0,
     ):
         """
         :param num_players: (int)
@@ -160,6 +217,8 @@ class PokerGameState:
                 "amount": int  [only necessary for bet/call/raises]
             }
         :param all_in_runouts: (int)
+        :param trusted: (bool) see reset_state_from_action_dicts
+        :param validate_one_in: (int) see reset_state_from_action_dicts
         :return: (PokerGameState)
         """
         game_state = cls(
@@ -174,9 +233,43 @@ class PokerGameState:
             rake_fraction=rake_fraction,
             max_rake=max_rake,
         )
-        game_state.reset_state_from_action_dicts(action_dicts or [])
+        game_state.reset_state_from_action_dicts(
+            action_dicts or [],
+            trusted=trusted,
+            validate_one_in=validate_one_in,
+        )
         return game_state
 
+    @property
+    def stacks(self) -> List[int]:
+        """a copy of seat_stacks, which is what play updates in place
+
+        :return: ([int])
+        """
+        return self.seat_stacks.to_list()
+
+    @stacks.setter
+    def stacks(self, stacks: List[int]):
+        """
+        :param stacks: ([int])
+        """
+        self.seat_stacks = SeatArray.build(self.num_players, stacks)
+
+    @property
+    def last_actions(self) -> Dict[int, str]:
+        """a copy of seat_actions, which is what play updates in place
+
+        :return: ({int: str})
+        """
+        return self.seat_actions.to_dict()
+
+    @last_actions.setter
+    def last_actions(self, last_actions: Dict[int, str]):
+        """
+        :param last_actions: ({int: str})
+        """
+        self.seat_actions = SeatActions(self.num_players, last_actions)
+
     def get_starting_action(self) -> int:
         """the player who starts the action
             on the very first street
@@ -245,20 +338,118 @@ class PokerGameState:
         :param player: (int)
         :return: (bool)
         """
-        return self.stacks[player] == 0
+        return player in self.all_in_players
+
+    def widen_chips(self):
+        """store stacks and pot balances as floats from now on,
+            once a fractional amount of chips goes in the pot
+        """
+        if self.seat_stacks.typecode != SeatArray.float_typecode:
+            self.seat_stacks = self.seat_stacks.widened()
+        if self.pot.seat_balances.typecode != SeatArray.float_typecode:
+            self.pot.seat_balances = self.pot.seat_balances.widened()
 
     def put_money_in_pot(self, player, amount):
         """
         :param player: (int)
         :param amount: (int)
         """
-        if amount > self.stacks[player]:
+        if amount > self.seat_stacks[player]:
             raise Exception(
-                f"player {player} only has {self.stacks[player]} chips, "
+                f"player {player} only has {self.seat_stacks[player]} chips, "
                 f"but trying to put {amount} in pot"
             )
-        self.stacks[player] -= amount
+        if isinstance(amount, float):
+            self.widen_chips()
+        self.seat_stacks[player] -= amount
         self.pot.put_money_in(player, amount)
+        if amount:
+            self.track_money_in_pot(player)
+
+    def reset_betting_state(self):
+        """recompute the betting state that is otherwise
+            tracked incrementally as actions are applied:
+            - the two biggest pot balances (and who holds the biggest)
+            - players who are all in
+            - players who can still act, and how many have matched
+              the biggest balance
+            - folds, plus the per-street counts in reset_street_counters
+
+            O(num_players), so only called when (re)building state
+        """
+        balances = self.pot.seat_balances
+        by_balance = sorted(
+            range(self.num_players), key=lambda p: balances[p], reverse=True
+        )
+        self.max_balance_player = by_balance[0]
+        self.max_balance = balances[by_balance[0]]
+        self.second_balance = balances[by_balance[1]]
+
+        self.all_in_players: Set[int] = {
+            p for p in range(self.num_players) if self.seat_stacks[p] == 0
+        }
+        self.num_folded = 0
+        self.num_live = 0
+        self.num_live_at_max = 0
+        for player in range(self.num_players):
+            if self.seat_actions.get(player) == Action.action_fold:
+                self.num_folded += 1
+            elif player not in self.all_in_players:
+                self.num_live += 1
+                if balances[player] == self.max_balance:
+                    self.num_live_at_max += 1
+
+        self.reset_street_counters()
+
+    def reset_street_counters(self):
+        """count players who have not yet acted this street,
+        split into those who can act and those all in from before,
+        and players who have checked this street
+        """
+        self.num_checked = 0
+        self.num_to_act = 0
+        self.num_all_in_last_street = 0
+        for player in range(self.num_players):
+            last_action = self.seat_actions.get(player)
+            if last_action == Action.action_check:
+                self.num_checked += 1
+            elif last_action is None:
+                if player in self.all_in_players:
+                    self.num_all_in_last_street += 1
+                else:
+                    self.num_to_act += 1
+
+    def track_money_in_pot(self, player):
+        """O(1) update of the betting state after
+            a player puts a positive amount in the pot
+
+        :param player: (int)
+        """
+        balance = self.pot.seat_balances[player]
+        is_live = self.seat_actions.get(player) != Action.action_fold
+        if self.seat_stacks[player] == 0 and player not in self.all_in_players:
+            self.all_in_players.add(player)
+            if is_live:
+                self.num_live -= 1
+                is_live = False
+            if self.seat_actions.get(player) is None:
+                self.num_to_act -= 1
+                self.num_all_in_last_street += 1
+
+        if balance > self.max_balance:
+            # everyone else who had matched the old max is now behind
+            self.num_live_at_max = int(is_live)
+        elif balance == self.max_balance:
+            self.num_live_at_max += int(is_live)
+
+        if player == self.max_balance_player:
+            self.max_balance = balance
+        elif balance > self.max_balance:
+            self.second_balance = self.max_balance
+            self.max_balance = balance
+            self.max_balance_player = player
+        elif balance > self.second_balance:
+            self.second_balance = balance
 
     def extract_antes(self):
         """subtract antes from stacks and
@@ -267,13 +458,13 @@ class PokerGameState:
         :return: (int) total antes
         """
         for player in range(self.num_players):
-            amount = min(self.stacks[player], self.ante)
+            amount = min(self.seat_stacks[player], self.ante)
             self.put_money_in_pot(player, amount)
 
     def extract_blinds(self):
-        """move blinds from self.stacks to self.pot"""
+        """move blinds from self.seat_stacks to self.pot"""
         for player, blind in enumerate(self.blinds):
-            amount = min(self.stacks[player], blind)
+            amount = min(self.seat_stacks[player], blind)
             self.put_money_in_pot(player, amount)
 
     def extract_antes_and_blinds(self):
@@ -285,7 +476,12 @@ class PokerGameState:
         self.extract_antes()
         self.extract_blinds()
 
-    def reset_state_from_action_dicts(self, action_dicts):
+    def reset_state_from_action_dicts(
+        self,
+        action_dicts,
+        trusted: bool = False,
+        validate_one_in: int = 0,
+    ):
         """given self.street_actions, derive the current:
             - pot size
             - street
@@ -296,29 +492,207 @@ class PokerGameState:
         this method is idempotent, and can always be called
         to set these four helper state variables given
         the list of StreetAction objects
+
+        :param action_dicts: ([dict])
+        :param trusted: (bool) the actions were already validated
+            (e.g. when they were written to a hand history),
+            so only run the cheap checks in validate_trusted_action
+        :param validate_one_in: (int) when trusted, still fully
+            validate a random 1-in-N replays. 0 never does
         """
-        self.stacks = [s for s in self.starting_stacks]
+        self.seat_stacks = SeatArray.build(
+            self.num_players, self.starting_stacks
+        )
         self.pot = Pot(self.num_players, self.rake_fraction, self.max_rake)
-        self.last_actions = {}
+        self.seat_actions = SeatActions(self.num_players)
         self.payouts = {}
+        self.reset_betting_state()
         self.extract_antes_and_blinds()
         self.street = 0
         self.action = self.get_starting_action()
+        self.undo_log = []
+        self.redo_log = []
+        self.apply_action_dicts(
+            action_dicts, trusted=trusted, validate_one_in=validate_one_in
+        )
+
+    def apply_action_dicts(
+        self,
+        action_dicts,
+        trusted: bool = False,
+        validate_one_in: int = 0,
+    ):
+        """act out each action dict on top of the current state
+
+        :param action_dicts: ([dict])
+        :param trusted: (bool) see reset_state_from_action_dicts
+        :param validate_one_in: (int) see reset_state_from_action_dicts
+        """
+        if trusted and validate_one_in:
+            trusted = random.randrange(validate_one_in) != 0
+
+        self.trusted = trusted
+        try:
+            for action_dict in action_dicts:
+                self.act(**action_dict)
+        finally:
+            self.trusted = False
+
+    def copy(self):
+        """copy the state so either can act without affecting the other.
+            the deck, hands and config are never mutated, so they are
+            shared, and only the containers that act() mutates are copied.
 
-        for action_dict in action_dicts:
-            self.act(**action_dict)
+            the copy starts with empty undo/redo logs
+
+        :return: (PokerGameState)
+        """
+        clone = object.__new__(self.__class__)
+        for cls in self.__class__.__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(self, slot):
+                    setattr(clone, slot, getattr(self, slot))
+        if hasattr(self, "__dict__"):
+            clone.__dict__.update(self.__dict__)
+
+        clone.seat_stacks = self.seat_stacks.__copy__()
+        clone.pot = self.pot.copy()
+        clone.seat_actions = self.seat_actions.copy()
+        clone.boards = [[c for c in board] for board in self.boards]
+        clone.actions = [a for a in self.actions]
+        clone.all_in_players = {p for p in self.all_in_players}
+        clone.undo_log = []
+        clone.redo_log = []
+        return clone
 
     def act(self, *args, **kwargs):
         """create an action, update state and advance the game forward"""
+        self.redo_log = []
+        self.apply_and_log(*args, **kwargs)
+
+    def apply_and_log(self, *args, **kwargs):
+        """append action and advance the game,
+        logging what changed so that undo() can revert it
+        """
+        delta = self.action_delta()
         self.append_action(*args, **kwargs)
         self.advance_action()
+        self.undo_log.append(delta)
+
+    def action_delta(self) -> tuple:
+        """record everything the next action can change, in O(1):
+            only the acting player's chips and last action move,
+            and references to the containers that moving street
+            or finishing the hand replace rather than mutate
+
+        :return: (tuple)
+        """
+        player = self.action
+        if player is None:
+            if self.is_complete:
+                raise Exception(
+                    "cannot append_action after the hand is_complete"
+                )
+            raise ValueError("Cannot act when action is None")
+        return (
+            player,
+            self.seat_stacks[player],
+            self.pot.seat_balances[player],
+            self.seat_actions,
+            self.seat_actions.get(player),
+            self.street,
+            self.deck,
+            tuple((board, len(board)) for board in self.boards),
+            self.is_complete,
+            self.payouts,
+            self.rake_paid,
+            player in self.all_in_players,
+            (
+                self.max_balance,
+                self.second_balance,
+                self.max_balance_player,
+                self.num_folded,
+                self.num_live,
+                self.num_live_at_max,
+                self.num_checked,
+                self.num_to_act,
+                self.num_all_in_last_street,
+            ),
+        )
+
+    def undo(self) -> Action:
+        """revert the last act() in place
+
+        :return: (Action) the action that was taken back
+        """
+        if not self.undo_log:
+            raise ValueError("There are no actions to undo")
+        (
+            player,
+            stack,
+            balance,
+            last_actions,
+            last_action,
+            self.street,
+            self.deck,
+            boards,
+            self.is_complete,
+            self.payouts,
+            self.rake_paid,
+            was_all_in,
+            (
+                self.max_balance,
+                self.second_balance,
+                self.max_balance_player,
+                self.num_folded,
+                self.num_live,
+                self.num_live_at_max,
+                self.num_checked,
+                self.num_to_act,
+                self.num_all_in_last_street,
+            ),
+        ) = self.undo_log.pop()
+
+        self.action = player
+        self.seat_stacks[player] = stack
+        self.pot.seat_balances[player] = balance
+        if last_action is None:
+            last_actions.pop(player, None)
+        else:
+            last_actions[player] = last_action
+        self.seat_actions = last_actions
+        if not was_all_in:
+            self.all_in_players.discard(player)
+        for ii, (board, board_length) in enumerate(boards):
+            del board[board_length:]
+            self.boards[ii] = board
+
+        action = self.actions.pop()
+        self.redo_log.append(action)
+        return action
+
+    def redo(self) -> Action:
+        """re-apply the last action taken back by undo()
+
+        :return: (Action)
+        """
+        if not self.redo_log:
+            raise ValueError("There are no actions to redo")
+        action = self.redo_log.pop()
+        self.apply_and_log(
+            action.player, action.action, action.amount, **action.state
+        )
+        return action
 
     def append_action(self, *args, **kwargs):
         """build and append action to state"""
         if self.is_complete:
             raise Exception("cannot append_action after the hand is_complete")
         action_obj = self.build_action(*args, **kwargs)
-        self.validate_action(action_obj)
+        if self.trusted:
+            self.validate_trusted_action(action_obj)
+        else:
+            self.validate_action(action_obj)
         self.actions.append(action_obj)
         self.update_state_with_action(action_obj)
 
@@ -359,12 +733,12 @@ class PokerGameState:
                 f"so {action.action} is invalid"
             )
 
-        if self.stacks[action.player] < action.amount:
+        if self.seat_stacks[action.player] < action.amount:
             # this is prevented by the max_bet property,
             # but added here to make debugging easier
             raise Exception(
                 f"Player {action.player} only has "
-                f"{self.stacks[action.player]} in stack, "
+                f"{self.seat_stacks[action.player]} in stack, "
                 f"less than the desired wager of {action.amount}"
             )
 
@@ -384,6 +758,27 @@ class PokerGameState:
                     f"is greater than the limit of {self.max_bet}"
                 )
 
+    def validate_trusted_action(self, action):
+        """the minimal consistency checks to run
+            when replaying actions that were already validated:
+            it must be the player's turn, and they must have the chips
+
+        :param action: (Action)
+        """
+        if action.player != self.action:
+            raise Exception(
+                f"The calculated action is on {self.action}, but "
+                f"the next Action object comes from "
+                f"{action.player}"
+            )
+
+        if self.seat_stacks[action.player] < action.amount:
+            raise Exception(
+                f"Player {action.player} only has "
+                f"{self.seat_stacks[action.player]} in stack, "
+                f"less than the desired wager of {action.amount}"
+            )
+
     @property
     def valid_actions(self):
         """
@@ -399,10 +794,28 @@ class PokerGameState:
         :param action: (Action)
         :return:
         """
+        last_action = self.seat_actions.get(action.player)
         if action.action in Action.wagers:
             self.put_money_in_pot(player=action.player, amount=action.amount)
 
-        self.last_actions[action.player] = action.action
+        if last_action is None:
+            if self.is_all_in(action.player):
+                self.num_all_in_last_street -= 1
+            else:
+                self.num_to_act -= 1
+        elif last_action == Action.action_check:
+            self.num_checked -= 1
+
+        if action.action == Action.action_check:
+            self.num_checked += 1
+        elif action.action == Action.action_fold:
+            self.num_folded += 1
+            if not self.is_all_in(action.player):
+                self.num_live -= 1
+                if self.pot.seat_balances[action.player] == self.max_balance:
+                    self.num_live_at_max -= 1
+
+        self.seat_actions[action.player] = action.action
 
     def advance_action(self):
         """move action forward and check if hand is over"""
@@ -429,10 +842,10 @@ class PokerGameState:
         players_at_showdown = [
             player
             for player in range(self.num_players)
-            if self.last_actions.get(player) != Action.action_fold
+            if self.seat_actions.get(player) != Action.action_fold
         ]
         if len(players_at_showdown) < 2:
-            return self.pot.settle_showdown(
+            return self.pot.copy().settle_showdown(
                 winning_players=[players_at_showdown],
                 rake_pot=self.should_rake_pot(),
             )
@@ -446,12 +859,7 @@ class PokerGameState:
         avg_payouts = {p: 0.0 for p in range(self.num_players)}
         avg_rake = {p: 0.0 for p in range(self.num_players)}
         for _ in range(num_runouts):
-            pot = Pot(
-                num_players=self.num_players,
-                balances={p: bal for p, bal in self.pot.balances.items()},
-                rake_fraction=self.rake_fraction,
-                max_rake=self.max_rake,
-            )
+            pot = self.pot.copy()
             self.runout_all_in_board(cards_remaining)
             winners = self.order_hands(players_at_showdown)
             runout_payouts, rake_paid = pot.settle_showdown(
@@ -471,7 +879,7 @@ class PokerGameState:
         """
         return bool(
             self.is_all_in(player)
-            or self.last_actions.get(player) == Action.action_fold
+            or self.seat_actions.get(player) == Action.action_fold
         )
 
     def mod_n(self, player):
@@ -506,11 +914,8 @@ class PokerGameState:
         everyone who hasn't folded
         """
         self.street += 1
-        self.last_actions = {  # type: ignore
-            player: Action.action_fold
-            for player, action in self.last_actions.items()
-            if action == Action.action_fold
-        }
+        self.seat_actions = self.seat_actions.folds()
+        self.reset_street_counters()
 
         if self.is_action_closed():
             self.action = None
@@ -530,12 +935,36 @@ class PokerGameState:
 
         :return: (bool)
         """
-        return is_action_closed(
-            num_players=self.num_players,
-            last_actions=self.last_actions,
-            pot_balances=self.pot.balances,
-            stacks=self.stacks,
-        )
+        if self.num_live_at_max != self.num_live:
+            # someone who is not all in and has not folded
+            # has put in less than the biggest balance in the pot
+            return False
+
+        if self.num_folded == self.num_players - 1:
+            # Case 1: everyone folds except 1 person
+            return True
+
+        if (
+            self.num_folded + self.num_all_in_last_street
+            == self.num_players - 1
+        ):
+            # Case 2: if everyone is all in except one person,
+            # then everyone else must have either
+            # folded or been all in last street
+            return True
+
+        if (
+            self.num_folded + self.num_checked + self.num_all_in_last_street
+            == self.num_players
+        ):
+            # Case 3: no one this street has made any bets,
+            # and everyone had either folded or went all on a previous street,
+            # or checked on this street
+            return True
+
+        # Case 4:
+        # Everyone must have acted and not checked
+        return self.num_to_act == 0
 
     def should_rake_pot(self) -> bool:
         raise NotImplementedError(
@@ -550,9 +979,9 @@ class PokerGameState:
         if self.action is None:
             raise ValueError("Cannot get amount to call when action is None")
         max_owed_to_pot = (
-            max(self.pot.balances.values()) - self.pot.balances[self.action]
+            self.max_balance - self.pot.seat_balances[self.action]
         )
-        stack_size = self.stacks[self.action]
+        stack_size = self.seat_stacks[self.action]
         return min(stack_size, max_owed_to_pot)
 
     @property
@@ -565,17 +994,15 @@ class PokerGameState:
         """
         if self.action is None:
             raise ValueError("Cannot get min bet when action is None")
-        biggest_blind = max([self.ante, *self.blinds])
-        sorted_pot_balances = sorted(self.pot.balances.values(), reverse=True)
         if self.amount_to_call == 0:
-            return biggest_blind
+            return self.biggest_blind
         # if amount to call is 0, then this will be zero too
         last_raise_delta = max(
-            sorted_pot_balances[0] - sorted_pot_balances[1], biggest_blind
+            self.max_balance - self.second_balance, self.biggest_blind
         )
 
         min_bet = last_raise_delta + self.amount_to_call
-        stack_size = self.stacks[self.action]
+        stack_size = self.seat_stacks[self.action]
         return min(min_bet, stack_size)
 
     @property
@@ -585,7 +1012,7 @@ class PokerGameState:
         """
         if self.action is None:
             raise ValueError("Cannot get max bet when action is None")
-        return self.stacks[self.action]
+        return self.seat_stacks[self.action]
 
     def player_pnl(self, player):
         """
@@ -594,7 +1021,7 @@ class PokerGameState:
         """
         return (
             self.payouts.get(player, 0)
-            + self.stacks[player]
+            + self.seat_stacks[player]
             - self.starting_stacks[player]
         )
 
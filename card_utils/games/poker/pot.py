@@ -1,33 +1,62 @@
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
+from card_utils.games.poker.seats import SeatArray
 from card_utils.util import inverse_cumulative_sum
 
 
 class Pot:
     """class to handle side-pot logic"""
 
+    __slots__ = ("num_players", "seat_balances", "rake_fraction", "max_rake")
+
     def __init__(
         self,
         num_players: int,
         rake_fraction: float,
         max_rake: int,
-        balances: Optional[Dict[int, int]] = None,
+        balances: Optional[Union[Dict[int, int], SeatArray]] = None,
     ):
         """
         :param num_players: (int)
         :param balances: ({int: int})
         """
         self.num_players = num_players
-        self.balances = balances or {p: 0 for p in range(num_players)}
+        self.seat_balances = SeatArray.build(num_players, balances)
         self.rake_fraction = rake_fraction
         self.max_rake = max_rake
 
+    def copy(self):
+        """
+        :return: (Pot) with its own copy of the balances
+        """
+        return Pot(
+            num_players=self.num_players,
+            rake_fraction=self.rake_fraction,
+            max_rake=self.max_rake,
+            balances=self.seat_balances,
+        )
+
+    @property
+    def balances(self) -> Dict[int, int]:
+        """a copy of seat_balances, which is what play updates in place
+
+        :return: ({int: int})
+        """
+        return self.seat_balances.to_dict()
+
+    @balances.setter
+    def balances(self, balances: Dict[int, int]):
+        """
+        :param balances: ({int: int})
+        """
+        self.seat_balances = SeatArray.build(self.num_players, balances)
+
     def put_money_in(self, player, amount):
         """
         :param player: (int) index
         :param amount: (int) chips
         """
-        self.balances[player] += amount
+        self.seat_balances[player] += amount
 
     def settle_showdown(
         self, winning_players: List[List[int]], rake_pot: bool
@@ -40,7 +69,7 @@ class Pot:
         payouts = {p: 0.0 for p in range(self.num_players)}
         rake_per_player = self.get_rake_per_player(rake_pot)
         for player, rake_paid in rake_per_player.items():
-            self.balances[player] -= rake_paid
+            self.seat_balances[player] -= rake_paid
 
         for winner_tier in winning_players:
             # go over each tier of winners
@@ -52,13 +81,13 @@ class Pot:
                 players_chopping = [
                     winner
                     for winner in winner_tier
-                    if self.balances[winner] >= inc_amt
+                    if self.seat_balances[winner] >= inc_amt
                 ]
                 # each player chops up as much as they can win from
                 # the balance of all players (including themselves)
                 money_per_winner = sum(
                     min(money_left, inc_amt) / len(players_chopping)
-                    for money_left in self.balances.values()
+                    for money_left in self.seat_balances.values()
                 )
                 for winner in players_chopping:
                     # apply payouts to everyone in this hand/amount tier
@@ -67,7 +96,9 @@ class Pot:
                     # and deduct balances from all players,
                     # who each paid out at most inc_amount
                     # to the winners in this tier
-                    self.balances[p] = max(0, self.balances[p] - inc_amt)
+                    self.seat_balances[p] = max(
+                        0, self.seat_balances[p] - inc_amt
+                    )
 
             if self.total_money == 0:
                 # we can terminate when there's no money left
@@ -85,14 +116,14 @@ class Pot:
 
         :return: (int)
         """
-        return sum(self.balances.values())
+        return sum(self.seat_balances.values())
 
     def get_incremental_amounts(self, players):
         """
         :param players: ([int])
         :return: ([int])
         """
-        cumulative_amounts = sorted(self.balances[p] for p in players)
+        cumulative_amounts = sorted(self.seat_balances[p] for p in players)
         return inverse_cumulative_sum(cumulative_amounts)
 
     def get_max_total_rake(self):
@@ -103,12 +134,12 @@ class Pot:
         if not rake_pot:
             return rake_per_player
         max_total_rake = self.get_max_total_rake()
-        balance_levels = sorted(set(self.balances.values()))
+        balance_levels = sorted(set(self.seat_balances.values()))
         balance_diffs = inverse_cumulative_sum(balance_levels)
         for level, diff in zip(balance_levels, balance_diffs):
             players_at_level = {
                 player_id
-                for player_id, b in self.balances.items()
+                for player_id, b in self.seat_balances.items()
                 if b >= level
             }
             total_rake_left = max_total_rake - sum(rake_per_player.values())
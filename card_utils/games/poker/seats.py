@@ -0,0 +1,230 @@
+""" compact per-seat containers for poker game state """
+
+from array import array
+from collections.abc import MutableMapping
+from typing import Dict, List, Mapping, Optional, Sequence, Union
+
+from card_utils.games.poker.action import Action
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError(
+        "per-seat values cannot be changed in place: "
+        "assign a new list or dict to the attribute instead"
+    )
+
+
+class SeatList(list):
+    """a plain-list copy of per-seat values, as the public stacks,
+        so it serializes and concatenates like the list it replaces.
+        it is not the state's own storage, so changing it raises
+    """
+
+    __slots__ = ()
+
+    append = extend = insert = pop = remove = clear = _read_only
+    sort = reverse = _read_only  # type: ignore
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+
+    def copy(self) -> List:  # type: ignore
+        """
+        :return: ([]) a list that can be changed
+        """
+        return list(self)
+
+    def __reduce__(self):
+        return SeatList, (list(self),)
+
+
+class SeatDict(dict):
+    """a plain-dict copy of per-seat values, as the public pot balances
+        and last actions, so it serializes like the dict it replaces.
+        it is not the state's own storage, so changing it raises
+    """
+
+    __slots__ = ()
+
+    pop = popitem = clear = update = setdefault = _read_only  # type: ignore
+    __setitem__ = __delitem__ = __ior__ = _read_only  # type: ignore
+
+    def copy(self) -> Dict:  # type: ignore
+        """
+        :return: ({}) a dict that can be changed
+        """
+        return dict(self)
+
+    def __reduce__(self):
+        return SeatDict, (dict(self),)
+
+
+class SeatArray(array):
+    """fixed-size array of chip counts, one per seat at the table,
+    that can also be read like the {player: int} dicts and
+    [int] lists it replaces
+
+    whole chips are stored as integers, unless any amount is a float,
+    in which case they are all stored as doubles
+    """
+
+    __slots__ = ()
+
+    int_typecode = "q"
+    float_typecode = "d"
+
+    @classmethod
+    def build(
+        cls,
+        num_players: int,
+        values: Optional[Union[Sequence[float], Mapping[int, float]]] = None,
+    ) -> "SeatArray":
+        """
+        :param num_players: (int)
+        :param values: ([int] or {int: int}) seats left out are 0
+        :return: (SeatArray)
+        """
+        seat_values: List[float] = [0] * num_players
+        if isinstance(values, dict):
+            for player, value in values.items():
+                seat_values[player] = value
+        elif values is not None:
+            seat_values = list(values)
+            if len(seat_values) != num_players:
+                raise ValueError(
+                    f"SeatArray: expected {num_players} values, "
+                    f"received {len(seat_values)}"
+                )
+        typecode = (
+            cls.int_typecode
+            if all(isinstance(v, int) for v in seat_values)
+            else cls.float_typecode
+        )
+        return cls(typecode, seat_values)
+
+    def to_list(self) -> SeatList:
+        """
+        :return: (SeatList) read-only list of each seat's value
+        """
+        return SeatList(self)
+
+    def to_dict(self) -> SeatDict:
+        """
+        :return: (SeatDict) read-only {player: value}
+        """
+        return SeatDict(enumerate(self))
+
+    def widened(self) -> "SeatArray":
+        """
+        :return: (SeatArray) a copy that can hold fractional chips too
+        """
+        return type(self)(self.float_typecode, self)
+
+    def keys(self):
+        return range(len(self))
+
+    def values(self):
+        return iter(self)
+
+    def items(self):
+        return enumerate(self)
+
+    def get(self, player, default=None):
+        if 0 <= player < len(self):
+            return self[player]
+        return default
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return dict(self.items()) == other
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return array.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None  # type: ignore
+
+    def __copy__(self):
+        return type(self)(self.typecode, self)
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+
+class SeatActions(MutableMapping):
+    """each player's last action on the current street,
+        plus folds from earlier streets, stored as one byte per seat
+
+        reads and writes like the {player: str} dict it replaces,
+        where 0 means the player has not acted,
+        otherwise it is 1 + the Action.codes value
+    """
+
+    __slots__ = ("codes",)
+
+    def __init__(
+        self,
+        num_players: int,
+        last_actions: Optional[Mapping[int, str]] = None,
+    ):
+        """
+        :param num_players: (int)
+        :param last_actions: ({int: str})
+        """
+        self.codes = bytearray(num_players)
+        for player, action in (last_actions or {}).items():
+            self[player] = action
+
+    def __getitem__(self, player):
+        code = self.codes[player] if 0 <= player < len(self.codes) else 0
+        if not code:
+            raise KeyError(player)
+        return Action.names[code - 1]
+
+    def get(self, player, default=None):
+        if 0 <= player < len(self.codes) and self.codes[player]:
+            return Action.names[self.codes[player] - 1]
+        return default
+
+    def __setitem__(self, player, action):
+        self.codes[player] = Action.codes[action] + 1
+
+    def __delitem__(self, player):
+        if not self.codes[player]:
+            raise KeyError(player)
+        self.codes[player] = 0
+
+    def __iter__(self):
+        return (p for p, code in enumerate(self.codes) if code)
+
+    def __len__(self):
+        return len(self.codes) - self.codes.count(0)
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def to_dict(self) -> SeatDict:
+        """
+        :return: (SeatDict) read-only {player: str}
+        """
+        return SeatDict(self.items())
+
+    def copy(self) -> "SeatActions":
+        """
+        :return: (SeatActions)
+        """
+        clone = SeatActions(0)
+        clone.codes = bytearray(self.codes)
+        return clone
+
+    def folds(self) -> "SeatActions":
+        """
+        :return: (SeatActions) a new object with only the folds kept
+        """
+        fold_code = Action.codes[Action.action_fold] + 1
+        folds = SeatActions(0)
+        folds.codes = bytearray(
+            code if code == fold_code else 0 for code in self.codes
+        )
+        return folds
+
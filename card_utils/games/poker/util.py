@@ -1,9 +1,10 @@
-from typing import Dict, List
+from typing import Dict, Mapping, Sequence, Union
 
 from card_utils.deck.utils import random_deck
 from card_utils.games.poker import inverse_hand_order
 from card_utils.games.poker.action import Action
 from card_utils.games.poker.pot import Pot
+from card_utils.games.poker.seats import SeatArray
 
 
 def pretty_hand_rank(hand_rank_tuple):
@@ -50,9 +51,9 @@ def deal_random_hands(n_hands, n_cards):
 
 def is_action_closed(
     num_players: int,
-    last_actions: Dict[int, Action],
-    pot_balances: Dict[int, int],
-    stacks: List[int],
+    last_actions: Mapping[int, str],
+    pot_balances: Union[Dict[int, int], SeatArray],
+    stacks: Sequence[int],
 ) -> bool:
     """
     :param num_players: (int)
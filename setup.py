@@ -20,6 +20,7 @@ setup(
         "card_games": ["*.pyi"],
     },
     install_requires=[],
+    extras_require={"numpy": ["numpy"]},
     ext_modules=ext_modules,
     cmdclass={"build_ext": build_ext},
 )
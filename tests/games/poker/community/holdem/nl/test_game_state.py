@@ -1,9 +1,10 @@
 import unittest
+from typing import Any, Dict
 
 from card_utils.deck import cards as DECK_CARDS
 from card_utils.games.poker.action import Action
 from card_utils.games.poker.community.holdem.nl.game_state import NLHEGameState
-from card_utils.games.poker.util import deal_random_hands
+from card_utils.games.poker.util import deal_random_hands, is_action_closed
 
 
 class NLHEGameStateTestCase(unittest.TestCase):
@@ -238,3 +239,107 @@ class NLHEGameStateTestCase(unittest.TestCase):
 
         self._assert_equal_payouts(
             payouts=nlhe.payouts, expected_payouts={3: 426})
+
+    def test_trusted_replay(self):
+        """ trusted replay matches a fully validated replay """
+        actions = [
+            {"player": 2, "action": Action.action_raise, "amount": 7},
+            {"player": 0, "action": Action.action_call, "amount": 6},
+            {"player": 1, "action": Action.action_fold},
+            {"player": 0, "action": Action.action_check},
+            {"player": 2, "action": Action.action_bet, "amount": 10},
+            {"player": 0, "action": Action.action_fold},
+        ]
+        deck, hands = deal_random_hands(n_hands=3, n_cards=2)
+        validated = self._create_fixed_setup(
+            num_players=3, deck=list(deck), hands=hands, actions=actions
+        )
+        trusted = NLHEGameState.from_action_dicts(
+            num_players=3,
+            deck=list(deck),
+            hands=hands,
+            starting_stacks=[200, 200, 200],
+            blinds=[1, 2],
+            action_dicts=actions,
+            trusted=True,
+        )
+        self.assertFalse(trusted.trusted)
+        self.assertTrue(trusted.is_complete)
+        self._assert_equal_payouts(trusted.payouts, validated.payouts)
+        self.assertEqual(trusted.stacks, validated.stacks)
+
+    def test_fractional_stacks(self):
+        """ stacks and bets can be fractional chips, as with plain lists """
+        nlhe = self._create_random_setup(
+            num_players=2, starting_stacks=[100.5, 100]
+        )
+        nlhe.act(1, Action.action_raise, 10.5)
+        self.assertEqual(nlhe.stacks, [98.5, 88.5])
+        self.assertEqual(nlhe.pot.balances, {0: 2, 1: 11.5})
+        nlhe.undo()
+        self.assertEqual(nlhe.stacks, [98.5, 99])
+
+    def test_trusted_replay_minimal_checks(self):
+        """ trusted replay skips sizing checks, but not turn order """
+        deck, hands = deal_random_hands(n_hands=3, n_cards=2)
+        kwargs: Dict[str, Any] = dict(
+            num_players=3,
+            deck=deck,
+            hands=hands,
+            starting_stacks=[200, 200, 200],
+            blinds=[1, 2],
+            trusted=True,
+        )
+        # a raise of 1 is below the min raise
+        under_raise = [
+            {"player": 2, "action": Action.action_raise, "amount": 1}
+        ]
+        nlhe = NLHEGameState.from_action_dicts(
+            action_dicts=under_raise, **kwargs
+        )
+        self.assertEqual(nlhe.stacks[2], 199)
+
+        with self.assertRaises(ValueError):
+            NLHEGameState.from_action_dicts(
+                action_dicts=under_raise, validate_one_in=1, **kwargs
+            )
+
+        out_of_turn = [{"player": 0, "action": Action.action_fold}]
+        with self.assertRaises(Exception):
+            NLHEGameState.from_action_dicts(action_dicts=out_of_turn, **kwargs)
+
+    def test_incremental_betting_state(self):
+        """ tracked betting state agrees with recomputing it from scratch,
+            including a big blind who is all in from posting
+        """
+        nlhe = self._create_random_setup(
+            num_players=4, starting_stacks=[200, 2, 200, 50]
+        )
+        actions = [
+            (2, Action.action_raise, 8),
+            (3, Action.action_raise, 50),
+            (0, Action.action_call, None),
+            (2, Action.action_call, None),
+            (0, Action.action_check, None),
+            (2, Action.action_bet, 20),
+            (0, Action.action_raise, 60),
+            (2, Action.action_fold, None),
+        ]
+        for player, action, amount in actions:
+            nlhe.act(player, action, amount)
+            self.assertEqual(
+                nlhe.is_action_closed(),
+                is_action_closed(
+                    num_players=nlhe.num_players,
+                    last_actions=nlhe.last_actions,
+                    pot_balances=nlhe.pot.balances,
+                    stacks=nlhe.stacks,
+                ),
+            )
+            if nlhe.action is not None:
+                balances = sorted(nlhe.pot.balances.values(), reverse=True)
+                self.assertEqual(nlhe.max_balance, balances[0])
+                self.assertEqual(nlhe.second_balance, balances[1])
+
+        self.assertEqual(nlhe.all_in_players, {1, 3})
+        self.assertTrue(nlhe.is_complete)
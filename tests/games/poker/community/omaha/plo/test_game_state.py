@@ -314,3 +314,43 @@ class PLOGameStateTestCase(unittest.TestCase):
 
         self._assert_equal_payouts(
             payouts=plo.payouts, expected_payouts={3: 426})
+
+    def test_undo_redo(self):
+        """ undo steps back across streets and the end of the hand,
+            and redo replays the undone actions
+        """
+        plo = self._create_random_setup(num_players=3)
+        plo.act(2, Action.action_raise, amount=plo.max_bet)
+        plo.act(0, Action.action_call)
+        plo.act(1, Action.action_call)
+        self.assertEqual(plo.street, 1)
+        self.assertEqual(len(plo.board), 3)
+        stacks = list(plo.stacks)
+
+        plo.act(0, Action.action_check)
+        plo.act(1, Action.action_bet, amount=10)
+        plo.act(2, Action.action_fold)
+        plo.act(0, Action.action_fold)
+        self.assertTrue(plo.is_complete)
+        self._assert_equal_payouts(plo.payouts, {1: 31})
+
+        for _ in range(4):
+            plo.undo()
+        self.assertFalse(plo.is_complete)
+        self.assertEqual(plo.stacks, stacks)
+        self.assertEqual(plo.action, 0)
+        self.assertEqual(plo.pot.total_money, 21)
+
+        # undo back past the flop being dealt
+        undone = plo.undo()
+        self.assertEqual(undone.player, 1)
+        self.assertEqual(plo.street, 0)
+        self.assertEqual(plo.board, [])
+        self.assertEqual(plo.amount_to_call, 5)
+
+        for _ in range(5):
+            plo.redo()
+        self.assertTrue(plo.is_complete)
+        self._assert_equal_payouts(plo.payouts, {1: 31})
+        with self.assertRaises(ValueError):
+            plo.redo()
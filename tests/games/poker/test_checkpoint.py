@@ -0,0 +1,88 @@
+import unittest
+from typing import Any, Dict
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.games.poker.action import Action
+from card_utils.games.poker.checkpoint import CheckpointCache
+from card_utils.games.poker.community.holdem.nl.game_state import NLHEGameState
+
+
+class CheckpointCacheTestCase(unittest.TestCase):
+    """ Test rebuilding game states from cached action prefixes """
+
+    hands = [["As", "Ks"], ["2c", "2d"], ["7h", "8h"]]
+    actions = [
+        {"player": 2, "action": Action.action_raise, "amount": 6},
+        {"player": 0, "action": Action.action_call},
+        {"player": 1, "action": Action.action_call},
+        {"player": 0, "action": Action.action_check},
+        {"player": 1, "action": Action.action_bet, "amount": 10},
+        {"player": 2, "action": Action.action_fold},
+        {"player": 0, "action": Action.action_fold},
+    ]
+
+    def _config(self) -> Dict[str, Any]:
+        """
+        :return: (dict) fresh from_action_dicts kwargs
+        """
+        return dict(
+            num_players=3,
+            deck=[
+                c for c in DECK_CARDS if not any(c in h for h in self.hands)
+            ],
+            hands=self.hands,
+            starting_stacks=[200, 200, 200],
+            blinds=[1, 2],
+        )
+
+    def test_resume_from_longest_prefix(self):
+        """ each request shares all but the last action with the one before """
+        cache = CheckpointCache()
+        for n_actions in range(len(self.actions) + 1):
+            action_dicts = self.actions[:n_actions]
+            cached = cache.from_action_dicts(
+                NLHEGameState, action_dicts, **self._config()
+            )
+            expected = NLHEGameState.from_action_dicts(
+                action_dicts=action_dicts, **self._config()
+            )
+            self.assertEqual(cached.stacks, expected.stacks)
+            self.assertEqual(cached.pot.balances, expected.pot.balances)
+            self.assertEqual(cached.boards, expected.boards)
+            self.assertEqual(cached.action, expected.action)
+            self.assertEqual(cached.payouts, expected.payouts)
+
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hits, len(self.actions))
+        self.assertEqual(cache.actions_replayed, len(self.actions))
+
+    def test_returned_states_are_independent(self):
+        """ mutating a returned state does not touch the checkpoint """
+        cache = CheckpointCache()
+        first = cache.from_action_dicts(
+            NLHEGameState, self.actions[:3], **self._config()
+        )
+        first.act(0, Action.action_bet, 50)
+
+        second = cache.from_action_dicts(
+            NLHEGameState, self.actions[:3], **self._config()
+        )
+        self.assertEqual(second.stacks, [194, 194, 194])
+        self.assertEqual(second.action, 0)
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_lru_eviction(self):
+        """ the budget evicts the least recently used checkpoints """
+        cache = CheckpointCache(max_bytes=1)
+        for n_actions in range(1, 4):
+            cache.from_action_dicts(
+                NLHEGameState, self.actions[:n_actions], **self._config()
+            )
+        self.assertEqual(cache.stats["checkpoints"], 1)
+        self.assertEqual(cache.evictions, 2)
+
+        # only the longest prefix is left, so a shorter one misses
+        cache.from_action_dicts(
+            NLHEGameState, self.actions[:1], **self._config()
+        )
+        self.assertEqual(cache.misses, 2)
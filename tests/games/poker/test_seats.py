@@ -0,0 +1,142 @@
+import copy
+import json
+import unittest
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.games.poker.action import Action
+from card_utils.games.poker.community.holdem.nl.game_state import NLHEGameState
+from card_utils.games.poker.seats import SeatActions, SeatArray
+
+
+class SeatsTestCase(unittest.TestCase):
+    """ Test the compact per-seat containers read like dicts and lists """
+
+    def test_seat_array(self):
+        """ built from a list or a dict, and compares equal to both """
+        stacks = SeatArray.build(3, [200, 150, 0])
+        self.assertEqual(stacks, [200, 150, 0])
+        self.assertEqual(stacks, {0: 200, 1: 150, 2: 0})
+        self.assertEqual(dict(stacks.items()), {0: 200, 1: 150, 2: 0})
+
+        balances = SeatArray.build(3, {1: 2})
+        self.assertEqual(list(balances.values()), [0, 2, 0])
+
+        clone = copy.deepcopy(balances)
+        clone[0] += 5
+        self.assertIsInstance(clone, SeatArray)
+        self.assertEqual(balances[0], 0)
+
+        with self.assertRaises(ValueError):
+            SeatArray.build(3, [1, 2])
+
+    def test_fractional_chips(self):
+        """ any float stores every seat as a float, as a list would """
+        stacks = SeatArray.build(2, [100.5, 100])
+        self.assertEqual(stacks, [100.5, 100])
+        stacks[1] -= 0.25
+        self.assertEqual(copy.copy(stacks)[1], 99.75)
+
+        whole = SeatArray.build(2, [100, 100])
+        self.assertIsInstance(whole[0], int)
+        widened = whole.widened()
+        widened[0] -= 0.5
+        self.assertEqual((widened[0], whole[0]), (99.5, 100))
+
+    def test_seat_actions(self):
+        """ last actions read and write like a {player: str} dict """
+        last_actions = SeatActions(4, {1: Action.action_fold})
+        last_actions[2] = Action.action_raise
+        last_actions[3] = Action.action_check
+
+        self.assertEqual(last_actions.get(0), None)
+        self.assertEqual(last_actions.get(4, "none"), "none")
+        self.assertNotIn(4, last_actions)
+        self.assertEqual(last_actions[2], Action.action_raise)
+        self.assertEqual(
+            last_actions,
+            {1: Action.action_fold, 2: Action.action_raise, 3: "CHECK"},
+        )
+        self.assertEqual(last_actions.folds(), {1: Action.action_fold})
+
+        self.assertEqual(last_actions.pop(3), Action.action_check)
+        self.assertNotIn(3, last_actions)
+        self.assertEqual(len(last_actions), 2)
+
+    def test_action_codes(self):
+        """ actions store a small-int code, but read as strings """
+        action = Action(player=0, action=Action.action_raise, amount=6)
+        self.assertEqual(action.action, Action.action_raise)
+        self.assertEqual(Action.names[action.code], Action.action_raise)
+        self.assertEqual(vars(action), {})
+        self.assertEqual(action.state, {})
+
+        action.state = {"street": 1}
+        self.assertEqual(action.state, {"street": 1})
+        setattr(action, "note", "tank")
+        self.assertEqual(vars(action), {"note": "tank"})
+
+    def _game_state(self) -> NLHEGameState:
+        """
+        :return: (NLHEGameState) 3 handed, after a raise and a fold
+        """
+        hands = [["As", "Ks"], ["2c", "2d"], ["7h", "8h"]]
+        return NLHEGameState.from_action_dicts(
+            num_players=3,
+            deck=[c for c in DECK_CARDS if not any(c in h for h in hands)],
+            hands=hands,
+            starting_stacks=[200, 200, 200],
+            blinds=[1, 2],
+            action_dicts=[
+                {"player": 2, "action": Action.action_raise, "amount": 6},
+                {"player": 0, "action": Action.action_fold},
+            ],
+        )
+
+    def test_public_fields(self):
+        """ stacks, balances and last actions are plain lists and dicts """
+        game_state = self._game_state()
+        self.assertEqual(
+            json.loads(json.dumps(game_state.stacks)), [199, 198, 194]
+        )
+        self.assertEqual(game_state.stacks + [100], [199, 198, 194, 100])
+        self.assertEqual(
+            json.loads(json.dumps(game_state.pot.balances)),
+            {"0": 1, "1": 2, "2": 6},
+        )
+        self.assertEqual(
+            json.loads(json.dumps(game_state.last_actions)),
+            {"0": Action.action_fold, "2": Action.action_raise},
+        )
+
+    def test_public_fields_are_copies(self):
+        """ changing a copy in place fails loudly, assigning replaces """
+        game_state = self._game_state()
+        with self.assertRaises(TypeError):
+            game_state.stacks[0] = 0
+        with self.assertRaises(TypeError):
+            game_state.pot.balances[0] = 0
+        with self.assertRaises(TypeError):
+            game_state.last_actions.pop(0)
+
+        stacks = game_state.stacks.copy()
+        stacks[0] = 50
+        self.assertEqual(game_state.stacks[0], 199)
+        self.assertEqual(
+            copy.deepcopy(game_state.last_actions),
+            {0: Action.action_fold, 2: Action.action_raise},
+        )
+
+        game_state.stacks = [50, 198, 194]
+        game_state.pot.balances = {0: 1, 2: 6}
+        game_state.last_actions = {2: Action.action_raise}
+        self.assertEqual(game_state.seat_stacks, [50, 198, 194])
+        self.assertEqual(game_state.pot.seat_balances, [1, 0, 6])
+        self.assertEqual(game_state.seat_actions, {2: Action.action_raise})
+
+    def test_extra_attributes(self):
+        """ callers can hang their own attributes off a game state """
+        game_state = self._game_state()
+        self.assertEqual(vars(game_state), {})
+        setattr(game_state, "table_id", 7)
+        self.assertEqual(vars(game_state), {"table_id": 7})
+        self.assertEqual(getattr(game_state.copy(), "table_id"), 7)
@@ -0,0 +1,206 @@
+import os
+import random
+import unittest
+from unittest import mock
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.games.gin import backends
+from card_utils.games.gin.rummy.game_state import GinRummyGameState
+from card_utils.games.gin.rummy.utils import split_melds
+from card_utils.games.gin.simulate import deal_game
+
+
+def _off_by_one_backend():
+    """ a backend that always gets the deadwood wrong """
+    python = backends.load_backend("python")
+    assert python is not None
+
+    def split(hand, melds=None):
+        deadwood, melds, unmelded = python.split_melds(hand, melds)
+        return deadwood + 1, melds, unmelded
+
+    return backends.MeldBackend(
+        "off_by_one",
+        split_melds=split,
+        get_deadwood=python.get_deadwood,
+        layoff_deadwood=python.layoff_deadwood,
+    )
+
+
+def _ace_low(card):
+    """ gin order: by rank, aces low, then by suit """
+    return "A23456789TJQK".index(card[0]), "cdhs".index(card[1])
+
+
+def _canonical_split(split):
+    """ a split with its melds and cards in one order, to compare """
+    deadwood, melds, unmelded = split
+    return deadwood, sorted(map(sorted, melds)), sorted(unmelded)
+
+
+class BackendsTestCase(unittest.TestCase):
+    """ Test choosing and checking gin meld backends """
+
+    hand = ["Ac", "2c", "3c", "7d", "7h", "7s", "9d", "Tc", "Kh", "Qs"]
+
+    def tearDown(self):
+        backends._loaders.pop("off_by_one", None)
+        backends._loaded.pop("off_by_one", None)
+        with mock.patch.dict(os.environ, clear=True):
+            backends.use_backend()
+
+    def test_default_backend(self):
+        """ the first backend that loads, which is python without a build """
+        with mock.patch.dict(os.environ, clear=True):
+            backend = backends.use_backend()
+        self.assertEqual(backend.name, backends.available_backends()[0])
+        self.assertIn("python", backends.available_backends())
+        self.assertEqual(
+            GinRummyGameState.get_deadwood(self.hand),
+            split_melds(self.hand)[0],
+        )
+
+    def test_env_override(self):
+        """ the environment picks the backend, unless code does """
+        backends.register_backend("off_by_one", _off_by_one_backend)
+        with mock.patch.dict(
+            os.environ, {backends.BACKEND_ENV_VAR: "off_by_one"}
+        ):
+            self.assertEqual(backends.use_backend().name, "off_by_one")
+            self.assertEqual(backends.use_backend("python").name, "python")
+        with self.assertRaises(ValueError):
+            backends.use_backend("magic")
+
+    def test_register_first(self):
+        """ a backend registered first is the default """
+        backends.register_backend("off_by_one", _off_by_one_backend, True)
+        with mock.patch.dict(os.environ, clear=True):
+            self.assertEqual(backends.use_backend().name, "off_by_one")
+        self.assertEqual(
+            GinRummyGameState.get_deadwood(self.hand),
+            split_melds(self.hand)[0] + 1,
+        )
+
+    def test_parity_checker(self):
+        """ sampled calls are checked against python """
+        backends.register_backend("off_by_one", _off_by_one_backend)
+        backends.use_backend("off_by_one", parity_rate=1.0)
+        with self.assertLogs(backends.logger, "WARNING"):
+            backends.split_melds(self.hand)
+        checker = backends.parity_checker
+        assert checker is not None
+        self.assertEqual(checker.stats["mismatches"], 1)
+
+        backends.use_backend("off_by_one", parity_rate=1.0, strict=True)
+        with self.assertRaises(AssertionError):
+            backends.split_melds(self.hand)
+
+        backends.use_backend("off_by_one", parity_rate=0.0)
+        self.assertIsNone(backends.parity_checker)
+        with mock.patch.dict(os.environ, {backends.PARITY_ENV_VAR: "0.5"}):
+            backends.use_backend("off_by_one")
+        for _ in range(200):
+            backends.split_melds(self.hand)
+        checker = backends.parity_checker
+        assert checker is not None
+        self.assertTrue(50 < checker.checks < 150)
+
+    def test_parity_checker_threads(self):
+        """ every sampled call from split_melds_many's threads is counted """
+        backends.register_backend("off_by_one", _off_by_one_backend)
+        backends.use_backend("off_by_one", parity_rate=1.0)
+        hands = [
+            deal_game(GinRummyGameState, seed=seed).p1_hand
+            for seed in range(100)
+        ]
+        with self.assertLogs(backends.logger, "WARNING"):
+            backends.split_melds_many(hands, max_workers=4, chunk_size=7)
+        checker = backends.parity_checker
+        assert checker is not None
+        self.assertEqual(checker.stats["checks"], len(hands))
+        self.assertEqual(checker.stats["mismatches"], len(hands))
+
+    def test_split_melds_many(self):
+        """ threads give the same splits, in the same order """
+        hands = [
+            deal_game(GinRummyGameState, seed=seed).p1_hand
+            for seed in range(100)
+        ]
+        for max_workers in [1, 4]:
+            self.assertEqual(
+                list(
+                    map(
+                        _canonical_split,
+                        backends.split_melds_many(
+                            hands, max_workers=max_workers, chunk_size=7
+                        ),
+                    )
+                ),
+                [_canonical_split(backends.split_melds(h)) for h in hands],
+            )
+
+
+@unittest.skipUnless(
+    "native" in backends.available_backends(), "needs a card_games build"
+)
+class NativeParityTestCase(unittest.TestCase):
+    """ Test the native solvers against python over random deals """
+
+    def test_layoff_deadwood(self):
+        """ the same deadwood after laying off onto sets and runs """
+        native = backends.load_backend("native")
+        python = backends.load_backend("python")
+        assert native is not None and python is not None
+        # a set layoff, and a layoff onto an ace-high run
+        deals = [
+            (
+                ["4c", "9s", "3s", "Kd", "Qh", "7c", "8d", "2h", "Jc", "6s"],
+                [["3c", "3d", "3h"]],
+            ),
+            (
+                ["8s", "Jh", "7h", "Jc", "9c", "7d", "8c", "Tc", "7s", "Qc"],
+                [["Ah", "Qh", "Kh"]],
+            ),
+        ]
+        rng = random.Random(0)
+        for _ in range(1000):
+            deal = rng.sample(DECK_CARDS, 21)
+            _, opp_melds, _ = python.split_melds(deal[10:])
+            deals.append((deal[:10], opp_melds))
+
+        for hand, opp_melds in deals:
+            for stop_on_zero in (True, False):
+                self.assertEqual(
+                    native.layoff_deadwood(
+                        hand, opp_melds, stop_on_zero
+                    )[0],
+                    python.layoff_deadwood(
+                        hand, opp_melds, stop_on_zero
+                    )[0],
+                    f"{hand} onto {opp_melds}",
+                )
+
+    def test_split_melds_many_batch(self):
+        """ native chunks are solved in one batch call each, not by hand """
+        rng = random.Random(1)
+        hands = [rng.sample(DECK_CARDS, 10 + i % 2) for i in range(300)]
+        expected = [
+            _canonical_split(backends.split_melds(hand)) for hand in hands
+        ]
+        backends.use_backend("native", parity_rate=1.0, strict=True)
+        try:
+            with mock.patch.object(
+                backends, "split_melds", side_effect=AssertionError
+            ):
+                splits = backends.split_melds_many(
+                    hands, max_workers=2, chunk_size=64
+                )
+            checker = backends.parity_checker
+            assert checker is not None
+            self.assertEqual(checker.stats["checks"], len(hands))
+        finally:
+            with mock.patch.dict(os.environ, clear=True):
+                backends.use_backend()
+        self.assertEqual(list(map(_canonical_split, splits)), expected)
+        self.assertEqual(splits[0][2], sorted(splits[0][2], key=_ace_low))
+        self.assertEqual(backends.split_melds_many([]), [])
@@ -0,0 +1,149 @@
+import importlib.util
+import random
+import unittest
+
+from card_utils.deck import card_id_map
+from card_utils.deck import cards as DECK_CARDS
+
+# without a build, card_games is just the namespace package of its stubs,
+# so look for the batch bindings themselves
+HAS_BATCH = (
+    importlib.util.find_spec("numpy") is not None
+    and importlib.util.find_spec("card_games") is not None
+    and hasattr(importlib.import_module("card_games"), "split_melds_batch")
+)
+
+NO_CARD = 255
+
+
+def _labelled_melds(hand, labels):
+    """
+    :param hand: ([str])
+    :param labels: (np.ndarray) meld number of each card, 0 if unmelded
+    :return: ([[str]]) sorted melds
+    """
+    melds = [
+        sorted(c for c, label in zip(hand, labels) if label == meld_n)
+        for meld_n in range(1, 4)
+    ]
+    return sorted(meld for meld in melds if meld)
+
+
+@unittest.skipUnless(HAS_BATCH, "needs numpy and a card_games build")
+class CardGamesBatchTestCase(unittest.TestCase):
+    """ Test the batch card_games bindings against the one-hand ones """
+
+    @classmethod
+    def setUpClass(cls):
+        import numpy
+
+        import card_games
+
+        cls.np = numpy
+        cls.card_games = card_games
+
+    def _to_ids(self, hands, width):
+        """
+        :param hands: ([[str]])
+        :param width: (int) cards per row, padded out with NO_CARD
+        :return: (np.ndarray) uint8 card ids, one row per hand
+        """
+        return self.np.array(
+            [
+                [card_id_map[c] for c in hand]
+                + [NO_CARD] * (width - len(hand))
+                for hand in hands
+            ],
+            dtype=self.np.uint8,
+        )
+
+    def setUp(self):
+        rng = random.Random(0)
+        deals = [rng.sample(DECK_CARDS, 21) for _ in range(200)]
+        # 10 and 11 card hands, padded out to 12 cards with NO_CARD
+        self.hands = [deal[: 10 + i % 2] for i, deal in enumerate(deals)]
+        self.opp_hands = [deal[11:] for deal in deals]
+        self.ids = self._to_ids(self.hands, 12)
+
+    def test_split_melds_batch(self):
+        """ same deadwood and melds, with padding labelled NO_MELD """
+        deadwoods, labels = self.card_games.split_melds_batch(self.ids)
+        self.assertEqual(deadwoods.shape, (len(self.hands),))
+        self.assertEqual(labels.shape, self.ids.shape)
+        for hand, deadwood, hand_labels in zip(self.hands, deadwoods, labels):
+            expected, melds, _ = self.card_games.split_melds(hand, None)
+            self.assertEqual(deadwood, expected)
+            self.assertEqual(
+                self.card_games.get_deadwood(
+                    [c for c, label in zip(hand, hand_labels) if label == 0]
+                ),
+                expected,
+            )
+            self.assertEqual(
+                _labelled_melds(hand, hand_labels), sorted(map(sorted, melds))
+            )
+            self.assertTrue((hand_labels[len(hand) :] == -1).all())
+
+    def test_get_candidate_melds_batch(self):
+        """ the same candidates, in any order """
+        all_candidates = self.card_games.get_candidate_melds_batch(self.ids)
+        self.assertEqual(len(all_candidates), len(self.hands))
+        for hand, (deadwoods, labels) in zip(self.hands, all_candidates):
+            self.assertEqual(
+                labels.shape, (len(deadwoods), self.ids.shape[1])
+            )
+            expected = sorted(
+                (deadwood, sorted(map(sorted, melds)))
+                for deadwood, melds, _ in (
+                    self.card_games.get_candidate_melds(hand)
+                )
+            )
+            self.assertEqual(
+                sorted(
+                    (int(deadwood), _labelled_melds(hand, candidate_labels))
+                    for deadwood, candidate_labels in zip(deadwoods, labels)
+                ),
+                expected,
+            )
+            self.assertTrue((labels[:, len(hand) :] == -1).all())
+
+    def test_layoff_deadwood_batch(self):
+        """ the same deadwood and cards laid off onto the opponent """
+        opp_ids = self._to_ids(self.opp_hands, 11)
+        _, opp_labels = self.card_games.split_melds_batch(opp_ids)
+        deadwoods, labels, laid_off = self.card_games.layoff_deadwood_batch(
+            self.ids, opp_ids, opp_labels
+        )
+        self.assertEqual(deadwoods.shape, (len(self.hands),))
+        self.assertEqual(labels.shape, self.ids.shape)
+        self.assertEqual(laid_off.shape, self.ids.shape)
+        for i, hand in enumerate(self.hands):
+            _, opp_melds, _ = self.card_games.split_melds(
+                self.opp_hands[i], None
+            )
+            deadwood, _, expected_laid_off, _ = (
+                self.card_games.layoff_deadwood(hand, opp_melds, True)
+            )
+            self.assertEqual(deadwoods[i], deadwood)
+            self.assertEqual(
+                sorted(c for c, flag in zip(hand, laid_off[i]) if flag),
+                sorted(expected_laid_off),
+            )
+            self.assertFalse(laid_off[i, len(hand) :].any())
+
+    def test_shapes(self):
+        """ hands must be 2-D, with one opponent row per hand """
+        with self.assertRaises(ValueError):
+            self.card_games.split_melds_batch(self.ids[0])
+        with self.assertRaises(ValueError):
+            self.card_games.get_candidate_melds_batch(self.ids[0])
+        opp_ids = self._to_ids(self.opp_hands, 11)
+        _, opp_labels = self.card_games.split_melds_batch(opp_ids)
+        with self.assertRaises(ValueError):
+            self.card_games.layoff_deadwood_batch(
+                self.ids[:-1], opp_ids, opp_labels
+            )
+        with self.assertRaises(ValueError):
+            self.card_games.split_melds_batch(
+                self.np.full((1, 10), 60, self.np.uint8)
+            )
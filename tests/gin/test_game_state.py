@@ -0,0 +1,417 @@
+import json
+import pickle
+import random
+import unittest
+from unittest import mock
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.deck.utils import cards_to_mask
+from card_utils.games.gin import backends
+from card_utils.games.gin.piles import DealtDeck
+from card_utils.games.gin.ricky.game_state import GinRickyGameState
+from card_utils.games.gin.rummy.game_state import GinRummyGameState
+from card_utils.games.gin.rummy.hand import RummyHand
+from card_utils.games.gin.rummy.utils import (
+    iter_knock_candidates,
+    iter_mask_knock_candidates,
+    split_melds,
+)
+from card_utils.games.gin.simulate import deal_game, greedy_policy, play_game
+from card_utils.games.gin.utils import RummyHud, RummyTurn
+
+
+class CountingGameState(GinRummyGameState):
+    """ count how often each player's hand is solved """
+
+    def __init__(self, *args, **kwargs):
+        self.solves = 0
+        super().__init__(*args, **kwargs)
+
+    def compute_hand_deadwood(self, is_p1):
+        self.solves += 1
+        return super().compute_hand_deadwood(is_p1)
+
+    def compute_hand_split(self, is_p1):
+        self.solves += 1
+        return super().compute_hand_split(is_p1)
+
+
+class GinGameStateTestCase(unittest.TestCase):
+    """ Test the lazy per-player deadwood, and draw and discard options """
+
+    def _game_state(self):
+        """
+        :return: (CountingGameState)
+        """
+        return CountingGameState(
+            deck=DECK_CARDS[21:],
+            discard=[DECK_CARDS[20]],
+            p1_hand=DECK_CARDS[:10],
+            p2_hand=DECK_CARDS[10:20],
+            turn=RummyTurn.P1_DRAWS,
+            first_turn=RummyTurn.P1_DRAWS,
+        )
+
+    def test_draw_does_not_solve(self):
+        """ deadwood is only worked out once the discard needs it """
+        game_state = self._game_state()
+        game_state.draw_card(from_discard=False)
+        self.assertEqual(game_state.solves, 0)
+
+        game_state.to_dict(is_player_1=True)
+        game_state.to_dict(is_player_1=True)
+        self.assertEqual(game_state.solves, 1)
+
+    def test_hand_changes_invalidate(self):
+        """ drawing, discarding or assigning a hand drops its deadwood """
+        game_state = self._game_state()
+        before = game_state.hand_deadwood(True)
+        game_state.draw_card(from_discard=False)
+        game_state.discard_card(game_state.p1_hand[0])
+        self.assertEqual(
+            game_state.hand_deadwood(True),
+            GinRummyGameState.get_deadwood(game_state.p1_hand),
+        )
+        self.assertEqual(game_state.solves, 2)
+        self.assertNotEqual(game_state.hand_deadwood(True), before)
+
+        game_state.p2_hand = ["Ks", "Kh", "Kd", "2c"]
+        self.assertEqual(game_state.hand_deadwood(False), 2)
+
+    def test_draw_options(self):
+        """ best deadwood for each draw matches solving every discard """
+        game_state = self._game_state()
+        game_state.draw_card(from_discard=False)
+        game_state.discard_card(game_state.p1_hand[0])
+        if game_state.turn.is_knock():
+            game_state.decide_knock(False)
+        options = game_state.get_draw_options()
+
+        hand = game_state.p2_hand
+        unseen = game_state.unseen_cards(is_player_1=False)
+        self.assertEqual(len(unseen), 52 - len(hand) - 2)
+        self.assertEqual(sorted(options["unseen"]), sorted(unseen))
+
+        def naive(card):
+            drawn = [*hand, card]
+            return min(
+                split_melds([c for c in drawn if c != discard])[0]
+                for discard in drawn
+            )
+
+        self.assertEqual(
+            options["top_of_discard"], naive(game_state.top_of_discard)
+        )
+        for card, deadwood in options["unseen"].items():
+            self.assertEqual(deadwood, naive(card))
+        self.assertAlmostEqual(
+            options["deck"], sum(map(naive, unseen)) / len(unseen)
+        )
+
+        game_state.draw_card(from_discard=True)
+        self.assertEqual(game_state.get_draw_options(), {})
+
+    def test_dealt_deck(self):
+        """ drawing moves an index, but the deck still reads like a list """
+        deck = DealtDeck(["2c", "3c", "4c"])
+        self.assertEqual(deck.draw(), "2c")
+        self.assertEqual(deck, ["3c", "4c"])
+        self.assertEqual(deck[0], "3c")
+        self.assertEqual(deck[-1], "4c")
+        self.assertEqual(deck[1:], ["4c"])
+        self.assertIn("4c", deck)
+        self.assertNotIn("2c", deck)
+
+        clone = deck.copy()
+        self.assertIs(clone.cards, deck.cards)
+        clone.draw()
+        self.assertEqual(len(clone), 1)
+        self.assertEqual(len(deck), 2)
+
+        deck.draw()
+        deck.draw()
+        with self.assertRaises(IndexError):
+            deck.draw()
+
+    def test_compact_piles(self):
+        """ draws and discards keep the deck, discard and hands in step """
+        game_state = self._game_state()
+        deck_cards = game_state._deck.cards
+        game_state.draw_card(from_discard=False)
+        self.assertIs(game_state._deck.cards, deck_cards)
+        deck = game_state.deck
+        self.assertEqual(deck, DECK_CARDS[22:])
+        self.assertEqual(json.loads(json.dumps(deck)), DECK_CARDS[22:])
+        self.assertEqual(deck + ["Kd"], [*DECK_CARDS[22:], "Kd"])
+        for change in [lambda: deck.pop(), lambda: deck.insert(0, "Kd")]:
+            with self.assertRaises(TypeError):
+                change()
+        self.assertEqual(pickle.loads(pickle.dumps(deck)), DECK_CARDS[22:])
+        self.assertEqual(len(game_state._deck), len(DECK_CARDS[22:]))
+        self.assertEqual(game_state.p1_hand[-1], DECK_CARDS[21])
+
+        game_state.discard_card(DECK_CARDS[0])
+        self.assertEqual(game_state.discard, [DECK_CARDS[20], DECK_CARDS[0]])
+        self.assertNotIn(DECK_CARDS[0], game_state.p1_hand)
+        for is_p1, hand in [
+            (True, game_state.p1_hand),
+            (False, game_state.p2_hand),
+        ]:
+            self.assertEqual(game_state.hand_masks[is_p1], cards_to_mask(hand))
+
+    def test_hands_read_only(self):
+        """ hands read like lists, but only change through the state """
+        game_state = self._game_state()
+        hand = game_state.p1_hand
+        self.assertEqual(hand, DECK_CARDS[:10])
+        self.assertEqual(json.loads(json.dumps(hand)), DECK_CARDS[:10])
+        self.assertEqual(pickle.loads(pickle.dumps(hand)), hand)
+        self.assertEqual(hand + ["Kd"], [*DECK_CARDS[:10], "Kd"])
+        for change in [
+            lambda: hand.append("Kd"),
+            lambda: hand.pop(),
+            lambda: hand.sort(),
+            lambda: hand.__setitem__(0, "Kd"),
+        ]:
+            with self.assertRaises(TypeError):
+                change()
+
+        game_state.draw_card(from_discard=False)
+        game_state.p1_hand = [*game_state.p1_hand[1:], DECK_CARDS[40]]
+        self.assertEqual(
+            game_state.hand_deadwood(True),
+            GinRummyGameState.get_deadwood(game_state.p1_hand),
+        )
+
+    def test_copy(self):
+        """ a copy plays on to the same end, without touching the original """
+        game_state = deal_game(GinRummyGameState, seed=3)
+        clone = game_state.copy()
+        play_game(game_state, greedy_policy, greedy_policy, random.Random(0))
+
+        self.assertFalse(clone.is_complete)
+        self.assertEqual(
+            clone.p1_hand, deal_game(GinRummyGameState, seed=3).p1_hand
+        )
+        self.assertIs(clone._deck.cards, game_state._deck.cards)
+        play_game(clone, greedy_policy, greedy_policy, random.Random(0))
+        self.assertEqual(
+            (clone.p1_points, clone.p2_points, clone.turns),
+            (game_state.p1_points, game_state.p2_points, game_state.turns),
+        )
+
+    def test_snapshot_restore(self):
+        """ restore goes back to the snapshot, as often as needed """
+        game_state = self._game_state()
+        snapshot = game_state.snapshot()
+        for _ in range(2):
+            game_state.draw_card(from_discard=True)
+            game_state.discard_card(game_state.p1_hand[0])
+            game_state.restore(snapshot)
+            self.assertEqual(game_state.p1_hand, DECK_CARDS[:10])
+            self.assertEqual(game_state.discard, [DECK_CARDS[20]])
+            self.assertEqual(game_state.deck, DECK_CARDS[21:])
+            self.assertEqual(game_state.turn, RummyTurn.P1_DRAWS)
+            self.assertEqual(
+                game_state.public_hud,
+                {DECK_CARDS[20]: RummyHud.TOP_OF_DISCARD},
+            )
+
+    def test_determinize(self):
+        """ only the cards player 1 cannot see are dealt again """
+        game_state = self._game_state()
+        game_state.draw_card(from_discard=False)
+        game_state.discard_card(game_state.p1_hand[0])
+        if game_state.turn.is_knock():
+            game_state.decide_knock(False)
+        taken = game_state.draw_card(from_discard=True)
+
+        determinized = game_state.determinize(True, random.Random(0))
+        self.assertEqual(determinized.p1_hand, game_state.p1_hand)
+        self.assertEqual(determinized.discard, game_state.discard)
+        self.assertEqual(determinized.public_hud, game_state.public_hud)
+        self.assertIn(taken, determinized.p2_hand)
+        self.assertEqual(len(determinized.p2_hand), len(game_state.p2_hand))
+        self.assertEqual(len(determinized.deck), len(game_state.deck))
+        self.assertEqual(
+            sorted([*determinized.p2_hand, *determinized.deck]),
+            sorted([*game_state.p2_hand, *game_state.deck]),
+        )
+        self.assertNotEqual(determinized.p2_hand, game_state.p2_hand)
+        self.assertEqual(
+            determinized.hand_deadwood(False),
+            GinRummyGameState.get_deadwood(determinized.p2_hand),
+        )
+
+    def test_incremental_player_hud(self):
+        """ each player's hud kept card by card matches building it again """
+        for seed in range(5):
+            game_state = deal_game(GinRummyGameState, seed=seed)
+            game_state.player_hud(True)
+            game_state.player_hud(False)
+            rng = random.Random(seed)
+            while not game_state.is_complete:
+                for is_p1 in [True, False]:
+                    hand = game_state.p1_hand if is_p1 else game_state.p2_hand
+                    self.assertEqual(
+                        game_state.player_hud(is_p1),
+                        {
+                            **game_state._transformed_hud(is_p1),
+                            **{c: RummyHud.USER for c in hand},
+                        },
+                    )
+                play_game_turn(game_state, rng)
+
+    def test_cached_payload(self):
+        """ polling to_dict between moves reuses the same payload """
+        game_state = self._game_state()
+        payload = game_state.to_dict(is_player_1=True)
+        solves = game_state.solves
+        self.assertEqual(game_state.to_dict(is_player_1=True), payload)
+        self.assertNotEqual(game_state.to_dict(is_player_1=False), payload)
+        self.assertEqual(game_state.solves, solves + 1)
+
+        game_state.draw_card(from_discard=True)
+        moved = game_state.to_dict(is_player_1=True)
+        self.assertNotEqual(moved, payload)
+        self.assertEqual(moved["hud"], game_state.player_hud(True))
+
+    def test_cached_payload_is_fresh(self):
+        """ fields assigned directly, and changes to a returned payload,
+            do not show up in the next payload
+        """
+        game_state = self._game_state()
+        payload = game_state.to_dict(is_player_1=True)
+        payload["hand"].append("XX")
+        payload["hud"]["XX"] = RummyHud.USER
+        payload["points"] = -1
+        again = game_state.to_dict(is_player_1=True)
+        self.assertNotIn("XX", again["hand"])
+        self.assertNotIn("XX", again["hud"])
+        self.assertNotEqual(again["points"], -1)
+
+        game_state.discard.append(game_state._deck.draw())
+        self.assertEqual(
+            game_state.to_dict(is_player_1=True)["top_of_discard"],
+            game_state.discard[-1],
+        )
+
+        game_state.turn = RummyTurn.P2_DRAWS
+        self.assertEqual(
+            game_state.to_dict(is_player_1=True)["action"],
+            game_state.get_action(True),
+        )
+
+        game_state.turn = RummyTurn.P2_DISCARDS
+        game_state.last_draw = DECK_CARDS[30]
+        game_state.last_draw_from_discard = True
+        payload = game_state.to_dict(is_player_1=False)
+        self.assertEqual(payload["drawn_card"], DECK_CARDS[30])
+        self.assertTrue(payload["last_draw_from_discard"])
+        game_state.last_draw = DECK_CARDS[31]
+        game_state.last_draw_from_discard = False
+        payload = game_state.to_dict(is_player_1=False)
+        self.assertEqual(payload["drawn_card"], DECK_CARDS[31])
+        self.assertFalse(payload["last_draw_from_discard"])
+
+        game_state.is_complete = True
+        game_state.p1_points = 25
+        self.assertEqual(game_state.to_dict(is_player_1=True)["points"], 25)
+
+    def test_one_solve_per_hand(self):
+        """ sorting, scoring and knocking share one solve of the hand """
+        game_state = self._game_state()
+        game_state.draw_card(from_discard=False)
+        with mock.patch.object(
+            RummyHand, "solve", autospec=True, side_effect=RummyHand.solve
+        ) as solve:
+            payload = game_state.to_dict(is_player_1=True)
+            self.assertEqual(solve.call_count, 1)
+            hand = game_state.p1_hand
+            self.assertEqual(sorted(payload["hand"]), sorted(hand))
+            self.assertEqual(
+                payload["points"], GinRummyGameState.get_deadwood(hand)
+            )
+            game_state.discard_card(payload["hand"][-1])
+            game_state.get_knock_candidates()
+            game_state.to_dict(is_player_1=True)
+            self.assertLessEqual(solve.call_count, 2)
+
+    def test_knock_candidates_cached(self):
+        """ polling the knock candidates solves them once per hand """
+        rng = random.Random(0)
+        game_state = deal_game(GinRummyGameState, seed=0)
+        assert isinstance(game_state, GinRummyGameState)
+        while not game_state.turn.is_knock():
+            play_game_turn(game_state, rng)
+        is_p1 = game_state.turn.p1()
+        hand = game_state.p1_hand if is_p1 else game_state.p2_hand
+        expected = list(iter_knock_candidates(hand))
+        with mock.patch(
+            "card_utils.games.gin.rummy.hand.iter_mask_knock_candidates",
+            side_effect=iter_mask_knock_candidates,
+        ) as knock_candidates, mock.patch.object(
+            RummyHand, "solve", autospec=True, side_effect=RummyHand.solve
+        ) as solve:
+            game_state.hand_split(is_p1)
+            game_state.get_knock_candidates().clear()
+            self.assertEqual(game_state.get_knock_candidates(), expected)
+            self.assertEqual(knock_candidates.call_count, 1)
+            self.assertLessEqual(solve.call_count, 1)
+
+    def test_static_split_cached(self):
+        """ sort_hand and get_deadwood share one solve of a hand """
+        hand = random.Random(5).sample(DECK_CARDS, 10)
+        with mock.patch.object(
+            backends, "split_melds", side_effect=backends.split_melds
+        ) as split:
+            sorted_hand = GinRummyGameState.sort_hand(hand)
+            sorted_hand.append("XX")
+            self.assertNotIn("XX", GinRummyGameState.sort_hand(hand))
+            self.assertEqual(
+                GinRummyGameState.get_deadwood(hand), split_melds(hand)[0]
+            )
+            self.assertLessEqual(split.call_count, 1)
+
+    def test_no_knock_candidates(self):
+        """ a hand the solve says cannot knock is never enumerated """
+        hand = RummyHand(["Ks", "Qd", "Jc", "9h", "8s", "5d", "2c"])
+        with mock.patch(
+            "card_utils.games.gin.rummy.hand.iter_mask_knock_candidates"
+        ) as knock_candidates:
+            self.assertEqual(hand.knock_candidates(), [])
+            knock_candidates.assert_not_called()
+
+    def test_ricky_hand_split(self):
+        """ ricky sorts and scores a hand in one go """
+        game_state = deal_game(GinRickyGameState, seed=1)
+        deadwood, melds, unmelded = game_state.hand_split(True)
+        self.assertEqual(melds, [])
+        self.assertEqual(
+            (unmelded, deadwood),
+            (
+                GinRickyGameState.sort_hand(game_state.p1_hand),
+                GinRickyGameState.get_deadwood(game_state.p1_hand),
+            ),
+        )
+        self.assertEqual(game_state.to_dict(True)["hand"], unmelded)
+
+
+def play_game_turn(game_state, rng):
+    """ play the turn with the greedy policy, as play_game would """
+    turn = game_state.turn
+    if turn.is_draw_from_deck():
+        game_state.draw_card(from_discard=False)
+        return
+    decision = greedy_policy(game_state, rng)
+    if turn.is_first_draw():
+        if decision:
+            game_state.draw_card(from_discard=True)
+        else:
+            game_state.first_turn_pass()
+    elif turn.is_draw():
+        game_state.draw_card(from_discard=bool(decision))
+    elif turn.is_discard():
+        game_state.discard_card(decision)
+    else:
+        game_state.decide_knock(decision is not None, decision)
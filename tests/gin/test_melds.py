@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from card_utils.deck import card_bit_index, cards as DECK_CARDS
+from card_utils.deck.utils import cards_to_mask
+from card_utils.games.gin.melds import (
+    MELD_MASKS,
+    RUN_MASKS,
+    SET_MASKS,
+    hand_melds,
+    melds_with_card,
+)
+from card_utils.games.gin.rummy.utils import _get_runs, _get_sets
+
+
+class MeldIndexTestCase(unittest.TestCase):
+    """ Test the static index of gin melds """
+
+    def test_index_size(self):
+        """ 13 ranks * 5 sets, and 4 suits * 76 runs of 3 to 13 cards """
+        self.assertEqual(len(SET_MASKS), 65)
+        self.assertEqual(len(RUN_MASKS), 304)
+        self.assertEqual(len(set(MELD_MASKS)), len(MELD_MASKS))
+
+    def test_aces_high_and_low(self):
+        """ A23 and QKA are runs, KA2 is not """
+        for run in [["Ah", "2h", "3h"], ["Qh", "Kh", "Ah"]]:
+            self.assertIn(cards_to_mask(run), RUN_MASKS)
+        self.assertNotIn(cards_to_mask(["Kh", "Ah", "2h"]), RUN_MASKS)
+        self.assertEqual(hand_melds(cards_to_mask(["Kh", "Ah", "2h"])), [])
+
+    def test_hand_melds_match_card_lists(self):
+        """ same melds as the card-list set and run finders """
+        rng = random.Random(0)
+        for ii in range(300):
+            deck = [c for c in DECK_CARDS]
+            if ii % 2 == 0:
+                deck = [c for c in deck if c[1] in "hs" or c[0] in "A2345"]
+            hand = rng.sample(deck, rng.choice([7, 10, 11]))
+            expected = sorted(
+                cards_to_mask(m) for m in _get_sets(hand) + _get_runs(hand)
+            )
+            self.assertEqual(sorted(hand_melds(cards_to_mask(hand))), expected)
+
+    def test_melds_with_card(self):
+        """ only the melds that use the given card """
+        hand_mask = cards_to_mask(["5h", "6h", "7h", "7c", "7d", "2s"])
+        melds = melds_with_card(hand_mask, card_bit_index["7h"])
+        self.assertEqual(
+            sorted(melds),
+            sorted(
+                [
+                    cards_to_mask(["5h", "6h", "7h"]),
+                    cards_to_mask(["7h", "7c", "7d"]),
+                ]
+            ),
+        )
+        self.assertEqual(melds_with_card(hand_mask, card_bit_index["2s"]), [])
@@ -0,0 +1,60 @@
+import importlib.util
+import random
+import unittest
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.deck.utils import cards_to_mask
+from card_utils.games.gin import planes
+from card_utils.games.gin.rummy.utils import split_melds
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+
+@unittest.skipUnless(HAS_NUMPY, "needs numpy")
+class PlanesTestCase(unittest.TestCase):
+    """ Test finding melds in many gin hands at once """
+
+    hand = ["Ac", "2c", "3c", "Qd", "Kd", "Ad", "5h", "5s", "5d", "9c"]
+
+    def test_planes_match_masks(self):
+        """ planes line up with the bits of hand masks """
+        hand_planes = planes.hands_to_planes([self.hand])
+        self.assertEqual(hand_planes.shape, (1, 4, 13))
+        self.assertEqual(
+            planes.planes_to_masks(hand_planes), [cards_to_mask(self.hand)]
+        )
+
+    def test_sets_and_runs(self):
+        """ column sums find sets, sliding row sums find runs """
+        hand_planes = planes.hands_to_planes([self.hand])
+        self.assertEqual(planes.set_ranks(hand_planes).sum(), 1)
+        windows = planes.run_windows(hand_planes, 3)
+        self.assertEqual(windows.shape, (1, 4, 12))
+        # A-2-3 of clubs starts at the ace low, Q-K-A of diamonds at the Q
+        self.assertTrue(windows[0, 0, 0])
+        self.assertTrue(windows[0, 1, 11])
+        self.assertEqual(windows.sum(), 2)
+        self.assertEqual(planes.contained_melds(hand_planes).sum(), 3)
+
+    def test_batch_deadwood(self):
+        """ same deadwood as split_melds, however many melds a hand has """
+        rng = random.Random(0)
+        stacked = [c for c in DECK_CARDS if c[1] in "hs" or c[0] in "A2345"]
+        hands = [
+            rng.sample(stacked if ii % 2 else DECK_CARDS, rng.choice([10, 11]))
+            for ii in range(500)
+        ]
+        deadwoods = planes.batch_deadwood(
+            planes.hands_to_planes(hands), chunk_size=64
+        )
+        self.assertEqual(
+            deadwoods.tolist(), [split_melds(hand)[0] for hand in hands]
+        )
+
+    def test_random_planes(self):
+        """ every random hand has the right number of cards """
+        dealt = planes.random_planes(100, n_cards=10, seed=0)
+        self.assertTrue((dealt.sum(axis=(1, 2)) == 10).all())
+        stats = planes.meld_stats(dealt)
+        self.assertEqual(set(stats), {"sets", "runs", "melds", "deadwood"})
+        self.assertTrue((stats["melds"] >= stats["sets"]).all())
@@ -0,0 +1,110 @@
+import os
+import random
+import tempfile
+import threading
+import unittest
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.deck.utils import cards_to_mask
+from card_utils.games.gin.ricky.cache import HandPointsCache, canonize_mask
+from card_utils.games.gin.ricky.utils import sorted_hand_points
+
+
+class HandPointsCacheTestCase(unittest.TestCase):
+    """ Test the gin ricky hand points cache """
+
+    def test_canonize_mask(self):
+        """ hands the same up to suits share a canonical mask """
+        hand = ["2c", "3c", "4c", "Kd", "Ah", "Ad", "7s"]
+        swapped = ["2h", "3h", "4h", "Ks", "Ac", "As", "7d"]
+        self.assertEqual(
+            canonize_mask(cards_to_mask(hand))[0],
+            canonize_mask(cards_to_mask(swapped))[0],
+        )
+        self.assertNotEqual(
+            canonize_mask(cards_to_mask(hand))[0],
+            canonize_mask(cards_to_mask(["2c", "3c", "4d", *hand[3:]]))[0],
+        )
+
+    def test_matches_sorted_hand_points(self):
+        """ same points, and the sorted hand is led by a scoring meld """
+        cache = HandPointsCache()
+        rng = random.Random(0)
+        for _ in range(1000):
+            hand = rng.sample(DECK_CARDS, rng.choice([7, 8]))
+            expected_hand, expected_points = sorted_hand_points(hand)
+            for _ in range(2):
+                sorted_hand, points = cache.sorted_hand_points(hand)
+                self.assertEqual(points, expected_points)
+                self.assertEqual(sorted(sorted_hand), sorted(hand))
+        self.assertEqual(cache.hits, 1000)
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_suit_isomorphic_hit(self):
+        """ a hand the same up to suits is a hit, in its own suits """
+        cache = HandPointsCache()
+        cache.sorted_hand_points(["5c", "6c", "7c", "8c", "Kd", "Kh", "Ks"])
+        sorted_hand, points = cache.sorted_hand_points(
+            ["5h", "6h", "7h", "8h", "Kd", "Kc", "Ks"]
+        )
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(points, 0)
+        self.assertEqual(sorted_hand[:4], ["5h", "6h", "7h", "8h"])
+
+    def test_lru_eviction(self):
+        """ the least recently used hand goes first """
+        cache = HandPointsCache(max_size=2)
+        hands = [
+            ["2c", "3c", "4c", "5d", "9h", "Ts", "Jd"],
+            ["2c", "3c", "5c", "5d", "9h", "Ts", "Jd"],
+            ["2c", "4c", "5c", "5d", "9h", "Ts", "Jd"],
+        ]
+        cache.hand_points(hands[0])
+        cache.hand_points(hands[1])
+        cache.hand_points(hands[0])
+        cache.hand_points(hands[2])
+        self.assertEqual(cache.evictions, 1)
+        cache.hand_points(hands[0])
+        self.assertEqual(cache.stats["hits"], 2)
+        cache.hand_points(hands[1])
+        self.assertEqual(cache.misses, 4)
+
+    def test_threads_share_cache(self):
+        """ lookups from several threads keep the counts and size right """
+        cache = HandPointsCache(max_size=50)
+        rng = random.Random(0)
+        hands = [rng.sample(DECK_CARDS, 7) for _ in range(200)]
+        expected = [sorted_hand_points(hand)[1] for hand in hands]
+        results = {}
+
+        def look_up(thread_id):
+            results[thread_id] = [cache.hand_points(h) for h in hands]
+
+        threads = [
+            threading.Thread(target=look_up, args=(i,)) for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(list(results.values()), [expected] * 4)
+        self.assertEqual(cache.hits + cache.misses, 4 * len(hands))
+        self.assertLessEqual(cache.stats["hands"], 50)
+
+    def test_save_load(self):
+        """ a saved cache starts off with the same hands """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "ricky.pkl")
+            cache = HandPointsCache(path=path)
+            hand = ["2c", "3c", "4c", "5d", "9h", "Ts", "Jd"]
+            cache.hand_points(hand)
+            cache.save()
+
+            loaded = HandPointsCache(path=path)
+            self.assertEqual(loaded.hand_points(hand), 5 + 9 + 10 + 11)
+            self.assertEqual(loaded.stats["hits"], 1)
+            self.assertEqual(loaded.stats["hands"], 1)
+
+        with self.assertRaises(ValueError):
+            HandPointsCache().save()
@@ -0,0 +1,80 @@
+import random
+import unittest
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.games.gin.ricky.utils import (
+    RICKY_MELD_MASKS,
+    get_melds,
+    mask_points,
+    sorted_hand_points,
+    sum_points_by_ranks,
+)
+from card_utils.deck.utils import cards_to_mask
+
+
+class RickyUtilsTestCase(unittest.TestCase):
+    """ Test gin ricky hand scoring """
+
+    def _random_hands(self, n_hands, seed=0):
+        """ random 7 and 8 card hands, every third one drawn
+            from a deck stacked so that it has plenty of melds
+
+        :param n_hands: (int)
+        :param seed: (int)
+        :return: ([[str]])
+        """
+        rng = random.Random(seed)
+        hands = []
+        for ii in range(n_hands):
+            deck = [c for c in DECK_CARDS]
+            if ii % 3 == 0:
+                deck = [c for c in deck if c[1] in "hs" or c[0] in "A2345"]
+            hands.append(rng.sample(deck, rng.choice([7, 8])))
+        return hands
+
+    def test_meld_index(self):
+        """ every set, and every run of 3 or 4 with aces high or low """
+        self.assertEqual(len(RICKY_MELD_MASKS), 13 * 5 + 4 * (12 + 11))
+
+    def test_mask_points(self):
+        """ points of a mask match points of the cards """
+        for hand in self._random_hands(200):
+            mask = cards_to_mask(hand)
+            self.assertEqual(mask_points(mask), sum_points_by_ranks(hand))
+            self.assertEqual(
+                mask_points(mask, discards=True),
+                sum_points_by_ranks(hand)
+                - max(sum_points_by_ranks([c]) for c in hand),
+            )
+
+    def test_bitmask_gin(self):
+        """ a 4-meld and a 3-meld leave no points, the 4-meld first """
+        hand = ["Qs", "Ks", "As", "7c", "7d", "7h", "7s", "2d"]
+        sorted_hand, points = sorted_hand_points(hand, backend="bitmask")
+        self.assertEqual(points, 0)
+        self.assertEqual(sorted_hand[4:7], ["Qs", "Ks", "As"])
+        self.assertEqual(sorted_hand[-1], "2d")
+
+    def test_bitmask_backend_matches_melds(self):
+        """ same points, with the hand led by a meld that scores them """
+        for hand in self._random_hands(2000):
+            expected = sorted_hand_points(hand)
+            sorted_hand, points = sorted_hand_points(hand, backend="bitmask")
+            self.assertEqual(points, expected[1], hand)
+            self.assertEqual(sorted(sorted_hand), sorted(hand))
+            no_meld_points = mask_points(
+                cards_to_mask(hand), discards=len(hand) == 8
+            )
+            if points < no_meld_points:
+                melds_3, melds_4 = get_melds(hand)
+                self.assertTrue(
+                    any(
+                        sorted(m) == sorted(sorted_hand[: len(m)])
+                        for m in melds_3 + melds_4
+                    ),
+                    hand,
+                )
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            sorted_hand_points(["2c"], backend="magic")
@@ -0,0 +1,86 @@
+import random
+import unittest
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.games.gin.rummy.game_state import GinRummyGameState
+from card_utils.games.gin.rummy.hand import RummyHand
+from card_utils.games.gin.rummy.utils import split_melds
+from card_utils.games.gin.utils import RummyTurn
+
+
+class RummyHandTestCase(unittest.TestCase):
+    """ Test the incremental gin rummy hand """
+
+    def test_add_and_remove(self):
+        """ same split as solving from scratch after every card """
+        rng = random.Random(0)
+        for _ in range(100):
+            deck = rng.sample(DECK_CARDS, len(DECK_CARDS))
+            hand, rest = deck[:10], deck[10:]
+            rummy_hand = RummyHand(hand)
+            for _ in range(10):
+                card = rest.pop()
+                hand.append(card)
+                rummy_hand.add(card)
+                self.assertEqual(
+                    rummy_hand.split(), split_melds(hand, backend="bitmask")
+                )
+                card = rng.choice(hand)
+                hand.remove(card)
+                rummy_hand.remove(card)
+                self.assertEqual(
+                    rummy_hand.split(), split_melds(hand, backend="bitmask")
+                )
+
+    def test_deadwood_shortcuts(self):
+        """ cards outside any meld change deadwood without solving """
+        rummy_hand = RummyHand(["5h", "6h", "7h", "Kc"])
+        self.assertEqual(rummy_hand.deadwood, 10)
+        rummy_hand.add("9s")
+        self.assertIsNotNone(rummy_hand._best_melds)
+        self.assertEqual(rummy_hand.deadwood, 19)
+        rummy_hand.remove("Kc")
+        self.assertEqual(rummy_hand.deadwood, 9)
+
+        rummy_hand.remove("6h")
+        self.assertIsNone(rummy_hand._best_melds)
+        self.assertEqual(rummy_hand.deadwood, 21)
+        self.assertEqual(rummy_hand.melds, set())
+
+        with self.assertRaises(ValueError):
+            rummy_hand.remove("6h")
+        with self.assertRaises(ValueError):
+            rummy_hand.add("9s")
+
+    def test_game_state_deadwood(self):
+        """ tracked deadwood follows the hands through random games """
+        rng = random.Random(1)
+        for _ in range(20):
+            deck = rng.sample(DECK_CARDS, len(DECK_CARDS))
+            game_state = GinRummyGameState(
+                deck=deck[21:],
+                discard=[deck[20]],
+                p1_hand=deck[:10],
+                p2_hand=deck[10:20],
+                turn=RummyTurn.P1_DRAWS,
+                first_turn=RummyTurn.P1_DRAWS,
+            )
+            while not game_state.is_complete:
+                turn = game_state.turn
+                if turn.is_draw():
+                    game_state.draw_card(from_discard=rng.random() < 0.3)
+                elif turn.is_discard():
+                    hand = (
+                        game_state.p1_hand if turn.p1() else game_state.p2_hand
+                    )
+                    game_state.discard_card(rng.choice(hand))
+                else:
+                    game_state.decide_knock(False)
+                for is_p1, hand in [
+                    (True, game_state.p1_hand),
+                    (False, game_state.p2_hand),
+                ]:
+                    self.assertEqual(
+                        game_state.hand_deadwood(is_p1),
+                        GinRummyGameState.get_deadwood(hand),
+                    )
@@ -0,0 +1,150 @@
+import random
+import unittest
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.games.gin.rummy.utils import (
+    get_candidate_melds,
+    get_deadwood,
+    get_discard_options,
+    get_mask_deadwood,
+    iter_knock_candidates,
+    layoff_deadwood,
+    powerset_layoff_deadwood,
+    split_melds,
+)
+from card_utils.deck.utils import cards_to_mask
+from card_utils.games.gin.melds import MELD_MASKS
+
+
+class RummyUtilsTestCase(unittest.TestCase):
+    """ Test gin rummy meld solvers """
+
+    def _random_hands(self, n_hands, seed=0):
+        """ random 10 and 11 card hands, every third one drawn
+            from a deck stacked so that it has plenty of melds
+
+        :param n_hands: (int)
+        :param seed: (int)
+        :return: ([[str]])
+        """
+        rng = random.Random(seed)
+        hands = []
+        for ii in range(n_hands):
+            deck = [c for c in DECK_CARDS]
+            if ii % 3 == 0:
+                deck = [c for c in deck if c[1] in "hs" or c[0] in "A2345"]
+            hands.append(rng.sample(deck, rng.choice([10, 11])))
+        return hands
+
+    def test_mask_deadwood(self):
+        """ deadwood of a mask matches deadwood of the cards """
+        for hand in self._random_hands(100):
+            self.assertEqual(
+                get_mask_deadwood(cards_to_mask(hand)), get_deadwood(hand)
+            )
+
+    def test_bitmask_backend_gin(self):
+        """ gin is found with a 4-card run and two sets """
+        hand = ["5h", "6h", "7h", "8h", "2c", "2d", "2s", "Kc", "Kd", "Ks"]
+        deadwood, melds, unmelded = split_melds(hand, backend="bitmask")
+        self.assertEqual(deadwood, 0)
+        self.assertEqual(len(melds), 3)
+        self.assertEqual(unmelded, [])
+
+    def test_bitmask_backend_matches_candidates(self):
+        """ same deadwood as the default, from valid disjoint melds
+            (ties between equally good splits may be broken differently)
+        """
+        for hand in self._random_hands(500):
+            deadwood, melds, unmelded = split_melds(hand, backend="bitmask")
+            self.assertEqual(deadwood, split_melds(hand)[0])
+            self.assertEqual(deadwood, get_deadwood(unmelded))
+            self.assertEqual(
+                sorted(c for m in [*melds, unmelded] for c in m), sorted(hand)
+            )
+            for meld in melds:
+                self.assertIn(cards_to_mask(meld), MELD_MASKS)
+
+    def test_discard_options(self):
+        """ one split per discard, same as solving each 10 card hand """
+        for hand in self._random_hands(200, seed=1):
+            if len(hand) != 11:
+                continue
+            options = get_discard_options(hand)
+            self.assertEqual(list(options), hand)
+            for card, option in options.items():
+                deadwood, melds, unmelded, may_knock = option
+                left = [c for c in hand if c != card]
+                self.assertEqual(
+                    (deadwood, melds, unmelded),
+                    split_melds(left, backend="bitmask"),
+                )
+                self.assertEqual(may_knock, deadwood <= 10)
+
+    def test_layoff_deadwood(self):
+        """ cards lay off onto the opponent's sets and runs """
+        hand = ["5c", "5d", "5h", "3s", "4s", "5s", "Ac", "Ad", "4h", "7s"]
+        opp_melds = [["3h", "3d", "3c"], ["7c", "7d", "7h"]]
+        deadwood, _, laid_off, _ = layoff_deadwood(hand, opp_melds)
+        self.assertEqual(deadwood, 6)
+        self.assertEqual(laid_off, ["7s"])
+
+        hand = ["5c", "5d", "5h", "9d", "Td", "Jd", "3s", "4s", "Ac", "Ad"]
+        for opp_melds in [
+            [["5s", "6s", "7s"], ["7c", "7d", "7h"]],
+            [["5s", "6s", "7s"], ["4c", "4d", "4h"]],
+        ]:
+            deadwood, _, laid_off, _ = layoff_deadwood(hand, opp_melds)
+            self.assertEqual(deadwood, 2)
+            self.assertEqual(laid_off, ["4s", "3s"])
+
+    def test_layoff_deadwood_matches_powerset(self):
+        """ same result as the exhaustive search, for random knocks """
+        hands = self._random_hands(400, seed=2)
+        for knocker, hand in zip(hands[::2], hands[1::2]):
+            hand = [c for c in hand if c not in knocker][:10]
+            _, opp_melds, _ = split_melds(knocker[:10])
+            for stop_on_zero in [True, False]:
+                deadwood, melds, laid_off, unmelded = layoff_deadwood(
+                    hand, opp_melds, stop_on_zero
+                )
+                expected = powerset_layoff_deadwood(
+                    hand, opp_melds, stop_on_zero
+                )
+                self.assertEqual(
+                    (deadwood, melds, laid_off, sorted(unmelded)),
+                    (*expected[:3], sorted(expected[3])),
+                )
+
+    def test_knock_candidates_dedup(self):
+        """ 3-8 of hearts is offered once, not also as 3-5 and 6-8 """
+        hand = ["3h", "4h", "5h", "6h", "7h", "8h", "Kc", "Kd", "Ks", "2c"]
+        candidates = list(iter_knock_candidates(hand))
+        self.assertIn(
+            (2, [["Kc", "Kd", "Ks"], ["3h", "4h", "5h", "6h", "7h", "8h"]]),
+            candidates,
+        )
+        self.assertNotIn(
+            (2, [["Kc", "Kd", "Ks"], ["3h", "4h", "5h"], ["6h", "7h", "8h"]]),
+            candidates,
+        )
+        self.assertEqual(sorted(dw for dw, _ in candidates), [2, 5, 9, 10])
+
+    def test_knock_candidates_match_candidate_melds(self):
+        """ the same deadwoods and melded cards as the full sweep """
+        for hand in self._random_hands(300, seed=3):
+            expected = {
+                (dw, cards_to_mask([c for m in melds for c in m]))
+                for dw, melds, _ in get_candidate_melds(
+                    hand, max_deadwood=10, stop_on_gin=False
+                )
+            }
+            got = {
+                (dw, cards_to_mask([c for m in melds for c in m]))
+                for dw, melds in iter_knock_candidates(hand)
+            }
+            self.assertEqual(got, expected)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            split_melds(DECK_CARDS[:10], backend="abacus")
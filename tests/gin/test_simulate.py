@@ -0,0 +1,73 @@
+import random
+import unittest
+
+from card_utils.games.gin.ricky.game_state import GinRickyGameState
+from card_utils.games.gin.rummy.game_state import GinRummyGameState
+from card_utils.games.gin.simulate import (
+    deal_game,
+    greedy_policy,
+    random_policy,
+    simulate,
+)
+
+
+class SimulateTestCase(unittest.TestCase):
+    """ Test self-play simulation of gin games """
+
+    def test_seeded_deals(self):
+        """ the same seed deals the same cards """
+        first = deal_game(GinRummyGameState, seed=7)
+        second = deal_game(GinRummyGameState, seed=7)
+        self.assertEqual(first.p1_hand, second.p1_hand)
+        self.assertEqual(first.deck, second.deck)
+        self.assertEqual(len(first.p1_hand), 10)
+        self.assertEqual(len(deal_game(GinRickyGameState, seed=7).p2_hand), 7)
+
+    def test_greedy_beats_random(self):
+        """ every game finishes, and the stats add up """
+        stats = simulate(
+            GinRummyGameState,
+            greedy_policy,
+            random_policy,
+            n_games=10,
+            processes=1,
+        )
+        self.assertEqual(stats["games"], 10)
+        self.assertEqual(
+            stats["p1_wins"] + stats["p2_wins"] + stats["draws"], 10
+        )
+        self.assertGreater(stats["p1_wins"], stats["p2_wins"])
+        self.assertGreater(stats["games_per_sec"], 0)
+        self.assertGreater(stats["meld_seconds"], 0)
+
+    def test_process_pool_matches(self):
+        """ the same games are played in worker processes """
+        results = [
+            [
+                (g["seed"], g["p1_points"], g["p2_points"], g["turns"])
+                for g in simulate(
+                    GinRickyGameState,
+                    greedy_policy,
+                    greedy_policy,
+                    n_games=6,
+                    seed=100,
+                    processes=processes,
+                )["results"]
+            ]
+            for processes in [1, 2]
+        ]
+        self.assertEqual(results[0], results[1])
+
+    def test_keeps_global_random(self):
+        """ seeding each game in process leaves the caller's random alone """
+        random.seed(5)
+        expected = random.random()
+        random.seed(5)
+        simulate(
+            GinRummyGameState,
+            greedy_policy,
+            greedy_policy,
+            n_games=2,
+            processes=1,
+        )
+        self.assertEqual(random.random(), expected)
@@ -0,0 +1,104 @@
+import random
+import unittest
+
+from card_utils.deck import cards as DECK_CARDS
+from card_utils.deck.utils import cards_to_mask
+from card_utils.games.gin.ricky.game_state import GinRickyGameState
+from card_utils.games.gin.rummy.game_state import GinRummyGameState
+from card_utils.games.gin.simulate import deal_game
+from card_utils.games.gin.tracker import CardTracker
+from card_utils.games.gin.utils import RummyTurn
+from tests.gin.test_game_state import play_game_turn
+
+
+class CardTrackerTestCase(unittest.TestCase):
+    """ Test tracking the cards each player cannot see """
+
+    def _assert_same(self, tracker, expected):
+        """
+        :param tracker: (CardTracker)
+        :param expected: (CardTracker)
+        """
+        for attr in CardTracker.__slots__:
+            self.assertEqual(
+                getattr(tracker, attr), getattr(expected, attr), attr
+            )
+
+    def test_matches_rebuild(self):
+        """ trackers kept move by move match starting again from the hud """
+        for game_class in [GinRummyGameState, GinRickyGameState]:
+            for seed in range(5):
+                game_state = deal_game(game_class, seed=seed)
+                rng = random.Random(seed)
+                while not game_state.is_complete:
+                    for is_p1 in [True, False]:
+                        tracker = game_state.card_tracker(is_p1)
+                        self._assert_same(
+                            tracker,
+                            CardTracker.for_player(game_state, is_p1, tracker),
+                        )
+                    play_game_turn(game_state, rng)
+
+    def test_opponent_holds(self):
+        """ taken cards are certain, seen cards ruled out, the rest even """
+        game_state = GinRummyGameState(
+            deck=DECK_CARDS[21:],
+            discard=[DECK_CARDS[20]],
+            p1_hand=DECK_CARDS[:10],
+            p2_hand=DECK_CARDS[10:20],
+            turn=RummyTurn.P1_DRAWS,
+            first_turn=RummyTurn.P1_DRAWS,
+        )
+        game_state.draw_card(from_discard=False)
+        passed = DECK_CARDS[20]
+        game_state.discard_card(DECK_CARDS[0])
+        if game_state.turn.is_knock():
+            game_state.decide_knock(False)
+        taken = game_state.draw_card(from_discard=True)
+
+        tracker = game_state.card_tracker(True)
+        self.assertEqual(tracker.opponent_holds(taken), 1.0)
+        self.assertEqual(tracker.opponent_holds(DECK_CARDS[1]), 0.0)
+        self.assertEqual(tracker.opponent_holds(passed), 0.0)
+        unseen = game_state.unseen_cards(is_player_1=True)
+        self.assertEqual(tracker.unseen, cards_to_mask(unseen))
+        # the 10 cards of theirs not taken from the discard
+        self.assertAlmostEqual(sum(map(tracker.opponent_holds, unseen)), 10)
+
+        opp_tracker = game_state.card_tracker(False)
+        self.assertEqual(
+            opp_tracker.opp_discarded, cards_to_mask([DECK_CARDS[0]])
+        )
+        self.assertEqual(opp_tracker.opp_passed, cards_to_mask([passed]))
+
+    def test_opponent_passed(self):
+        """ drawing from the deck passes over the top of the discard """
+        game_state = deal_game(GinRummyGameState, seed=0)
+        top = game_state.top_of_discard
+        game_state.first_turn_pass()
+        self.assertEqual(
+            game_state.card_tracker(False).opp_passed, cards_to_mask([top])
+        )
+        self.assertEqual(game_state.card_tracker(True).opp_passed, 0)
+
+    def test_is_safe_discard(self):
+        """ safe once every meld the card could join is out of reach """
+        tracker = CardTracker(
+            own=cards_to_mask(["7h", "7s", "9c"]),
+            discard=cards_to_mask(["6c"]),
+            opp_known=0,
+            opp_hand_size=10,
+        )
+        # sets need two of 7d, 7h, 7s, and runs need 6c, 8c or 9c
+        self.assertTrue(tracker.is_safe_discard("7c"))
+        self.assertFalse(tracker.is_safe_discard("7d"))
+        self.assertFalse(tracker.is_safe_discard("Ks"))
+
+    def test_copy(self):
+        """ a copied state tracks on without touching the original """
+        game_state = deal_game(GinRummyGameState, seed=2)
+        clone = game_state.copy()
+        before = game_state.card_tracker(True).copy()
+        play_game_turn(clone, random.Random(0))
+        play_game_turn(clone, random.Random(0))
+        self._assert_same(game_state.card_tracker(True), before)